@@ -1,10 +1,18 @@
 from flask import Flask
 from dotenv import load_dotenv
+import click
 import os
 from config import Config
-from database import db, migrate
-from controllers import divisao_bandeira_controller, loja_controller, responsavel_controller, planejamento_controller, checkpoint_atividade_controller, atividade_controller, gestao_controller
-from controllers.grupo_trabalho_controller import bp as grupo_trabalho_bp
+from database import db, init_migrate, estado_pools
+from sqlalchemy import text
+from commands import register_commands
+from cache import cache
+from metricas import metricas
+from detector_n1 import detector_n1
+from jobs import fila
+from replica import roteador
+from inicializacao import Inicializacao
+import services.tarefas  # noqa: F401 (registra as tarefas da fila de jobs)
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -12,25 +20,47 @@ load_dotenv()
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
-    
+    inicializacao = Inicializacao(app)
+
     # Inicializar extensões
-    db.init_app(app)
-    migrate.init_app(app, db)
-    
-    # Registrar blueprints
-    app.register_blueprint(divisao_bandeira_controller.bp)
-    app.register_blueprint(loja_controller.bp)
-    app.register_blueprint(responsavel_controller.bp)
-    app.register_blueprint(grupo_trabalho_bp)
-    app.register_blueprint(atividade_controller.bp)
-    app.register_blueprint(checkpoint_atividade_controller.bp)
-    app.register_blueprint(planejamento_controller.bp)
-    app.register_blueprint(gestao_controller.bp)
-    
+    with inicializacao.fase('extensoes'):
+        db.init_app(app)
+        cache.init_app(app)
+        metricas.init_app(app)
+        detector_n1.init_app(app)
+        fila.init_app(app)
+        roteador.init_app(app)
+
+    # Flask-Migrate (alembic) só é necessário para `flask db`; no modo sob
+    # demanda fica fora dos processos web
+    with inicializacao.fase('migrate'):
+        if not inicializacao.sob_demanda or click.get_current_context(silent=True):
+            init_migrate(app)
+
+    # Comandos de manutenção (flask <comando>)
+    with inicializacao.fase('comandos'):
+        register_commands(app)
+
+    # Registrar blueprints (ver inicializacao.BLUEPRINTS)
+    with inicializacao.fase('blueprints'):
+        inicializacao.registrar_blueprints()
+
     # Rota principal
     @app.route('/')
     def index():
         return {'message': 'Ativa RUB - Gestao de rollout', 'status': 'online'}
+
+    # Verificação de saúde para o balanceador/orquestrador
+    @app.route('/health')
+    def health():
+        try:
+            db.session.execute(text('SELECT 1'))
+            banco = 'ok'
+        except Exception as e:
+            db.session.rollback()
+            banco = f'erro: {e}'
+        status = 200 if banco == 'ok' else 503
+        return {'status': 'online' if status == 200 else 'degradado', 'banco': banco, 'pools': estado_pools()}, status
     
     return app
 
@@ -0,0 +1,2 @@
+# Benchmark: geração de massa sintética (dados.py), medição das rotas (rotas.py)
+# e da serialização da API (serializacao.py)
@@ -0,0 +1,185 @@
+from database import db
+from models import (
+    DivisaoBandeira,
+    GrupoTrabalho,
+    Responsavel,
+    Loja,
+    Atividade,
+    Planejamento,
+    CheckpointAtividade,
+    Rollup,
+)
+from datetime import datetime, timedelta
+import random
+
+# Data fixa para que a massa seja idêntica entre execuções
+DATA_BASE = datetime(2025, 1, 1)
+
+STATUS_PESOS = (
+    ('Pendente', 3),
+    ('Em andamento', 2),
+    ('Concluído', 5),
+)
+
+NOMES_CHECKPOINT = 20
+
+
+def gerar_massa(
+    divisoes=5,
+    grupos=20,
+    lojas=500,
+    atividades=30,
+    planejamentos=400,
+    checkpoints=1_000_000,
+    semente=42,
+    lote=10_000,
+    progresso=None,
+):
+    """
+    Gera uma massa sintética determinística de rollout no banco configurado.
+
+    Os ids começam em 1 em todas as tabelas, então o banco deve estar vazio
+    (ver `limpar_banco`). Checkpoints são inseridos em lotes via executemany;
+    contadores de planejamento e rollups são reconstruídos ao final.
+    `progresso(tabela, inseridos, total)` é chamado após cada lote.
+
+    Retorna {tabela: quantidade}.
+    """
+    rnd = random.Random(semente)
+    connection = db.session.connection()
+    agora = DATA_BASE
+    carimbo = {'created_at': agora, 'updated_at': agora}
+
+    def inserir(modelo, linhas):
+        total = len(linhas)
+        for inicio in range(0, total, lote):
+            connection.execute(modelo.__table__.insert(), linhas[inicio:inicio + lote])
+            if progresso:
+                progresso(modelo.__tablename__, min(inicio + lote, total), total)
+
+    n_responsaveis = max(1, grupos // 2)
+    inserir(Responsavel, [
+        dict(carimbo, id_responsavel=i, nome=f'Responsável {i}', contato=f'resp{i}@exemplo.com')
+        for i in range(1, n_responsaveis + 1)
+    ])
+    inserir(DivisaoBandeira, [
+        dict(carimbo, id_bandeira_divisao=i, nome_bandeira=f'Divisão {i}', contato=f'div{i}@exemplo.com')
+        for i in range(1, divisoes + 1)
+    ])
+    inserir(GrupoTrabalho, [
+        dict(carimbo, id_grupo_trabalho=i, nome_grupo=f'Grupo {i:03d}',
+             id_responsavel=rnd.randint(1, n_responsaveis))
+        for i in range(1, grupos + 1)
+    ])
+
+    lojas_por_grupo = {g: [] for g in range(1, grupos + 1)}
+    linhas = []
+    for i in range(1, lojas + 1):
+        id_grupo = (i - 1) % grupos + 1
+        lojas_por_grupo[id_grupo].append(i)
+        linhas.append(dict(
+            carimbo,
+            id_loja=i,
+            nome_loja=f'Loja {i:05d}',
+            endereco=f'Rua {rnd.randint(1, 999)}, {rnd.randint(1, 9999)}',
+            qtd_sku=rnd.randint(500, 20_000),
+            qtd_pessoas=rnd.randint(2, 40),
+            id_divisao_bandeira=rnd.randint(1, divisoes),
+            id_grupo_trabalho=id_grupo,
+        ))
+    inserir(Loja, linhas)
+
+    inserir(Atividade, [
+        dict(carimbo, id_atividade=i, titulo=f'Atividade {i:03d}', descricao=f'Descrição da atividade {i}')
+        for i in range(1, atividades + 1)
+    ])
+
+    planos = []
+    for i in range(1, planejamentos + 1):
+        data_ini = DATA_BASE + timedelta(days=rnd.randint(0, 364), hours=rnd.randint(0, 23))
+        planos.append(dict(
+            carimbo,
+            id_planejamento=i,
+            titulo=f'Planejamento {i:05d}',
+            data_ini=data_ini,
+            data_fim=data_ini + timedelta(days=rnd.randint(1, 30)),
+            id_grupo_trabalho=rnd.randint(1, grupos),
+            id_atividade=rnd.randint(1, atividades),
+            status='Pendente',
+            qtd_pendente=0,
+            qtd_em_andamento=0,
+            qtd_concluido=0,
+        ))
+    inserir(Planejamento, planos)
+
+    # Checkpoints gerados lote a lote para não manter milhões de dicts em memória
+    status_possiveis = [s for s, _ in STATUS_PESOS]
+    pesos = [p for _, p in STATUS_PESOS]
+    tabela = CheckpointAtividade.__table__
+    for inicio in range(0, checkpoints, lote):
+        linhas = []
+        for i in range(inicio + 1, min(inicio + lote, checkpoints) + 1):
+            plano = planos[rnd.randrange(planejamentos)]
+            lojas_grupo = lojas_por_grupo[plano['id_grupo_trabalho']] or [rnd.randint(1, lojas)]
+            status = rnd.choices(status_possiveis, pesos)[0]
+            duracao_plano = (plano['data_fim'] - plano['data_ini']).total_seconds()
+            data_ini = plano['data_ini'] + timedelta(seconds=rnd.uniform(0, duracao_plano))
+            data_fim = (
+                data_ini + timedelta(minutes=rnd.randint(15, 60 * 72))
+                if status != 'Pendente' else None
+            )
+            linhas.append(dict(
+                carimbo,
+                id_checkpoint_atividade=i,
+                nome_checkpoint=f'Checkpoint {rnd.randint(1, NOMES_CHECKPOINT):02d}',
+                id_atividade=plano['id_atividade'],
+                id_loja=rnd.choice(lojas_grupo),
+                id_planejamento=plano['id_planejamento'],
+                status=status,
+                data_ini=data_ini,
+                data_fim=data_fim,
+                observacao=None,
+            ))
+        connection.execute(tabela.insert(), linhas)
+        if progresso:
+            progresso(tabela.name, inicio + len(linhas), checkpoints)
+
+    Planejamento.recalcular_contadores(connection)
+    Rollup.recalcular(connection)
+    _ajustar_sequencias(connection)
+
+    return contar_linhas()
+
+
+def contar_linhas():
+    """{tabela: quantidade de linhas} das tabelas da massa."""
+    return {
+        modelo.__tablename__: db.session.query(modelo).count()
+        for modelo in (
+            DivisaoBandeira, Responsavel, GrupoTrabalho, Loja,
+            Atividade, Planejamento, CheckpointAtividade, Rollup,
+        )
+    }
+
+
+def _ajustar_sequencias(connection):
+    """No PostgreSQL, avança as sequences após a carga com ids explícitos."""
+    if connection.dialect.name != 'postgresql':
+        return
+    for modelo in (
+        DivisaoBandeira, Responsavel, GrupoTrabalho, Loja,
+        Atividade, Planejamento, CheckpointAtividade,
+    ):
+        tabela = modelo.__tablename__
+        coluna = modelo.__table__.primary_key.columns.values()[0].name
+        connection.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{tabela}', '{coluna}'), "
+            f"(SELECT COALESCE(MAX({coluna}), 1) FROM {tabela}))"
+        )
+
+
+def limpar_banco():
+    """Recria todas as tabelas (apaga os dados existentes)."""
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
@@ -0,0 +1,130 @@
+from flask import url_for
+from database import db
+from cache import cache
+from sqlalchemy import event
+from datetime import datetime
+import math
+import time
+import tracemalloc
+
+# Valores usados nos parâmetros de rota (ids inteiros usam 1)
+PARAMETROS_ROTA = {
+    'escopo': 'grupo',
+}
+
+# Variações com query string das rotas mais pesadas
+VARIACOES = [
+    '/gestao/dashboard?divisao_id=1',
+    '/gestao/dashboard?divisao_id=1&grupo_id=1',
+    '/checkpoint-atividades/?page=50',
+    '/checkpoint-atividades/?status=Pendente&grupo_id=1',
+    '/checkpoint-atividades/api?limit=1000',
+    '/gestao/api/previsto-executado?agrupar_por=loja',
+    '/gestao/api/previsto-executado?agrupar_por=planejamento&periodo=semana',
+]
+
+ENDPOINTS_IGNORADOS = {'static', 'metricas'}
+
+# Sem limit a API devolve a tabela inteira; medida em VARIACOES com limit
+URLS_IGNORADAS = {'/checkpoint-atividades/api'}
+
+
+def listar_rotas(app):
+    """URLs GET de todos os blueprints, com parâmetros preenchidos."""
+    # No modo LAZY_STARTUP os blueprints só existem depois de carregados
+    app.extensions['inicializacao'].carregar_todos()
+
+    urls = []
+    for regra in app.url_map.iter_rules():
+        if 'GET' not in regra.methods or regra.endpoint in ENDPOINTS_IGNORADOS:
+            continue
+        valores = {}
+        for argumento in regra.arguments:
+            if argumento in PARAMETROS_ROTA:
+                valores[argumento] = PARAMETROS_ROTA[argumento]
+            elif f'<int:{argumento}>' in regra.rule:
+                valores[argumento] = 1
+        if len(valores) != len(regra.arguments):
+            continue
+        with app.test_request_context():
+            urls.append(url_for(regra.endpoint, **valores))
+    return sorted(set(urls) - URLS_IGNORADAS) + VARIACOES
+
+
+def medir_rotas(app, repeticoes=20, aquecimento=1, filtro=None, usar_cache=False):
+    """
+    Mede cada rota GET com o test client da aplicação.
+
+    Para cada URL: latências p50/p95/média/máxima em ms (sobre `repeticoes`
+    chamadas após `aquecimento`), consultas SQL por requisição e pico de
+    memória alocada em uma chamada extra sob tracemalloc. Com
+    `usar_cache=False` o cache é desligado durante a medição.
+
+    Retorna um dict serializável em JSON, estável para comparação entre versões.
+    """
+    urls = [u for u in listar_rotas(app) if not filtro or filtro in u]
+    cliente = app.test_client()
+    contagem = {'consultas': 0}
+
+    def contar(*args, **kwargs):
+        contagem['consultas'] += 1
+
+    with app.app_context():
+        engine = db.engine
+        dialeto = engine.dialect.name
+
+    backend = cache.backend
+    if not usar_cache:
+        cache.backend = None
+    event.listen(engine, 'before_cursor_execute', contar)
+
+    resultados = {}
+    try:
+        for url in urls:
+            for _ in range(aquecimento):
+                cliente.get(url)
+
+            latencias = []
+            consultas = []
+            status = None
+            for _ in range(repeticoes):
+                contagem['consultas'] = 0
+                inicio = time.perf_counter()
+                resposta = cliente.get(url)
+                resposta.get_data()
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                consultas.append(contagem['consultas'])
+                status = resposta.status_code
+
+            tracemalloc.start()
+            cliente.get(url).get_data()
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            latencias.sort()
+            resultados[url] = {
+                'status': status,
+                'p50_ms': round(_percentil(latencias, 50), 2),
+                'p95_ms': round(_percentil(latencias, 95), 2),
+                'media_ms': round(sum(latencias) / len(latencias), 2),
+                'max_ms': round(latencias[-1], 2),
+                'consultas': max(consultas),
+                'pico_memoria_kb': round(pico / 1024, 1),
+            }
+    finally:
+        event.remove(engine, 'before_cursor_execute', contar)
+        cache.backend = backend
+
+    return {
+        'executado_em': datetime.utcnow().isoformat(timespec='seconds'),
+        'banco': dialeto,
+        'repeticoes': repeticoes,
+        'cache': usar_cache,
+        'rotas': resultados,
+    }
+
+
+def _percentil(valores_ordenados, p):
+    """Percentil nearest-rank de uma lista já ordenada."""
+    posicao = max(1, math.ceil(p / 100 * len(valores_ordenados)))
+    return valores_ordenados[posicao - 1]
@@ -0,0 +1,75 @@
+from flask import current_app
+from database import db
+from models import CheckpointAtividade
+from services import checkpoint_service
+from services.serializacao import dumps, orjson
+from sqlalchemy.orm import joinedload
+import time
+
+# Campos usados na medição com ?fields=
+CAMPOS_REDUZIDOS = ['id_checkpoint_atividade', 'status', 'data_ini', 'data_fim']
+
+
+def medir_serializacao(linhas=100_000, repeticoes=3):
+    """
+    Compara a serialização da API de checkpoints.
+
+    - to_dict: objetos do ORM (atividade e loja via joinedload) + encoder
+      JSON do Flask, como era feito antes do esquema;
+    - esquema: tuplas do SQL montadas por esquemas.CHECKPOINT + `dumps`;
+    - esquema_fields: o mesmo com apenas CAMPOS_REDUZIDOS.
+
+    Cada caminho inclui consulta e codificação. Usa o melhor de
+    `repeticoes` execuções; deve rodar dentro de um app context.
+    """
+    caminhos = {
+        'to_dict': _via_to_dict,
+        'esquema': lambda n: _via_esquema(n, None),
+        'esquema_fields': lambda n: _via_esquema(n, CAMPOS_REDUZIDOS),
+    }
+
+    resultados = {}
+    for nome, caminho in caminhos.items():
+        tempos = []
+        for _ in range(repeticoes):
+            db.session.expunge_all()
+            inicio = time.perf_counter()
+            total, corpo = caminho(linhas)
+            tempos.append(time.perf_counter() - inicio)
+
+        melhor = min(tempos)
+        resultados[nome] = {
+            'linhas': total,
+            'tempo_s': round(melhor, 3),
+            'linhas_por_segundo': round(total / melhor) if melhor else None,
+            'bytes': len(corpo),
+        }
+
+    base = resultados['to_dict']['tempo_s']
+    for medida in resultados.values():
+        medida['ganho'] = round(base / medida['tempo_s'], 2) if medida['tempo_s'] else None
+
+    return {
+        'encoder': 'orjson' if orjson is not None else 'json',
+        'resultados': resultados,
+    }
+
+
+def _via_to_dict(linhas):
+    registros = (
+        CheckpointAtividade.query
+        .options(
+            joinedload(CheckpointAtividade.atividade),
+            joinedload(CheckpointAtividade.loja)
+        )
+        .order_by(CheckpointAtividade.id_checkpoint_atividade)
+        .limit(linhas)
+        .all()
+    )
+    corpo = current_app.json.dumps([r.to_dict() for r in registros]).encode('utf-8')
+    return len(registros), corpo
+
+
+def _via_esquema(linhas, campos):
+    rows, dados = checkpoint_service.listar_api(limit=linhas, campos=campos)
+    return len(rows), dumps(dados)
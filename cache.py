@@ -0,0 +1,289 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Tabela alterada -> namespaces de cache invalidados no commit
+DEPENDENCIAS = {
+    'divisao_bandeira': {'divisao_bandeira'},
+    'grupo_trabalho': {'grupo_trabalho', 'responsavel', 'analise'},
+    'responsavel': {'responsavel', 'grupo_trabalho'},
+    'atividade': {'atividade'},
+    # Totais por divisão/grupo e lojas_info dependem das lojas; as
+    # previsões de duração, de qtd_sku/qtd_pessoas
+    'loja': {'divisao_bandeira', 'grupo_trabalho', 'analise', 'estimativa'},
+    # Agregados de Planejado x Executado (services/analise_service.py);
+    # planejamentos também aparecem em /grupos_trabalho/api?expand=planejamentos
+    'planejamento': {'analise', 'grupo_trabalho'},
+    'checkpoint_atividade': {'analise'},
+    'estimativa_duracao': {'estimativa'},
+    # Não é tabela: datas de planejamentos/checkpoints inseridos, removidos
+    # ou com período alterado (índice da timeline, services/timeline_service.py)
+    'periodo': {'periodo'},
+}
+
+# Headers X-* de resposta que dependem da requisição, não do conteúdo, e
+# por isso não são guardados com a resposta em cache
+HEADERS_POR_REQUISICAO = {'X-Database-Route'}
+
+
+class MemoryBackend:
+    """LRU em memória do processo, com TTL por entrada."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._dados = OrderedDict()
+        # Versões de namespace ficam fora do LRU para nunca serem descartadas
+        self._versoes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._dados.get(key)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em is not None and expira_em < time.monotonic():
+                del self._dados[key]
+                return None
+            self._dados.move_to_end(key)
+            return valor
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            expira_em = time.monotonic() + ttl if ttl else None
+            self._dados[key] = (expira_em, value)
+            self._dados.move_to_end(key)
+            while len(self._dados) > self.max_entries:
+                self._dados.popitem(last=False)
+
+    def versao(self, namespace):
+        with self._lock:
+            return self._versoes.get(namespace, 0)
+
+    def incrementar_versao(self, namespace):
+        with self._lock:
+            self._versoes[namespace] = self._versoes.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+            self._versoes.clear()
+
+
+class RedisBackend:
+    """Backend para qualquer cliente compatível com Redis (get/set/incr)."""
+
+    def __init__(self, client, prefix='ativarub:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        valor = self.client.get(self.prefix + key)
+        return pickle.loads(valor) if valor is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def versao(self, namespace):
+        valor = self.client.get(f'{self.prefix}versao:{namespace}')
+        return int(valor) if valor is not None else 0
+
+    def incrementar_versao(self, namespace):
+        self.client.incr(f'{self.prefix}versao:{namespace}')
+
+
+class Cache:
+    """
+    Cache de consultas de referência e respostas de API.
+
+    As chaves carregam a versão de cada namespace (nome da tabela); um commit
+    que altera a tabela incrementa a versão e invalida todas as entradas
+    dependentes de uma vez. Configuração:
+
+    CACHE_TYPE           'memory' (padrão), 'redis' ou 'null' (desligado)
+    CACHE_REDIS_URL      URL usada quando CACHE_TYPE = 'redis'
+    CACHE_DEFAULT_TTL    segundos (padrão 300)
+    CACHE_MAX_ENTRIES    limite do LRU em memória (padrão 1024)
+    WEB_CONCURRENCY      processos web (workers do gunicorn, padrão 1)
+    REPLICA_MAX_LAG_S    TTL máximo de valores lidos na réplica (padrão 30)
+
+    O backend 'memory' é do processo: a invalidação feita por um worker não
+    chega aos outros. Por isso só é aceito com um processo web; com
+    WEB_CONCURRENCY > 1 use 'redis' (ou 'null').
+
+    Um valor lido na réplica (replica.py) pode ser anterior ao commit que
+    acabou de trocar a versão; por isso fica em cache no máximo pelo
+    atraso aceito da réplica, e não pelo TTL normal.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.default_ttl = 300
+        self.ttl_replica = 30
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, backend=None):
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        self.ttl_replica = max(1, int(app.config.get('REPLICA_MAX_LAG_S', 30)))
+
+        if backend is None:
+            tipo = app.config.get('CACHE_TYPE', 'memory')
+            if tipo == 'memory' and app.config.get('WEB_CONCURRENCY', 1) > 1:
+                raise RuntimeError(
+                    'CACHE_TYPE=memory não é compartilhado entre processos; '
+                    'com WEB_CONCURRENCY > 1 use CACHE_TYPE=redis ou null'
+                )
+            if tipo == 'memory':
+                backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+            elif tipo == 'redis':
+                try:
+                    import redis
+                except ImportError:
+                    raise RuntimeError('CACHE_TYPE=redis requer o pacote "redis" instalado')
+                backend = RedisBackend(redis.Redis.from_url(app.config['CACHE_REDIS_URL']))
+
+        self.backend = backend
+        app.extensions['cache'] = self
+
+    @property
+    def ativo(self):
+        return self.backend is not None
+
+    def _chave(self, namespaces, key):
+        versoes = '|'.join(
+            f'{ns}.{self.backend.versao(ns)}' for ns in sorted(namespaces)
+        )
+        return f'{versoes}|{key}'
+
+    def _ttl(self, ttl):
+        """TTL da entrada, limitado ao atraso da réplica se ela foi usada."""
+        ttl = ttl or self.default_ttl
+        if has_request_context() and g.get('usou_replica'):
+            return min(ttl, self.ttl_replica)
+        return ttl
+
+    def get(self, namespaces, key):
+        if not self.ativo:
+            return None
+        return self.backend.get(self._chave(namespaces, key))
+
+    def set(self, namespaces, key, value, ttl=None):
+        if self.ativo:
+            self.backend.set(self._chave(namespaces, key), value, self._ttl(ttl))
+
+    def memoize(self, namespaces, key, carregar, ttl=None):
+        """
+        Retorna o valor em cache ou chama `carregar()` e o armazena.
+
+        A chave (com as versões) é montada uma vez, antes de carregar: se um
+        commit invalidar o namespace durante `carregar()`, o valor fica sob
+        a versão antiga e não é servido depois da invalidação.
+        """
+        if not self.ativo:
+            return carregar()
+
+        chave = self._chave(namespaces, key)
+        valor = self.backend.get(chave)
+        if valor is None:
+            valor = carregar()
+            self.backend.set(chave, valor, self._ttl(ttl))
+        return valor
+
+    def versao(self, *namespaces):
+        """
+        Token que muda sempre que algum dos namespaces é invalidado (None
+        com o cache desligado). Serve para validar estruturas mantidas fora
+        do cache, como índices em memória.
+        """
+        if not self.ativo:
+            return None
+        return tuple(self.backend.versao(ns) for ns in sorted(namespaces))
+
+    def invalidar(self, *namespaces):
+        if self.ativo:
+            for namespace in namespaces:
+                self.backend.incrementar_versao(namespace)
+
+    def marcar_alterado(self, session, *tabelas):
+        """Registra tabelas alteradas fora do ORM (ex.: INSERT em lote)."""
+        session.info.setdefault('cache_tabelas_alteradas', set()).update(tabelas)
+
+    def resposta(self, *namespaces, ttl=None):
+        """
+        Decorator para rotas GET de API: guarda o corpo da resposta e
+        responde 304 quando o If-None-Match do cliente bate com o ETag.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Chave montada antes da view, como em memoize
+                chave = self._chave(namespaces, f'resposta:{request.full_path}') if self.ativo else None
+                entrada = self.backend.get(chave) if chave else None
+
+                if entrada is None:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response
+                    corpo = response.get_data()
+                    entrada = {
+                        'corpo': corpo,
+                        'mimetype': response.mimetype,
+                        'etag': hashlib.sha1(corpo).hexdigest(),
+                        # Headers da própria rota, como X-Next-Cursor
+                        'headers': {
+                            nome: valor for nome, valor in response.headers
+                            if nome.startswith('X-') and nome not in HEADERS_POR_REQUISICAO
+                        },
+                    }
+                    if chave:
+                        self.backend.set(chave, entrada, self._ttl(ttl))
+
+                response = current_app.response_class(
+                    entrada['corpo'],
+                    mimetype=entrada['mimetype'],
+                    headers=entrada.get('headers')
+                )
+                response.set_etag(entrada['etag'])
+                return response.make_conditional(request)
+            return wrapper
+        return decorator
+
+
+cache = Cache()
+
+
+# =====================================================
+# Invalidação automática por commit
+# =====================================================
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_alteracoes(session, flush_context):
+    tabelas = session.info.setdefault('cache_tabelas_alteradas', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tabela = getattr(obj, '__tablename__', None)
+        if tabela in DEPENDENCIAS:
+            tabelas.add(tabela)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_apos_commit(session):
+    tabelas = session.info.pop('cache_tabelas_alteradas', None)
+    if not tabelas:
+        return
+    namespaces = set()
+    for tabela in tabelas:
+        namespaces.update(DEPENDENCIAS.get(tabela, ()))
+    cache.invalidar(*namespaces)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_alteracoes(session):
+    session.info.pop('cache_tabelas_alteradas', None)
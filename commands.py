@@ -0,0 +1,221 @@
+import click
+import json
+import time
+from database import db
+
+
+def register_commands(app):
+    """Registra os comandos de manutenção no `flask` CLI."""
+
+    @app.cli.command('recalcular-planejamentos')
+    def recalcular_planejamentos():
+        """Recalcula contadores por status e status de todos os planejamentos."""
+        from models import Planejamento
+
+        total = Planejamento.recalcular_contadores(db.session.connection())
+        db.session.commit()
+        click.echo(f'{total} planejamento(s) recalculado(s).')
+
+    @app.cli.command('recalcular-rollups')
+    def recalcular_rollups():
+        """Reconstrói os totais materializados por grupo e por divisão."""
+        from models import Rollup
+
+        total = Rollup.recalcular(db.session.connection())
+        db.session.commit()
+        click.echo(f'{total} linha(s) de rollup reconstruída(s).')
+
+    @app.cli.command('atualizar-estimativas')
+    @click.option('--completo', is_flag=True, help='Recalcula todas as atividades, não só as alteradas.')
+    def atualizar_estimativas(completo):
+        """Ajusta as estimativas de duração a partir dos checkpoints concluídos."""
+        from services import estimativa_service
+
+        resumo = estimativa_service.atualizar(completo=completo)
+        db.session.commit()
+        click.echo(
+            f"{resumo['atividades']} atividade(s) ajustada(s) com {resumo['amostras']} amostra(s) "
+            f"({'completo' if resumo['completo'] else 'incremental'}, {resumo['motor']})."
+        )
+
+    @app.cli.command('db-index-report')
+    @click.option('--verbose', '-v', is_flag=True, help='Mostra o plano completo.')
+    def db_index_report(verbose):
+        """Executa EXPLAIN nas consultas quentes e aponta varreduras sequenciais."""
+        from services.index_report import gerar_relatorio
+
+        relatorio = gerar_relatorio()
+        com_varredura = 0
+        for item in relatorio:
+            if item['varreduras_sequenciais']:
+                com_varredura += 1
+                click.echo(f"[SEQ SCAN] {item['consulta']}: {', '.join(item['varreduras_sequenciais'])}")
+            else:
+                click.echo(f"[ok]       {item['consulta']}")
+            if verbose:
+                for linha in item['plano']:
+                    click.echo(f'    {linha}')
+
+        click.echo(f'{com_varredura} de {len(relatorio)} consulta(s) com varredura sequencial.')
+
+    @app.cli.command('importar-lojas')
+    @click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--batch-size', default=500, show_default=True)
+    def importar_lojas(arquivo, batch_size):
+        """Importa lojas de um arquivo CSV ou JSON Lines (.jsonl)."""
+        from services import loja_service
+
+        leitor = loja_service.ler_jsonl if arquivo.endswith('.jsonl') else loja_service.ler_csv
+        with open(arquivo, 'rb') as stream:
+            resumo = loja_service.importar_lojas(leitor(stream), batch_size=batch_size)
+        db.session.commit()
+
+        click.echo(
+            f"{resumo['lidas']} lida(s), {resumo['inseridas']} inserida(s), "
+            f"{resumo['atualizadas']} atualizada(s), {len(resumo['erros'])} erro(s) "
+            f"em {resumo['tempo_s']}s ({resumo['linhas_por_segundo']} linhas/s)"
+        )
+        for erro in resumo['erros']:
+            click.echo(f"  linha {erro['linha']}: {erro['erro']}", err=True)
+
+    @app.cli.command('benchmark-gerar-dados')
+    @click.option('--divisoes', default=5, show_default=True)
+    @click.option('--grupos', default=20, show_default=True)
+    @click.option('--lojas', default=500, show_default=True)
+    @click.option('--atividades', default=30, show_default=True)
+    @click.option('--planejamentos', default=400, show_default=True)
+    @click.option('--checkpoints', default=1_000_000, show_default=True)
+    @click.option('--semente', default=42, show_default=True)
+    @click.option('--limpar', is_flag=True, help='Apaga e recria todas as tabelas antes de gerar.')
+    def benchmark_gerar_dados(limpar, **parametros):
+        """Gera uma massa sintética determinística para o benchmark."""
+        from benchmark import dados
+
+        if limpar:
+            click.confirm('Todas as tabelas serão apagadas e recriadas. Continuar?', abort=True)
+            dados.limpar_banco()
+
+        def progresso(tabela, inseridos, total):
+            if tabela == 'checkpoint_atividade' and inseridos % 100_000 and inseridos != total:
+                return
+            click.echo(f'  {tabela}: {inseridos}/{total}')
+
+        inicio = time.perf_counter()
+        contagens = dados.gerar_massa(progresso=progresso, **parametros)
+        db.session.commit()
+
+        for tabela, total in contagens.items():
+            click.echo(f'{tabela}: {total}')
+        click.echo(f'Massa gerada em {time.perf_counter() - inicio:.1f}s.')
+
+    @app.cli.command('benchmark')
+    @click.option('--repeticoes', default=20, show_default=True)
+    @click.option('--filtro', help='Mede apenas as URLs que contêm este texto.')
+    @click.option('--com-cache', is_flag=True, help='Mantém o cache ligado durante a medição.')
+    @click.option('--saida', type=click.Path(dir_okay=False), help='Grava o resultado JSON neste arquivo.')
+    def benchmark(repeticoes, filtro, com_cache, saida):
+        """Mede latência p50/p95, consultas e memória de todas as rotas GET."""
+        from benchmark import dados, rotas
+
+        resultado = rotas.medir_rotas(
+            app, repeticoes=repeticoes, filtro=filtro, usar_cache=com_cache
+        )
+        with app.app_context():
+            resultado['massa'] = dados.contar_linhas()
+
+        for url, medida in resultado['rotas'].items():
+            click.echo(
+                f"{medida['status']} {medida['p50_ms']:>9.2f} {medida['p95_ms']:>9.2f} ms "
+                f"{medida['consultas']:>4} sql {medida['pico_memoria_kb']:>9.1f} KB  {url}"
+            )
+
+        if saida:
+            with open(saida, 'w', encoding='utf-8') as arquivo:
+                json.dump(resultado, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+            click.echo(f'Resultado gravado em {saida}.')
+
+    @app.cli.command('benchmark-serializacao')
+    @click.option('--linhas', default=100_000, show_default=True)
+    @click.option('--repeticoes', default=3, show_default=True)
+    def benchmark_serializacao(linhas, repeticoes):
+        """Compara to_dict + jsonify com a serialização por esquema."""
+        from benchmark import serializacao
+
+        resultado = serializacao.medir_serializacao(linhas=linhas, repeticoes=repeticoes)
+
+        click.echo(f"Encoder: {resultado['encoder']}")
+        for caminho, medida in resultado['resultados'].items():
+            click.echo(
+                f"{caminho:<16} {medida['linhas']:>8} linhas {medida['tempo_s']:>8.3f}s "
+                f"{medida['linhas_por_segundo']:>10} linhas/s {medida['bytes'] / 1024:>10.1f} KB "
+                f"x{medida['ganho']}"
+            )
+
+    @app.cli.command('startup-profile')
+    @click.option('--modo', type=click.Choice(['atual', 'imediato', 'sob-demanda']), default='atual',
+                  show_default=True, help='Modo de inicialização medido (atual = LAZY_STARTUP).')
+    @click.option('--top', default=15, show_default=True, help='Módulos mais caros listados.')
+    @click.option('--orcamento-ms', type=float, help='Padrão: STARTUP_BUDGET_MS.')
+    @click.option('--saida', type=click.Path(dir_okay=False), help='Grava o resultado JSON neste arquivo.')
+    def startup_profile(modo, top, orcamento_ms, saida):
+        """Mede o cold start da aplicação em um processo novo (sai com 1 acima do orçamento)."""
+        from inicializacao import perfil_cold_start
+
+        sob_demanda = {'atual': None, 'imediato': False, 'sob-demanda': True}[modo]
+        resultado = perfil_cold_start(sob_demanda=sob_demanda)
+        orcamento = orcamento_ms or app.config['STARTUP_BUDGET_MS']
+
+        click.echo(f"Modo: {resultado['modo']}")
+        click.echo(f"Cold start: {resultado['total_ms']:.1f} ms (orçamento {orcamento:.0f} ms)")
+
+        click.echo('\nEtapas de create_app:')
+        for fase, ms in resultado['fases_ms'].items():
+            click.echo(f'  {fase:<20} {ms:>9.1f} ms')
+
+        if resultado['blueprints_ms']:
+            click.echo('\nBlueprints (import + registro):')
+            for nome, ms in resultado['blueprints_ms'].items():
+                click.echo(f'  {nome:<20} {ms:>9.1f} ms')
+        if resultado['pendentes']:
+            click.echo(f"\nBlueprints sob demanda: {', '.join(resultado['pendentes'])}")
+
+        click.echo('\nImport por pacote (tempo próprio):')
+        for pacote, ms in list(resultado['pacotes'].items())[:top]:
+            click.echo(f'  {pacote:<30} {ms:>9.1f} ms')
+
+        click.echo('\nMódulos mais caros (tempo acumulado):')
+        modulos = sorted(resultado['modulos'], key=lambda m: -m['acumulado_ms'])
+        for modulo in modulos[:top]:
+            click.echo(
+                f"  {modulo['modulo']:<45} {modulo['acumulado_ms']:>9.1f} ms "
+                f"(próprio {modulo['proprio_ms']:.1f})"
+            )
+
+        if saida:
+            with open(saida, 'w', encoding='utf-8') as arquivo:
+                json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+            click.echo(f'Resultado gravado em {saida}.')
+
+        if resultado['total_ms'] > orcamento:
+            click.echo(f"Cold start acima do orçamento em {resultado['total_ms'] - orcamento:.1f} ms.", err=True)
+            raise SystemExit(1)
+
+    @app.cli.command('jobs-worker')
+    @click.option('--threads', default=1, show_default=True)
+    @click.option('--uma-vez', is_flag=True, help='Executa os jobs pendentes e sai.')
+    def jobs_worker(threads, uma_vez):
+        """Executa jobs da fila em um processo dedicado."""
+        from jobs import fila
+
+        if uma_vez:
+            total = fila.executar_pendentes()
+            click.echo(f'{total} job(s) executado(s).')
+            return
+
+        click.echo(f'Worker de jobs iniciado com {threads} thread(s). Ctrl+C para sair.')
+        fila.iniciar_workers(threads)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            click.echo('Worker encerrado.')
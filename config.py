@@ -1,6 +1,87 @@
 import os
 
+
+def _bool_env(nome, padrao):
+    return os.getenv(nome, padrao).lower() in ('1', 'true', 'yes')
+
+
+def engine_options(url):
+    """
+    Opções de engine/pool a partir do ambiente.
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT   tamanho e espera do pool
+    DB_POOL_RECYCLE         segundos até reciclar uma conexão (padrão 1800)
+    DB_POOL_PRE_PING        testa a conexão antes de usar (padrão true)
+    DB_STATEMENT_TIMEOUT_MS limite por comando no PostgreSQL (0 = sem limite)
+    DB_APPLICATION_NAME     nome da aplicação visto em pg_stat_activity
+    """
+    opcoes = {
+        'pool_pre_ping': _bool_env('DB_POOL_PRE_PING', 'true'),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    }
+
+    if not url or url.startswith('sqlite'):
+        # SQLite usa pools próprios (sem tamanho/overflow configuráveis)
+        return opcoes
+
+    opcoes.update({
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+    })
+
+    if url.startswith('postgres'):
+        connect_args = {'application_name': os.getenv('DB_APPLICATION_NAME', 'ativarub')}
+        statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+        if statement_timeout:
+            connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+        opcoes['connect_args'] = connect_args
+
+    return opcoes
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SECRET_KEY = os.getenv('SECRET_KEY')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool de conexões, pre-ping, recycle e statement timeout (ver engine_options)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Réplica de leitura para rotas @somente_leitura (ver replica.py)
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = (
+        {'replica': {'url': DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)}}
+        if DATABASE_REPLICA_URL else {}
+    )
+    REPLICA_MAX_LAG_S = float(os.getenv('REPLICA_MAX_LAG_S', 30))
+    REPLICA_CHECK_INTERVAL_S = float(os.getenv('REPLICA_CHECK_INTERVAL_S', 10))
+
+    # Cache de dados de referência e respostas de API (ver cache.py)
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'memory')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', 300))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+    # Processos web (gunicorn --workers); o cache 'memory' exige um só
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+
+    # Instrumentação por requisição, Server-Timing e /metrics (ver metricas.py)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    METRICS_SLOW_QUERY_MS = float(os.getenv('METRICS_SLOW_QUERY_MS', 200))
+    METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_ALLOWED_NETWORKS = os.getenv('METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128')
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Detector de consultas N+1: 'off', 'log' ou 'raise' (ver detector_n1.py)
+    NPLUS1_DETECTOR = os.getenv('NPLUS1_DETECTOR', 'off')
+    NPLUS1_THRESHOLD = int(os.getenv('NPLUS1_THRESHOLD', 3))
+
+    # Fila de jobs em segundo plano (ver jobs.py)
+    JOBS_WORKERS = int(os.getenv('JOBS_WORKERS', 2))
+    JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', 2))
+    JOBS_LEASE_TIMEOUT = float(os.getenv('JOBS_LEASE_TIMEOUT', 300))
+    JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 3))
+
+    # Inicialização sob demanda e orçamento de cold start (ver inicializacao.py)
+    LAZY_STARTUP = _bool_env('LAZY_STARTUP', 'false')
+    STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 1500))
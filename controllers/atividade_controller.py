@@ -1,6 +1,13 @@
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
+from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash, abort
 from models.atividade import Atividade
 from database import db
+from cache import cache
+from models.loja import Loja
+from services import esquemas, estimativa_service, filtros
+from services.serializacao import resposta_json
+from controllers.job_controller import resposta_job
+from jobs import fila
+from replica import somente_leitura
 
 bp = Blueprint('atividade', __name__, url_prefix='/atividades')
 
@@ -85,15 +92,73 @@ def excluir_atividade(id_atividade):
 # ========== ROTAS API ==========
 
 @bp.route('/api', methods=['GET'])
+@somente_leitura
+@cache.resposta('atividade')
 def api_listar_atividades():
-    atividades = Atividade.query.all()
-    return jsonify([atividade.to_dict() for atividade in atividades]), 200
+    try:
+        campos = esquemas.ATIVIDADE.campos_da_requisicao()
+        consulta = filtros.ATIVIDADE.da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    dados, proximo = consulta.listar(esquemas.ATIVIDADE, campos)
+    return resposta_json(dados, headers={'X-Next-Cursor': proximo} if proximo else None)
 
 
 @bp.route('/api/<int:id_atividade>', methods=['GET'])
 def api_obter_atividade(id_atividade):
-    atividade = Atividade.query.get_or_404(id_atividade)
-    return jsonify(atividade.to_dict()), 200
+    try:
+        campos = esquemas.ATIVIDADE.campos_da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    atividade = esquemas.ATIVIDADE.obter(id_atividade, campos)
+    if atividade is None:
+        abort(404)
+    return resposta_json(atividade)
+
+
+@bp.route('/api/<int:id_atividade>/estimativa', methods=['GET'])
+@somente_leitura
+@cache.resposta('estimativa')
+def api_estimativa_atividade(id_atividade):
+    """
+    Estimativa de duração ajustada da atividade e, com ?lojas=1,2,
+    ?grupo_id= ou ?divisao_id=, as horas previstas (p10/p50/p90) por loja.
+    """
+    estimativa = estimativa_service.obter(id_atividade)
+    if estimativa is None:
+        return jsonify({'error': 'Atividade sem estimativa ajustada'}), 404
+
+    try:
+        lojas = [int(id_loja) for id_loja in request.args.get('lojas', '').split(',') if id_loja]
+    except ValueError:
+        return jsonify({'error': 'lojas deve ser uma lista de ids separados por vírgula'}), 400
+    grupo_id = request.args.get('grupo_id', type=int)
+    divisao_id = request.args.get('divisao_id', type=int)
+
+    previsao = None
+    if lojas or grupo_id or divisao_id:
+        query = db.session.query(Loja.id_loja, Loja.qtd_sku, Loja.qtd_pessoas)
+        if lojas:
+            query = query.filter(Loja.id_loja.in_(lojas))
+        if grupo_id:
+            query = query.filter(Loja.id_grupo_trabalho == grupo_id)
+        if divisao_id:
+            query = query.filter(Loja.id_divisao_bandeira == divisao_id)
+        previsao = estimativa_service.prever(id_atividade, query.order_by(Loja.id_loja).all())
+
+    return resposta_json({'estimativa': estimativa.to_dict(), 'previsao': previsao})
+
+
+@bp.route('/api/estimativas/atualizar', methods=['POST'])
+def api_atualizar_estimativas():
+    """Agenda o ajuste das estimativas de duração (202); ?completo=1 recalcula todas."""
+    job = fila.enfileirar(
+        'atualizar_estimativas',
+        completo=request.args.get('completo') in ('1', 'true')
+    )
+    return resposta_job(job)
 
 
 @bp.route('/api', methods=['POST'])
@@ -1,12 +1,14 @@
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
+from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash, Response, stream_with_context
 from models.checkpoint_atividade import CheckpointAtividade
-from models.atividade import Atividade
-from models.grupo_trabalho import GrupoTrabalho
 from models.planejamento import Planejamento
 from models.loja import Loja  # Adicione esta linha
 from database import db
 from datetime import datetime
-from sqlalchemy.orm import joinedload  # Certifique-se de importar joinedload
+from services import checkpoint_service, conflito_service, esquemas, referencia_service
+from services.serializacao import dumps, resposta_json
+from controllers.job_controller import resposta_job
+from jobs import fila
+from replica import somente_leitura
 
 bp = Blueprint(
     'checkpoint_atividade',
@@ -21,32 +23,47 @@ bp = Blueprint(
 @bp.route('/')
 def index():
     """
-    Lista agrupada por Checkpoint Atividade com Planejamento e Grupo de Trabalho
+    Lista paginada e agrupada por Checkpoint Atividade.
+
+    Filtros: ?status= (repetível), ?data_de=, ?data_ate= (AAAA-MM-DD),
+    ?grupo_id= (grupo do planejamento) e ?page=.
     """
-    registros = (
-        CheckpointAtividade.query
-        .join(CheckpointAtividade.atividade)
-        .join(CheckpointAtividade.planejamento)
-        .join(Planejamento.grupo_trabalho)
-        .join(GrupoTrabalho.lojas)
-        .order_by(
-            CheckpointAtividade.nome_checkpoint.asc(),
-            CheckpointAtividade.data_ini.desc()
-        )
-        .all()
+    filtros = {
+        'status': request.args.getlist('status'),
+        'data_de': _data_arg('data_de'),
+        'data_ate': _data_arg('data_ate'),
+        'id_grupo_trabalho': request.args.get('grupo_id', type=int),
+    }
+
+    pagina = checkpoint_service.listar_paginado(
+        pagina=request.args.get('page', 1, type=int),
+        **filtros
     )
 
+    grupos_trabalho = referencia_service.listar_grupos()
+
     return render_template(
         'checkpoint_atividade/index.html',
-        registros=registros
+        grupos_trabalho=grupos_trabalho,
+        filtros=filtros,
+        **pagina
     )
 
 
+def _data_arg(nome):
+    valor = request.args.get(nome)
+    try:
+        return datetime.fromisoformat(valor) if valor else None
+    except ValueError:
+        return None
+
+
 @bp.route('/create', methods=['GET', 'POST'])
 def create():
-    atividades = Atividade.query.order_by(Atividade.titulo).all()
+    atividades = referencia_service.listar_atividades()
     planejamentos = Planejamento.query.order_by(Planejamento.data_ini.desc()).all()
-    grupos_trabalho = GrupoTrabalho.query.options(joinedload(GrupoTrabalho.lojas)).order_by(GrupoTrabalho.nome_grupo).all()
+    # As lojas do grupo são carregadas pelo formulário via /lojas/api/lojas
+    grupos_trabalho = referencia_service.listar_grupos()
 
     if request.method == 'POST':
         nome_checkpoint = request.form.get('nome_checkpoint')
@@ -69,20 +86,18 @@ def create():
             return redirect(url_for('checkpoint_atividade.create'))
 
         try:
-            # Criar um registro para cada loja selecionada
-            for id_loja in lojas_selecionadas:
-                registro = CheckpointAtividade(
-                    nome_checkpoint=nome_checkpoint,
-                    id_atividade=id_atividade,
-                    id_loja=int(id_loja),  # Certifique-se de converter para inteiro
-                    id_planejamento=id_planejamento,
-                    status=status,
-                    data_ini=datetime.fromisoformat(data_ini),
-                    data_fim=datetime.fromisoformat(data_fim) if data_fim else None,
-                    observacao=observacao
-                )
-                db.session.add(registro)
-
+            # Um único INSERT para todas as lojas selecionadas
+            checkpoint_service.criar_em_lote(
+                nome_checkpoint=nome_checkpoint,
+                id_atividade=id_atividade,
+                id_planejamento=id_planejamento,
+                status=status,
+                data_ini=datetime.fromisoformat(data_ini),
+                data_fim=datetime.fromisoformat(data_fim) if data_fim else None,
+                observacao=observacao,
+                lojas=lojas_selecionadas,
+                permitir_conflitos=bool(request.form.get('permitir_conflitos'))
+            )
             db.session.commit()
             flash('Checkpoint criado com sucesso!', 'success')
             return redirect(url_for('checkpoint_atividade.index'))
@@ -102,7 +117,7 @@ def create():
 @bp.route('/<int:id>/edit')
 def edit(id):
     registro = CheckpointAtividade.query.get_or_404(id)
-    atividades = Atividade.query.order_by(Atividade.titulo).all()
+    atividades = referencia_service.listar_atividades()
     planejamentos = Planejamento.query.order_by(
     Planejamento.data_ini.desc()
     ).all()
@@ -120,6 +135,7 @@ def edit(id):
 @bp.route('/<int:id>/update', methods=['POST'])
 def update(id):
     registro = CheckpointAtividade.query.get_or_404(id)
+    periodo_anterior = (registro.data_ini, registro.data_fim)
 
     # Atualizar os campos do checkpoint
     registro.nome_checkpoint = request.form.get(
@@ -148,14 +164,16 @@ def update(id):
     )
 
     try:
-        # Salvar alterações no checkpoint
+        if (registro.data_ini, registro.data_fim) != periodo_anterior and not request.form.get('permitir_conflitos'):
+            conflito_service.CHECKPOINT.verificar(
+                registro.id_loja, registro.data_ini, registro.data_fim,
+                ignorar=registro.id_checkpoint_atividade
+            )
+
+        # Salvar alterações no checkpoint (os contadores e o status do
+        # planejamento são atualizados na mesma transação)
         db.session.commit()
 
-        # Atualizar o status do planejamento relacionado
-        if registro.planejamento:
-            registro.planejamento.atualizar_status()
-            db.session.commit()
-
         flash('Registro atualizado com sucesso!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -182,10 +200,47 @@ def delete(id):
 # ROTAS API
 # =====================================================
 
+API_MAX_LIMIT = 1000
+
+
 @bp.route('/api', methods=['GET'])
+@somente_leitura
 def api_index():
-    registros = CheckpointAtividade.query.all()
-    return jsonify([r.to_dict() for r in registros])
+    """
+    Lista checkpoints.
+
+    ?after=<id>&limit=<n>  paginação por keyset (próximo cursor em X-Next-Cursor)
+    ?fields=a,b,c          apenas os campos pedidos (ver esquemas.CHECKPOINT)
+    ?format=ndjson         streaming de uma linha JSON por checkpoint
+    """
+    after = request.args.get('after', type=int)
+    limit = request.args.get('limit', type=int)
+
+    try:
+        campos = esquemas.CHECKPOINT.campos_da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if request.args.get('format') == 'ndjson':
+        def gerar():
+            for item in checkpoint_service.iterar_api(after=after, campos=campos):
+                yield dumps(item) + b'\n'
+
+        return Response(
+            stream_with_context(gerar()),
+            mimetype='application/x-ndjson'
+        )
+
+    if limit is not None:
+        limit = max(1, min(limit, API_MAX_LIMIT))
+
+    rows, dados = checkpoint_service.listar_api(after=after, limit=limit, campos=campos)
+    response = resposta_json(dados)
+
+    if limit and len(rows) == limit:
+        response.headers['X-Next-Cursor'] = str(rows[-1].id_checkpoint_atividade)
+
+    return response
 
 
 @bp.route('/api', methods=['POST'])
@@ -211,11 +266,97 @@ def api_create():
             observacao=data.get('observacao')
         )
 
+        if not data.get('permitir_conflitos'):
+            conflito_service.CHECKPOINT.verificar(registro.id_loja, registro.data_ini, registro.data_fim)
+
         db.session.add(registro)
         db.session.commit()
 
         return jsonify(registro.to_dict()), 201
 
+    except conflito_service.ConflitoAgenda as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'conflitos': e.conflitos}), 409
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/bulk', methods=['POST'])
+def api_bulk_create():
+    """
+    Cria um checkpoint para várias lojas de uma vez.
+
+    Corpo: {"checkpoint": {...}, "lojas": [ids]} ou, no lugar de "lojas",
+    "id_grupo_trabalho" e/ou "id_divisao_bandeira".
+
+    Período sobreposto a outro checkpoint de alguma das lojas responde 409
+    com os conflitos, salvo com "permitir_conflitos": true.
+
+    Com ?async=1 a criação roda na fila de jobs e a resposta é 202 com a
+    URL de acompanhamento (/jobs/<id>).
+    """
+    data = request.get_json()
+
+    required = ['nome_checkpoint', 'id_atividade', 'id_planejamento', 'data_ini']
+    checkpoint = (data or {}).get('checkpoint') or {}
+    if not all(k in checkpoint for k in required):
+        return jsonify({'error': 'Campos obrigatórios ausentes'}), 400
+
+    if request.args.get('async') in ('1', 'true'):
+        try:
+            datetime.fromisoformat(checkpoint['data_ini'])
+            if checkpoint.get('data_fim'):
+                datetime.fromisoformat(checkpoint['data_fim'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Datas devem estar no formato ISO 8601'}), 400
+
+        job = fila.enfileirar(
+            'criar_checkpoints_em_lote',
+            nome_checkpoint=checkpoint['nome_checkpoint'],
+            id_atividade=checkpoint['id_atividade'],
+            id_planejamento=checkpoint['id_planejamento'],
+            status=checkpoint.get('status', 'Pendente'),
+            data_ini=checkpoint['data_ini'],
+            data_fim=checkpoint.get('data_fim'),
+            observacao=checkpoint.get('observacao'),
+            lojas=data.get('lojas'),
+            id_grupo_trabalho=data.get('id_grupo_trabalho'),
+            id_divisao_bandeira=data.get('id_divisao_bandeira'),
+            permitir_conflitos=bool(data.get('permitir_conflitos'))
+        )
+        return resposta_job(job)
+
+    try:
+        resumo = checkpoint_service.criar_em_lote(
+            nome_checkpoint=checkpoint['nome_checkpoint'],
+            id_atividade=checkpoint['id_atividade'],
+            id_planejamento=checkpoint['id_planejamento'],
+            status=checkpoint.get('status', 'Pendente'),
+            data_ini=datetime.fromisoformat(checkpoint['data_ini']),
+            data_fim=(
+                datetime.fromisoformat(checkpoint['data_fim'])
+                if checkpoint.get('data_fim') else None
+            ),
+            observacao=checkpoint.get('observacao'),
+            lojas=data.get('lojas'),
+            id_grupo_trabalho=data.get('id_grupo_trabalho'),
+            id_divisao_bandeira=data.get('id_divisao_bandeira'),
+            permitir_conflitos=bool(data.get('permitir_conflitos'))
+        )
+        db.session.commit()
+
+        return jsonify(resumo), 201
+
+    except conflito_service.ConflitoAgenda as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'conflitos': e.conflitos}), 409
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1,6 +1,10 @@
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
+from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash, abort
 from models import DivisaoBandeira, GrupoTrabalho
 from database import db
+from cache import cache
+from replica import somente_leitura
+from services import esquemas, filtros
+from services.serializacao import resposta_json
 
 bp = Blueprint('divisao_bandeira', __name__, url_prefix='/divisao_bandeira')
 
@@ -107,16 +111,31 @@ def show(id):
 # ========== ROTAS API (JSON) ==========
 
 @bp.route('/api', methods=['GET'])
+@somente_leitura
+@cache.resposta('divisao_bandeira')
 def api_index():
-    """API: Lista todas as divisões/bandeiras (JSON)"""
-    divisoes = DivisaoBandeira.query.all()
-    return jsonify([divisao.to_dict() for divisao in divisoes])
+    """API: Lista todas as divisões/bandeiras (JSON; aceita ?fields= e ?expand=lojas)"""
+    try:
+        campos = esquemas.DIVISAO.campos_da_requisicao()
+        consulta = filtros.DIVISAO.da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    dados, proximo = consulta.listar(esquemas.DIVISAO, campos)
+    return resposta_json(dados, headers={'X-Next-Cursor': proximo} if proximo else None)
 
 @bp.route('/api/<int:id>', methods=['GET'])
 def api_show(id):
     """API: Retorna uma divisão/bandeira específica (JSON)"""
-    divisao = DivisaoBandeira.query.get_or_404(id)
-    return jsonify(divisao.to_dict())
+    try:
+        campos = esquemas.DIVISAO.campos_da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    divisao = esquemas.DIVISAO.obter(id, campos)
+    if divisao is None:
+        abort(404)
+    return resposta_json(divisao)
 
 @bp.route('/api', methods=['POST'])
 def api_create():
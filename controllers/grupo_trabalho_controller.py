@@ -3,33 +3,43 @@ from models.grupo_trabalho import GrupoTrabalho
 from models.responsavel import Responsavel
 from models.loja import Loja
 from database import db
-from sqlalchemy.orm import joinedload
+from services.grupo_trabalho_service import serializar_grupos, serializar_grupo
+from services import referencia_service
+from cache import cache
+from replica import somente_leitura
+from services import esquemas
+from services.serializacao import resposta_json
 
 bp = Blueprint('grupo_trabalho', __name__, url_prefix='/grupos_trabalho')
 
 # Criar um novo grupo de trabalho
 @bp.route('/', methods=['GET', 'POST'])
 def index():
-    # Carrega os grupos com as lojas já carregadas
-    grupos = GrupoTrabalho.query.options(joinedload(GrupoTrabalho.lojas)).all()
+    # Totais e lojas_info calculados em SQL (ver serializar_grupos)
+    grupos = GrupoTrabalho.query.all()
     # Converte cada objeto em dicionário (inclui lojas_info, total_lojas, etc.)
-    grupos_dict = [grupo.to_dict() for grupo in grupos]
-    responsaveis = Responsavel.query.all()
+    grupos_dict = serializar_grupos(grupos)
+    responsaveis = referencia_service.listar_responsaveis()
     return render_template('grupo_trabalho/index.html',
                            grupos_trabalho=grupos_dict,
                            responsaveis=responsaveis)
 
 # Listar todos os grupos de trabalho (JSON)
 @bp.route('/api', methods=['GET'])
+@somente_leitura
+@cache.resposta('grupo_trabalho')
 def get_grupos_trabalho():
-    grupos = GrupoTrabalho.query.options(joinedload(GrupoTrabalho.lojas)).all()
-    return jsonify([grupo.to_dict() for grupo in grupos]), 200
+    try:
+        campos = esquemas.GRUPO.campos_da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return resposta_json(esquemas.GRUPO.listar(campos))
 
 # Tela para listar todos os grupos de trabalho
 @bp.route('/view', methods=['GET'])
 def view_grupos_trabalho():
-    grupos = GrupoTrabalho.query.options(joinedload(GrupoTrabalho.lojas)).all()
-    grupos_dict = [grupo.to_dict() for grupo in grupos]
+    grupos = GrupoTrabalho.query.all()
+    grupos_dict = serializar_grupos(grupos)
     return render_template('grupo_trabalho/index.html',
                            grupos_trabalho=grupos_dict)
 
@@ -52,16 +62,21 @@ def novo_grupo_trabalho():
         db.session.commit()
         return redirect(url_for('grupo_trabalho.index'))
     # GET request: show form
-    responsaveis = Responsavel.query.all()
+    responsaveis = referencia_service.listar_responsaveis()
     return render_template('grupo_trabalho/create.html', responsaveis=responsaveis)
 
 # Obter um grupo de trabalho por ID (JSON)
 @bp.route('/<int:id_grupo_trabalho>', methods=['GET'])
 def get_grupo_trabalho(id_grupo_trabalho):
-    grupo = GrupoTrabalho.query.options(joinedload(GrupoTrabalho.lojas)).get(id_grupo_trabalho)
-    if not grupo:
+    try:
+        campos = esquemas.GRUPO.campos_da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    grupo = esquemas.GRUPO.obter(id_grupo_trabalho, campos)
+    if grupo is None:
         return jsonify({'error': 'Grupo de trabalho não encontrado.'}), 404
-    return jsonify(grupo.to_dict()), 200
+    return resposta_json(grupo)
 
 # Atualizar um grupo de trabalho
 @bp.route('/editar/<int:id_grupo_trabalho>', methods=['PUT'])
@@ -82,7 +97,7 @@ def editar_grupo_trabalho(id_grupo_trabalho):
         grupo.id_responsavel = id_responsavel
 
     db.session.commit()
-    return jsonify(grupo.to_dict()), 200
+    return jsonify(serializar_grupo(grupo)), 200
 
 # Deletar um grupo de trabalho
 @bp.route('/<int:id_grupo_trabalho>', methods=['POST'])
@@ -0,0 +1,43 @@
+from flask import Blueprint, request, jsonify, url_for
+from models.job import Job
+from database import db
+from jobs import fila
+
+bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+# ========== ROTAS API ==========
+
+@bp.route('/', methods=['GET'])
+def api_index():
+    """Jobs mais recentes, opcionalmente filtrados por status ou tipo."""
+    query = Job.query
+    if request.args.get('status'):
+        query = query.filter(Job.status == request.args['status'])
+    if request.args.get('tipo'):
+        query = query.filter(Job.tipo == request.args['tipo'])
+
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    jobs = query.order_by(Job.id_job.desc()).limit(limit).all()
+    return jsonify([job.to_dict() for job in jobs])
+
+
+@bp.route('/<int:id_job>', methods=['GET'])
+def api_show(id_job):
+    job = db.session.get(Job, id_job)
+    if not job:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job.to_dict())
+
+
+def resposta_job(job):
+    """Resposta 202 padrão para rotas que enfileiram um job."""
+    status_url = url_for('jobs.api_show', id_job=job.id_job)
+    dados = {'id_job': job.id_job, 'status': job.status, 'status_url': status_url}
+    if not fila.workers:
+        # Sem threads neste processo o job espera um `flask jobs-worker`
+        dados['aviso'] = 'Nenhum worker configurado neste processo; execute `flask jobs-worker`.'
+    response = jsonify(dados)
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
+from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash, Response, stream_with_context, abort
 from models import Loja, DivisaoBandeira, GrupoTrabalho
 from database import db
+from services import esquemas, filtros, loja_service, referencia_service
+from services.serializacao import resposta_json
+from replica import somente_leitura
 
 bp = Blueprint('lojas', __name__, url_prefix='/lojas')
 
@@ -13,8 +16,8 @@ def index():
 
 @bp.route('/create', methods=['GET', 'POST'])
 def create():
-    divisoes = DivisaoBandeira.query.all()
-    grupos = GrupoTrabalho.query.all()
+    divisoes = referencia_service.listar_divisoes()
+    grupos = referencia_service.listar_grupos()
 
     if request.method == 'POST':
         nome_loja = request.form.get('nome_loja')
@@ -56,8 +59,8 @@ def create():
 @bp.route('/<int:id>/edit', methods=['GET', 'POST'])
 def edit(id):
     loja = Loja.query.get_or_404(id)
-    divisoes = DivisaoBandeira.query.all()
-    grupos = GrupoTrabalho.query.all()
+    divisoes = referencia_service.listar_divisoes()
+    grupos = referencia_service.listar_grupos()
 
     if request.method == 'POST':
         loja.nome_loja = request.form.get('nome_loja')
@@ -102,6 +105,7 @@ def show(id):
     return render_template('lojas/show.html', loja=loja)
 
 @bp.route('/dashboard')
+@somente_leitura
 def dashboard():
     # Todas as divisões e grupos (para o caso de não haver seleção)
     divisoes = DivisaoBandeira.query.order_by(DivisaoBandeira.nome_bandeira).all()
@@ -146,15 +150,29 @@ def dashboard():
 # ========== ROTAS API ==========
 
 @bp.route('/api', methods=['GET'])
+@somente_leitura
 def api_index():
-    lojas = Loja.query.all()
-    return jsonify([loja.to_dict() for loja in lojas])
+    try:
+        campos = esquemas.LOJA.campos_da_requisicao()
+        consulta = filtros.LOJA.da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    dados, proximo = consulta.listar(esquemas.LOJA, campos)
+    return resposta_json(dados, headers={'X-Next-Cursor': proximo} if proximo else None)
 
 
 @bp.route('/api/<int:id>', methods=['GET'])
 def api_show(id):
-    loja = Loja.query.get_or_404(id)
-    return jsonify(loja.to_dict())
+    try:
+        campos = esquemas.LOJA.campos_da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    loja = esquemas.LOJA.obter(id, campos)
+    if loja is None:
+        abort(404)
+    return resposta_json(loja)
 
 
 @bp.route('/api', methods=['POST'])
@@ -225,8 +243,61 @@ def api_lojas_by_grupo():
     if not grupo_trabalho_id:
         return jsonify({'error': 'ID do grupo de trabalho não fornecido'}), 400
 
+    try:
+        campos = esquemas.LOJA.campos_da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     # Filtrar lojas pelo grupo de trabalho
-    lojas = Loja.query.filter_by(id_grupo_trabalho=grupo_trabalho_id).all()
+    lojas = esquemas.LOJA.listar(
+        campos,
+        lambda query: query.where(Loja.id_grupo_trabalho == grupo_trabalho_id)
+    )
+    return resposta_json(lojas)
+
+
+@bp.route('/api/import', methods=['POST'])
+def api_import():
+    """
+    Importação em lote de lojas (CSV ou JSON Lines) lida em streaming.
+
+    Formato por ?format=csv|jsonl ou pelo Content-Type da requisição.
+    """
+    formato = request.args.get('format')
+    if not formato:
+        formato = 'jsonl' if 'json' in (request.mimetype or '') else 'csv'
 
-    # Retornar as lojas como JSON
-    return jsonify([loja.to_dict() for loja in lojas])
+    if formato not in ('csv', 'jsonl'):
+        return jsonify({'error': 'Formato inválido (use csv ou jsonl)'}), 400
+
+    leitor = loja_service.ler_csv if formato == 'csv' else loja_service.ler_jsonl
+
+    try:
+        resumo = loja_service.importar_lojas(leitor(request.stream))
+        db.session.commit()
+        return jsonify(resumo), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/export', methods=['GET'])
+@somente_leitura
+def api_export():
+    """Exportação de lojas (CSV ou JSON Lines) em streaming."""
+    formato = request.args.get('format', 'csv')
+
+    if formato == 'csv':
+        corpo = loja_service.exportar_csv(loja_service.iterar_exportacao())
+        mimetype = 'text/csv'
+    elif formato == 'jsonl':
+        corpo = loja_service.exportar_jsonl(loja_service.iterar_exportacao())
+        mimetype = 'application/x-ndjson'
+    else:
+        return jsonify({'error': 'Formato inválido (use csv ou jsonl)'}), 400
+
+    return Response(
+        stream_with_context(corpo),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=lojas.{formato}'}
+    )
@@ -3,7 +3,12 @@ from models.planejamento import Planejamento
 from models.atividade import Atividade
 from models.grupo_trabalho import GrupoTrabalho
 from database import db
+from services import agendamento_service, conflito_service, esquemas, filtros, planejamento_service, referencia_service
+from services.serializacao import resposta_json
+from controllers.job_controller import resposta_job
+from jobs import fila
 from datetime import datetime
+from replica import somente_leitura
 
 bp = Blueprint(
     'planejamento',
@@ -36,10 +41,8 @@ def index():
 
 @bp.route('/create', methods=['GET', 'POST'])
 def create():
-    atividades = Atividade.query.order_by(Atividade.titulo).all()
-    grupos_trabalho = (
-        GrupoTrabalho.query.order_by(GrupoTrabalho.nome_grupo).all()
-    )
+    atividades = referencia_service.listar_atividades()
+    grupos_trabalho = referencia_service.listar_grupos()
 
     if request.method == 'POST':
         titulo_plano = request.form.get('titulo')
@@ -69,6 +72,11 @@ def create():
                 )
             )
 
+            if not request.form.get('permitir_conflitos'):
+                conflito_service.PLANEJAMENTO.verificar(
+                    id_grupo_trabalho, planejamento.data_ini, planejamento.data_fim
+                )
+
             db.session.add(planejamento)
             db.session.commit()
 
@@ -89,10 +97,8 @@ def create():
 @bp.route('/<int:id>/edit')
 def edit(id):
     planejamento = Planejamento.query.get_or_404(id)
-    atividades = Atividade.query.order_by(Atividade.titulo).all()
-    grupos_trabalho = (
-        GrupoTrabalho.query.order_by(GrupoTrabalho.nome_grupo).all()
-    )
+    atividades = referencia_service.listar_atividades()
+    grupos_trabalho = referencia_service.listar_grupos()
 
     return render_template(
         'planejamento/edit.html',
@@ -105,6 +111,7 @@ def edit(id):
 @bp.route('/<int:id>/update', methods=['POST'])
 def update(id):
     planejamento = Planejamento.query.get_or_404(id)
+    periodo_anterior = (planejamento.id_grupo_trabalho, planejamento.data_ini, planejamento.data_fim)
 
     planejamento.titulo = request.form.get(
         'titulo', planejamento.titulo
@@ -134,6 +141,12 @@ def update(id):
     )
 
     try:
+        periodo = (planejamento.id_grupo_trabalho, planejamento.data_ini, planejamento.data_fim)
+        if periodo != periodo_anterior and not request.form.get('permitir_conflitos'):
+            conflito_service.PLANEJAMENTO.verificar(
+                *periodo, ignorar=planejamento.id_planejamento
+            )
+
         db.session.commit()
         flash('Planejamento atualizado com sucesso!', 'success')
     except Exception as e:
@@ -148,23 +161,69 @@ def delete(id):
     planejamento = Planejamento.query.get_or_404(id)
 
     try:
-        db.session.delete(planejamento)
-        db.session.commit()
-        flash('Planejamento removido com sucesso!', 'success')
+        job = _excluir_ou_agendar(planejamento)
+        if job is None:
+            flash('Planejamento excluído com sucesso!', 'success')
+        elif fila.workers:
+            flash(f'Exclusão do planejamento agendada (job #{job.id_job}).', 'success')
+        else:
+            flash(f'Exclusão do planejamento agendada (job #{job.id_job}), mas nenhum worker '
+                  f'está configurado: ela só roda com o comando flask jobs-worker.', 'warning')
     except Exception as e:
         db.session.rollback()
         flash(f'Erro ao excluir: {str(e)}', 'danger')
 
     return redirect(url_for('planejamento.index'))
 
+
+def _excluir_ou_agendar(planejamento):
+    """
+    Exclui na hora planejamentos com poucos checkpoints; os maiores (podem
+    ter milhares) vão para a fila de jobs. Retorna o Job, ou None se a
+    exclusão já foi feita.
+    """
+    id_planejamento = planejamento.id_planejamento
+    if planejamento_service.contar_checkpoints(id_planejamento) <= planejamento_service.EXCLUSAO_SINCRONA_MAX:
+        planejamento_service.excluir_planejamento(id_planejamento)
+        db.session.commit()
+        return None
+    return fila.enfileirar('excluir_planejamento', id_planejamento=id_planejamento)
+
 # =====================================================
 # ROTAS API
 # =====================================================
 
 @bp.route('/api', methods=['GET'])
+@somente_leitura
 def api_index():
-    planejamentos = Planejamento.query.all()
-    return jsonify([p.to_dict() for p in planejamentos])
+    try:
+        campos = esquemas.PLANEJAMENTO.campos_da_requisicao()
+        consulta = filtros.PLANEJAMENTO.da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    dados, proximo = consulta.listar(esquemas.PLANEJAMENTO, campos)
+    return resposta_json(dados, headers={'X-Next-Cursor': proximo} if proximo else None)
+
+
+@bp.route('/api/<int:id>', methods=['DELETE'])
+def api_delete(id):
+    """
+    Exclui o planejamento e os seus checkpoints (204), ou agenda a exclusão
+    se forem muitos checkpoints (202).
+    """
+    planejamento = Planejamento.query.get_or_404(id)
+    job = _excluir_ou_agendar(planejamento)
+    if job is None:
+        return '', 204
+    return resposta_job(job)
+
+
+@bp.route('/api/recalcular', methods=['POST'])
+def api_recalcular():
+    """Agenda o recálculo de contadores e status de todos os planejamentos (202)."""
+    job = fila.enfileirar('recalcular_planejamentos')
+    return resposta_job(job)
 
 
 @bp.route('/api', methods=['POST'])
@@ -193,11 +252,74 @@ def api_create():
             )
         )
 
+        if not data.get('permitir_conflitos'):
+            conflito_service.PLANEJAMENTO.verificar(
+                planejamento.id_grupo_trabalho, planejamento.data_ini, planejamento.data_fim
+            )
+
         db.session.add(planejamento)
         db.session.commit()
 
         return jsonify(planejamento.to_dict()), 201
 
+    except conflito_service.ConflitoAgenda as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'conflitos': e.conflitos}), 409
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/agendar', methods=['POST'])
+def api_agendar():
+    """
+    Agenda o rollout de uma atividade nas lojas (ver agendamento_service.agendar).
+
+    Corpo: {"id_atividade", "inicio", "lojas": [ids] ou "id_grupo_trabalho"
+    e/ou "id_divisao_bandeira", "capacidade": {id_grupo: equipes},
+    "equipes_padrao", "horas_por_dia", "dias_uteis": [0-6], "horas_padrao",
+    "titulo", "simular", "permitir_conflitos"}.
+
+    Com "simular": true só devolve o calendário (200); senão grava um
+    planejamento por grupo e os checkpoints das lojas (201). Conflitos com
+    checkpoints/planejamentos existentes respondem 409.
+    """
+    data = request.get_json()
+
+    if not data or not all(k in data for k in ('id_atividade', 'inicio')):
+        return jsonify({'error': 'Campos obrigatórios ausentes'}), 400
+
+    simular = bool(data.get('simular'))
+    try:
+        resultado = agendamento_service.agendar(
+            id_atividade=data['id_atividade'],
+            inicio=datetime.fromisoformat(data['inicio']),
+            lojas=data.get('lojas'),
+            id_grupo_trabalho=data.get('id_grupo_trabalho'),
+            id_divisao_bandeira=data.get('id_divisao_bandeira'),
+            capacidade=data.get('capacidade'),
+            equipes_padrao=int(data.get('equipes_padrao', 1)),
+            horas_por_dia=float(data.get('horas_por_dia', 8)),
+            dias_uteis=data.get('dias_uteis', agendamento_service.DIAS_UTEIS),
+            horas_padrao=data.get('horas_padrao'),
+            titulo=data.get('titulo'),
+            criar=not simular,
+            permitir_conflitos=bool(data.get('permitir_conflitos'))
+        )
+        if not simular:
+            db.session.commit()
+
+        return resposta_json(resultado, status=200 if simular else 201)
+
+    except conflito_service.ConflitoAgenda as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'conflitos': e.conflitos}), 409
+
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -2,6 +2,15 @@ from flask import Blueprint, request, jsonify, render_template, redirect
 from models.responsavel import Responsavel
 from models.grupo_trabalho import GrupoTrabalho
 from database import db
+from cache import cache
+from sqlalchemy.orm import selectinload
+from services.grupo_trabalho_service import (
+    serializar_grupos,
+    serializar_responsavel,
+)
+from replica import somente_leitura
+from services import esquemas
+from services.serializacao import resposta_json
 
 bp = Blueprint('responsavel', __name__, url_prefix='/responsaveis')
 
@@ -27,18 +36,28 @@ def novo_responsavel():
 
 # Listar todos os responsáveis
 @bp.route('/lista', methods=['GET'])
+@somente_leitura
+@cache.resposta('responsavel')
 def get_responsaveis():
-    responsaveis = Responsavel.query.all()
-    return jsonify([responsavel.to_dict() for responsavel in responsaveis]), 200
+    try:
+        campos = esquemas.RESPONSAVEL.campos_da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return resposta_json(esquemas.RESPONSAVEL.listar(campos))
 
 # Obter um responsável por ID
 @bp.route('/<int:id_responsavel>', methods=['GET'])
 def get_responsavel(id_responsavel):
-    responsavel = Responsavel.query.get(id_responsavel)
-    if not responsavel:
+    try:
+        campos = esquemas.RESPONSAVEL.campos_da_requisicao()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    responsavel = esquemas.RESPONSAVEL.obter(id_responsavel, campos)
+    if responsavel is None:
         return jsonify({'error': 'Responsável não encontrado.'}), 404
 
-    return jsonify(responsavel.to_dict()), 200
+    return resposta_json(responsavel)
 
 # Atualizar um responsável
 @bp.route('/<int:id_responsavel>', methods=['PUT'])
@@ -52,7 +71,7 @@ def update_responsavel(id_responsavel):
     responsavel.contato = data.get('contato', responsavel.contato)
 
     db.session.commit()
-    return jsonify(responsavel.to_dict()), 200
+    return jsonify(serializar_responsavel(responsavel)), 200
 
 # Deletar um responsável
 @bp.route('/<int:id_responsavel>', methods=['DELETE'])
@@ -72,11 +91,19 @@ def get_grupos_responsavel(id_responsavel):
     if not responsavel:
         return jsonify({'error': 'Responsável não encontrado.'}), 404
 
-    grupos = [grupo.to_dict() for grupo in responsavel.grupos_trabalho]
-    return jsonify(grupos), 200
+    grupos = (
+        GrupoTrabalho.query
+        .filter_by(id_responsavel=id_responsavel)
+        .all()
+    )
+    return jsonify(serializar_grupos(grupos)), 200
 
 # Rota para renderizar o template index.html
 @bp.route('/view', methods=['GET'])
 def view_responsaveis():
-    responsaveis = Responsavel.query.all()
+    responsaveis = (
+        Responsavel.query
+        .options(selectinload(Responsavel.grupos_trabalho))
+        .all()
+    )
     return render_template('responsavel/index.html', responsaveis=responsaveis)
\ No newline at end of file
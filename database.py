@@ -1,5 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from replica import SessaoRoteada
 
-db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+# SessaoRoteada envia leituras de rotas @somente_leitura para a réplica
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
+
+
+def init_migrate(app):
+    """Registra o Flask-Migrate (`flask db`); o alembic só é importado aqui."""
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
+
+def estado_pools():
+    """Uso do pool de cada engine: {bind: {tamanho, em_uso, livres, overflow}}."""
+    estado = {}
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            estado[bind or 'default'] = {'pool': type(pool).__name__}
+            continue
+        estado[bind or 'default'] = {
+            'pool': type(pool).__name__,
+            'tamanho': pool.size(),
+            'em_uso': pool.checkedout(),
+            'livres': pool.checkedin(),
+            'overflow': pool.overflow(),
+        }
+    return estado
@@ -0,0 +1,176 @@
+import logging
+import os
+import sys
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger('ativarub.n_mais_1')
+
+_RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Frames destes diretórios não identificam quem disparou a carga
+_DIRETORIOS_IGNORADOS = tuple(
+    os.path.dirname(modulo.__file__) + os.sep
+    for modulo in (
+        __import__('sqlalchemy'),
+        __import__('flask_sqlalchemy'),
+        __import__('jinja2'),
+        __import__('flask'),
+        __import__('werkzeug'),
+    )
+)
+
+# Arquivos da aplicação que só repassam a consulta: o detector e a sessão
+# roteada entre primário e réplica (replica.py)
+_ARQUIVOS_IGNORADOS = {
+    os.path.abspath(__file__),
+    os.path.join(_RAIZ, 'replica.py'),
+}
+
+
+class NMais1Detectado(Exception):
+    """Levantada no modo 'raise' quando uma relação é carregada N vezes."""
+
+    def __init__(self, ocorrencias):
+        self.ocorrencias = ocorrencias
+        super().__init__(
+            'Consultas N+1 detectadas:\n' + '\n'.join(
+                f'  {o["relacao"]}: {o["vezes"]}x em {o["origem"]}' for o in ocorrencias
+            )
+        )
+
+
+class DetectorNMais1:
+    """
+    Detecta cargas lazy repetidas da mesma relação (N+1).
+
+    Cada carga lazy que chega ao banco é registrada com a relação
+    (Classe.atributo) e a linha de template ou de código que a disparou.
+    Ao fim da requisição, relações carregadas NPLUS1_THRESHOLD vezes ou mais
+    são registradas no log ou, no modo 'raise', viram NMais1Detectado.
+    Configuração:
+
+    NPLUS1_DETECTOR     'off' (padrão), 'log' ou 'raise'
+    NPLUS1_THRESHOLD    número de cargas repetidas para acusar (padrão 3)
+
+    Fora de requisições (scripts, testes de serviço), use `monitorar()`.
+    """
+
+    def __init__(self, app=None):
+        self.modo = 'off'
+        self.limite = 3
+        self._ouvindo = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['detector_n1'] = self
+        self.modo = app.config.get('NPLUS1_DETECTOR', 'off')
+        self.limite = app.config.get('NPLUS1_THRESHOLD', 3)
+        if self.modo == 'off':
+            return
+
+        if self.modo not in ('log', 'raise'):
+            raise RuntimeError("NPLUS1_DETECTOR deve ser 'off', 'log' ou 'raise'")
+
+        self._ouvir()
+
+        app.before_request(self._inicio_requisicao)
+        app.after_request(self._fim_requisicao)
+
+    @contextmanager
+    def monitorar(self, modo='raise'):
+        """Verifica o bloco `with` como se fosse uma requisição."""
+        self._ouvir()
+
+        anterior = getattr(self, '_cargas_fora_requisicao', None)
+        self._cargas_fora_requisicao = Counter()
+        try:
+            yield
+            self._avaliar(self._cargas_fora_requisicao, 'monitorar()', modo)
+        finally:
+            self._cargas_fora_requisicao = anterior
+
+    # =====================================================
+    # Coleta
+    # =====================================================
+
+    def _ouvir(self):
+        if not self._ouvindo:
+            event.listen(Session, 'do_orm_execute', self._registrar_carga)
+            self._ouvindo = True
+
+    def _cargas_atuais(self):
+        if has_request_context() and 'cargas_lazy' in g:
+            return g.cargas_lazy
+        return getattr(self, '_cargas_fora_requisicao', None)
+
+    def _registrar_carga(self, orm_execute_state):
+        # lazy_loaded_from só existe em SELECT (UPDATE/DELETE em lote levantam)
+        if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+            return
+        cargas = self._cargas_atuais()
+        if cargas is None:
+            return
+
+        caminho = orm_execute_state.loader_strategy_path
+        if caminho is not None and len(caminho) >= 2:
+            relacao = f'{caminho[-2].class_.__name__}.{caminho[-1].key}'
+        else:
+            relacao = orm_execute_state.lazy_loaded_from.class_.__name__
+
+        cargas[(relacao, _origem())] += 1
+
+    # =====================================================
+    # Requisição
+    # =====================================================
+
+    def _inicio_requisicao(self):
+        g.cargas_lazy = Counter()
+
+    def _fim_requisicao(self, response):
+        cargas = g.pop('cargas_lazy', None)
+        if cargas:
+            self._avaliar(cargas, request.endpoint or request.path, self.modo)
+        return response
+
+    def _avaliar(self, cargas, contexto, modo):
+        ocorrencias = [
+            {'relacao': relacao, 'origem': origem, 'vezes': vezes}
+            for (relacao, origem), vezes in cargas.most_common()
+            if vezes >= self.limite
+        ]
+        if not ocorrencias:
+            return
+
+        if modo == 'raise':
+            raise NMais1Detectado(ocorrencias)
+
+        for o in ocorrencias:
+            logger.warning(
+                'N+1 em %s: %s carregado %dx em %s',
+                contexto, o['relacao'], o['vezes'], o['origem']
+            )
+
+
+def _origem():
+    """Primeira linha de template ou de código da aplicação na pilha."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        template = frame.f_globals.get('__jinja_template__')
+        if template is not None:
+            linha = template.get_corresponding_lineno(frame.f_lineno)
+            return f'{template.name or template.filename}:{linha}'
+
+        arquivo = frame.f_code.co_filename
+        if not arquivo.startswith(_DIRETORIOS_IGNORADOS) and os.path.abspath(arquivo) not in _ARQUIVOS_IGNORADOS:
+            return f'{os.path.relpath(arquivo, _RAIZ)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return 'desconhecida'
+
+
+detector_n1 = DetectorNMais1()
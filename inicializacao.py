@@ -0,0 +1,200 @@
+import importlib
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import url_for
+
+logger = logging.getLogger('ativarub.inicializacao')
+
+# (módulo, nome do blueprint, prefixo de URL). Nome e prefixo ficam aqui para
+# que o modo sob demanda saiba qual módulo importar sem importá-lo antes; são
+# conferidos com o blueprint no registro.
+BLUEPRINTS = [
+    ('controllers.divisao_bandeira_controller', 'divisao_bandeira', '/divisao_bandeira'),
+    ('controllers.loja_controller', 'lojas', '/lojas'),
+    ('controllers.responsavel_controller', 'responsavel', '/responsaveis'),
+    ('controllers.grupo_trabalho_controller', 'grupo_trabalho', '/grupos_trabalho'),
+    ('controllers.atividade_controller', 'atividade', '/atividades'),
+    ('controllers.checkpoint_atividade_controller', 'checkpoint_atividade', '/checkpoint-atividades'),
+    ('controllers.planejamento_controller', 'planejamento', '/planejamentos'),
+    ('controllers.gestao_controller', 'gestao', '/gestao'),
+    ('controllers.job_controller', 'jobs', '/jobs'),
+]
+
+
+class Inicializacao:
+    """
+    Tempos de inicialização da aplicação e registro dos blueprints.
+
+    Configuração:
+
+    LAZY_STARTUP        tira de create_app o import dos blueprints e só
+                        carrega o Flask-Migrate/alembic na CLI (padrão false)
+    STARTUP_BUDGET_MS   orçamento de cold start usado por `flask startup-profile`
+
+    O modo sob demanda é pensado para ambientes de preview/serverless: o
+    processo sobe sem importar os controllers, e eles são importados e
+    registrados quando a aplicação vai atender a primeira requisição (ou no
+    primeiro url_for). O registro acontece sob um lock e antes de a
+    requisição chegar ao Flask, então nenhuma outra thread está roteando
+    pelo url_map enquanto ele muda, e o Flask ainda aceita o registro.
+    Comandos da CLI que não geram URLs nunca importam os controllers.
+
+    Os modelos continuam sendo importados na criação da aplicação, pois os
+    eventos de contadores e rollups precisam estar registrados antes de
+    qualquer escrita.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sob_demanda = app.config.get('LAZY_STARTUP', False)
+        self.fases = {}
+        self.blueprints = {}
+        self._pendentes = {}
+        self._lock = threading.Lock()
+        app.extensions['inicializacao'] = self
+
+    @contextmanager
+    def fase(self, nome):
+        """Mede uma etapa de create_app, em ms."""
+        inicio = time.perf_counter()
+        yield
+        self.fases[nome] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    def registrar_blueprints(self):
+        if not self.sob_demanda:
+            for modulo, nome, prefixo in BLUEPRINTS:
+                self._registrar(modulo, nome, prefixo)
+            return
+
+        self._pendentes = {nome: (modulo, prefixo) for modulo, nome, prefixo in BLUEPRINTS}
+        self.app.wsgi_app = _CarregarAntesDeAtender(self, self.app.wsgi_app)
+        self.app.url_build_error_handlers.append(self._url_de_pendente)
+
+    def carregar_todos(self):
+        """
+        Importa e registra os blueprints pendentes.
+
+        Deve rodar antes da primeira requisição chegar ao Flask; threads
+        concorrentes esperam no lock até o registro terminar.
+        """
+        if not self._pendentes:
+            return
+        with self._lock:
+            for nome, (modulo, prefixo) in list(self._pendentes.items()):
+                self._registrar(modulo, nome, prefixo)
+                del self._pendentes[nome]
+
+    def resumo(self):
+        return {
+            'modo': 'sob demanda' if self.sob_demanda else 'imediato',
+            'fases_ms': dict(self.fases),
+            'blueprints_ms': dict(self.blueprints),
+            'pendentes': sorted(self._pendentes),
+        }
+
+    def _registrar(self, modulo, nome, prefixo):
+        inicio = time.perf_counter()
+        bp = importlib.import_module(modulo).bp
+        if bp.name != nome or bp.url_prefix != prefixo:
+            raise RuntimeError(
+                f'inicializacao.BLUEPRINTS desatualizado para {modulo}: '
+                f'esperado {nome} em {prefixo}, encontrado {bp.name} em {bp.url_prefix}'
+            )
+
+        self.app.register_blueprint(bp)
+
+        self.blueprints[nome] = round((time.perf_counter() - inicio) * 1000, 1)
+        logger.debug('Blueprint %s carregado em %.1f ms', nome, self.blueprints[nome])
+
+    def _url_de_pendente(self, erro, endpoint, valores):
+        if endpoint.partition('.')[0] not in self._pendentes:
+            return None
+        self.carregar_todos()
+        return url_for(endpoint, **valores)
+
+
+class _CarregarAntesDeAtender:
+    """Middleware WSGI: registra os blueprints pendentes antes da primeira requisição."""
+
+    def __init__(self, inicializacao, wsgi_app):
+        self.inicializacao = inicializacao
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        if self.inicializacao._pendentes:
+            self.inicializacao.carregar_todos()
+        return self.wsgi_app(environ, start_response)
+
+
+# =====================================================
+# Perfil de cold start (flask startup-profile)
+# =====================================================
+
+_LINHA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)$')
+
+# Executado em um interpretador novo: importa o app (que chama create_app)
+_CODIGO_PERFIL = (
+    'import json, time\n'
+    'inicio = time.perf_counter()\n'
+    'import app\n'
+    'total = (time.perf_counter() - inicio) * 1000\n'
+    'resumo = app.app.extensions["inicializacao"].resumo()\n'
+    'resumo["total_ms"] = round(total, 1)\n'
+    'print(json.dumps(resumo))\n'
+)
+
+
+def perfil_cold_start(sob_demanda=None, diretorio=None):
+    """
+    Mede o cold start (import de app.py + create_app) em um processo novo.
+
+    Usa `python -X importtime` para o custo de import de cada módulo.
+    Retorna {'total_ms', 'modo', 'fases_ms', 'blueprints_ms', 'pendentes',
+    'modulos': [{modulo, proprio_ms, acumulado_ms}], 'pacotes': {pacote: ms}}.
+    """
+    ambiente = dict(os.environ)
+    if sob_demanda is not None:
+        ambiente['LAZY_STARTUP'] = 'true' if sob_demanda else 'false'
+
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CODIGO_PERFIL],
+        cwd=diretorio or os.path.dirname(os.path.abspath(__file__)),
+        env=ambiente,
+        capture_output=True,
+        text=True,
+    )
+    if processo.returncode != 0:
+        erro = processo.stderr.strip().splitlines()
+        raise RuntimeError(erro[-1] if erro else 'Falha ao iniciar a aplicação')
+
+    resultado = json.loads(processo.stdout.strip().splitlines()[-1])
+
+    modulos = []
+    pacotes = {}
+    for linha in processo.stderr.splitlines():
+        encontrado = _LINHA_IMPORTTIME.match(linha)
+        if not encontrado:
+            continue
+        proprio_us, acumulado_us, modulo = encontrado.groups()
+        modulos.append({
+            'modulo': modulo,
+            'proprio_ms': int(proprio_us) / 1000,
+            'acumulado_ms': int(acumulado_us) / 1000,
+        })
+        pacote = modulo.partition('.')[0]
+        pacotes[pacote] = pacotes.get(pacote, 0) + int(proprio_us) / 1000
+
+    resultado['modulos'] = modulos
+    resultado['pacotes'] = {
+        pacote: round(ms, 1)
+        for pacote, ms in sorted(pacotes.items(), key=lambda item: -item[1])
+    }
+    return resultado
@@ -0,0 +1,253 @@
+import logging
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+from database import db
+from models.job import Job, JOB_PENDENTE, JOB_EM_ANDAMENTO, JOB_CONCLUIDO, JOB_ERRO
+
+logger = logging.getLogger('ativarub.jobs')
+
+
+class ContextoJob:
+    """Passado às tarefas para reportar progresso."""
+
+    def __init__(self, id_job):
+        self.id_job = id_job
+
+    def progresso(self, percentual, mensagem=None):
+        """
+        Grava o progresso e faz commit da sessão.
+
+        O commit também confirma o trabalho feito até aqui pela tarefa, então
+        tarefas longas devem chamar progresso() ao fim de cada lote.
+        """
+        valores = {'progresso': max(0, min(100, int(percentual))), 'updated_at': datetime.utcnow()}
+        if mensagem is not None:
+            valores['mensagem'] = mensagem[:255]
+        db.session.execute(
+            update(Job).where(Job.id_job == self.id_job).values(**valores)
+        )
+        db.session.commit()
+
+
+class FilaJobs:
+    """
+    Fila de jobs em segundo plano sem broker externo.
+
+    Jobs são linhas da tabela `job`; threads worker no processo web (ou o
+    comando `flask jobs-worker`) reservam e executam os jobs pendentes.
+    Configuração:
+
+    JOBS_WORKERS        threads worker por processo web (padrão 2; 0 deixa
+                        a execução para `flask jobs-worker`)
+    JOBS_POLL_INTERVAL  segundos entre verificações da fila (padrão 2)
+    JOBS_LEASE_TIMEOUT  segundos sem renovação após os quais um job Em
+                        andamento é considerado abandonado (padrão 300)
+    JOBS_MAX_ATTEMPTS   reservas de um job abandonado antes de marcá-lo
+                        como Erro (padrão 3)
+
+    A reserva é um lease: enquanto a tarefa roda, uma thread renova
+    `updated_at` a cada terço do prazo. Se o worker morre, o job volta a
+    ser reservado por outro depois do prazo.
+    """
+
+    def __init__(self, app=None):
+        self.tarefas = {}
+        self.app = None
+        self._acordar = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('JOBS_WORKERS', 2)
+        self.intervalo = app.config.get('JOBS_POLL_INTERVAL', 2.0)
+        self.lease = app.config.get('JOBS_LEASE_TIMEOUT', 300.0)
+        self.max_tentativas = app.config.get('JOBS_MAX_ATTEMPTS', 3)
+        app.extensions['jobs'] = self
+
+        # Threads iniciadas na primeira requisição, para não rodar em
+        # comandos do CLI (flask db upgrade etc.)
+        if self.workers:
+            app.before_request(self._garantir_workers)
+
+    def tarefa(self, tipo):
+        """Registra a função que executa jobs do `tipo` informado."""
+        def decorator(funcao):
+            self.tarefas[tipo] = funcao
+            return funcao
+        return decorator
+
+    def enfileirar(self, tipo, **parametros):
+        """
+        Cria o job e faz commit, para que fique visível aos workers.
+
+        `parametros` precisa ser serializável em JSON. Retorna o Job.
+        """
+        if tipo not in self.tarefas:
+            raise ValueError(f'Tipo de job desconhecido: {tipo}')
+
+        job = Job(tipo=tipo, status=JOB_PENDENTE, parametros=parametros, progresso=0)
+        db.session.add(job)
+        db.session.commit()
+        self._acordar.set()
+        return job
+
+    # =====================================================
+    # Execução
+    # =====================================================
+
+    def _garantir_workers(self):
+        if self._threads:
+            return
+        with self._lock:
+            if not self._threads:
+                self.iniciar_workers(self.workers)
+
+    def iniciar_workers(self, quantidade):
+        for i in range(quantidade):
+            thread = threading.Thread(
+                target=self._loop, name=f'jobs-worker-{i + 1}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _loop(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    executou = self.executar_proximo()
+            except Exception:
+                logger.exception('Falha no worker de jobs')
+                executou = False
+
+            if not executou:
+                self._acordar.wait(self.intervalo)
+                self._acordar.clear()
+
+    def executar_pendentes(self):
+        """Executa os jobs pendentes no thread atual. Retorna quantos rodaram."""
+        total = 0
+        while self.executar_proximo():
+            total += 1
+        return total
+
+    def executar_proximo(self):
+        """Reserva e executa o job pendente mais antigo. Requer app context."""
+        id_job = self._reservar()
+        if id_job is None:
+            return False
+
+        job = db.session.get(Job, id_job)
+        tentativa = job.tentativas
+        funcao = self.tarefas.get(job.tipo)
+        parar_renovacao = self._renovar_lease(id_job, tentativa)
+
+        try:
+            if funcao is None:
+                raise ValueError(f'Tipo de job desconhecido: {job.tipo}')
+            resultado = funcao(ContextoJob(id_job), **(job.parametros or {}))
+            db.session.commit()
+            self._finalizar(id_job, tentativa, JOB_CONCLUIDO, resultado=resultado, progresso=100)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Job %s (%s) falhou', id_job, job.tipo)
+            self._finalizar(
+                id_job, tentativa, JOB_ERRO,
+                erro=f'{e}\n\n{traceback.format_exc()}'
+            )
+        finally:
+            parar_renovacao.set()
+            db.session.remove()
+
+        return True
+
+    def _reservar(self):
+        tabela = Job.__table__
+        while True:
+            agora = datetime.utcnow()
+            abandonado = and_(
+                tabela.c.status == JOB_EM_ANDAMENTO,
+                tabela.c.updated_at < agora - timedelta(seconds=self.lease),
+            )
+
+            # Abandonados que já esgotaram as tentativas não voltam à fila
+            db.session.execute(
+                update(tabela)
+                .where(abandonado, tabela.c.tentativas >= self.max_tentativas)
+                .values(
+                    status=JOB_ERRO, finalizado_em=agora, updated_at=agora,
+                    erro=f'Worker interrompido; job abandonado após {self.max_tentativas} tentativa(s)'
+                )
+            )
+
+            disponivel = or_(tabela.c.status == JOB_PENDENTE, abandonado)
+            id_job = db.session.scalar(
+                select(tabela.c.id_job)
+                .where(disponivel)
+                .order_by(tabela.c.id_job)
+                .limit(1)
+            )
+            if id_job is None:
+                db.session.commit()
+                return None
+
+            # Só um worker consegue reservar: o UPDATE repete a condição
+            reservado = db.session.execute(
+                update(tabela)
+                .where(tabela.c.id_job == id_job, disponivel)
+                .values(
+                    status=JOB_EM_ANDAMENTO,
+                    iniciado_em=agora,
+                    updated_at=agora,
+                    tentativas=tabela.c.tentativas + 1,
+                )
+            ).rowcount
+            db.session.commit()
+            if reservado:
+                return id_job
+
+    def _renovar_lease(self, id_job, tentativa):
+        """
+        Renova `updated_at` do job em uma thread, com conexão própria, até
+        o evento devolvido ser acionado.
+        """
+        parar = threading.Event()
+        app = self.app
+
+        def renovar():
+            while not parar.wait(self.lease / 3):
+                try:
+                    with app.app_context(), db.engine.begin() as conexao:
+                        conexao.execute(
+                            update(Job.__table__)
+                            .where(
+                                Job.__table__.c.id_job == id_job,
+                                Job.__table__.c.tentativas == tentativa,
+                                Job.__table__.c.status == JOB_EM_ANDAMENTO,
+                            )
+                            .values(updated_at=datetime.utcnow())
+                        )
+                except Exception:
+                    logger.exception('Falha ao renovar o lease do job %s', id_job)
+
+        threading.Thread(target=renovar, name=f'jobs-lease-{id_job}', daemon=True).start()
+        return parar
+
+    def _finalizar(self, id_job, tentativa, status, **valores):
+        """Grava o resultado, salvo se o job já foi reservado de novo por outro worker."""
+        agora = datetime.utcnow()
+        db.session.execute(
+            update(Job)
+            .where(Job.id_job == id_job, Job.tentativas == tentativa)
+            .values(status=status, finalizado_em=agora, updated_at=agora, **valores)
+        )
+        db.session.commit()
+
+
+fila = FilaJobs()
@@ -0,0 +1,266 @@
+import hmac
+import ipaddress
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, abort, before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+from database import estado_pools
+
+logger = logging.getLogger('ativarub.slow_query')
+
+# Limites (segundos) do histograma de duração das requisições
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metricas:
+    """
+    Instrumentação por requisição: tempo total, quantidade e tempo de SQL,
+    tempo de renderização de templates e log de consultas lentas.
+
+    Exposta no cabeçalho Server-Timing e em /metrics (formato texto do
+    Prometheus). Configuração:
+
+    METRICS_ENABLED     liga a instrumentação (padrão False; desligada,
+                        nenhum evento é registrado)
+    METRICS_SLOW_QUERY_MS   limite do log de consultas lentas (padrão 200)
+    METRICS_SERVER_TIMING   envia o cabeçalho Server-Timing (padrão True)
+    METRICS_ALLOWED_NETWORKS  redes (CIDR, separadas por vírgula) que podem
+                        ler /metrics sem token (padrão só localhost)
+    METRICS_TOKEN       token aceito em `Authorization: Bearer` de qualquer
+                        origem (padrão nenhum)
+
+    As requisições são contabilizadas no teardown, que roda também quando a
+    view levanta exceção, então erros 500 entram nas contagens e na latência.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._requisicoes = defaultdict(int)
+        self._duracao = defaultdict(lambda: [0.0, [0] * len(BUCKETS)])
+        self._sql_qtd = defaultdict(int)
+        self._sql_segundos = defaultdict(float)
+        self._template_segundos = defaultdict(float)
+        self._consultas_lentas = defaultdict(int)
+        self._conexoes = defaultdict(int)
+        self._conexoes_invalidadas = defaultdict(int)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['metricas'] = self
+        if not app.config.get('METRICS_ENABLED', False):
+            return
+
+        self.slow_query_ms = app.config.get('METRICS_SLOW_QUERY_MS', 200)
+        self.server_timing = app.config.get('METRICS_SERVER_TIMING', True)
+        self.token = app.config.get('METRICS_TOKEN')
+        self.redes = [
+            ipaddress.ip_network(rede.strip(), strict=False)
+            for rede in app.config.get('METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128').split(',')
+            if rede.strip()
+        ]
+
+        app.before_request(self._inicio_requisicao)
+        app.after_request(self._cabecalho_server_timing)
+        app.teardown_request(self._fim_requisicao)
+        before_render_template.connect(self._inicio_template, app)
+        template_rendered.connect(self._fim_template, app)
+
+        from database import db
+        with app.app_context():
+            for bind, engine in db.engines.items():
+                event.listen(engine, 'before_cursor_execute', self._inicio_sql)
+                event.listen(engine, 'after_cursor_execute', self._fim_sql)
+                self._ouvir_pool(engine, bind or 'default')
+
+        app.add_url_rule('/metrics', 'metricas', self.exportar)
+
+    # =====================================================
+    # Requisição
+    # =====================================================
+
+    def _inicio_requisicao(self):
+        g.metricas = {
+            'inicio': time.perf_counter(),
+            'sql_qtd': 0,
+            'sql_segundos': 0.0,
+            'template_segundos': 0.0,
+        }
+
+    def _cabecalho_server_timing(self, response):
+        dados = g.get('metricas')
+        if dados is None:
+            return response
+
+        dados['status'] = response.status_code
+        if self.server_timing:
+            response.headers.add(
+                'Server-Timing',
+                f'app;dur={(time.perf_counter() - dados["inicio"]) * 1000:.1f}, '
+                f'db;dur={dados["sql_segundos"] * 1000:.1f};desc="{dados["sql_qtd"]} consultas", '
+                f'tpl;dur={dados["template_segundos"] * 1000:.1f}'
+            )
+        return response
+
+    def _fim_requisicao(self, exc=None):
+        dados = g.pop('metricas', None)
+        if dados is None or request.endpoint == 'metricas':
+            return
+
+        duracao = time.perf_counter() - dados['inicio']
+        endpoint = request.endpoint or 'desconhecido'
+        # Sem resposta processada (exceção não tratada) a requisição é um 500
+        status = 500 if exc is not None else dados.get('status', 500)
+
+        with self._lock:
+            self._requisicoes[(endpoint, request.method, status)] += 1
+            soma_buckets = self._duracao[endpoint]
+            soma_buckets[0] += duracao
+            for i, limite in enumerate(BUCKETS):
+                if duracao <= limite:
+                    soma_buckets[1][i] += 1
+            self._sql_qtd[endpoint] += dados['sql_qtd']
+            self._sql_segundos[endpoint] += dados['sql_segundos']
+            self._template_segundos[endpoint] += dados['template_segundos']
+
+    # =====================================================
+    # Templates
+    # =====================================================
+
+    def _inicio_template(self, sender, template, context, **extra):
+        if 'metricas' in g:
+            g.metricas['template_inicio'] = time.perf_counter()
+
+    def _fim_template(self, sender, template, context, **extra):
+        dados = g.get('metricas')
+        if dados and 'template_inicio' in dados:
+            dados['template_segundos'] += time.perf_counter() - dados.pop('template_inicio')
+
+    # =====================================================
+    # SQL
+    # =====================================================
+
+    def _inicio_sql(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metricas_inicio', []).append(time.perf_counter())
+
+    def _fim_sql(self, conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get('metricas_inicio')
+        if not inicios:
+            return
+        duracao = time.perf_counter() - inicios.pop()
+
+        if not has_request_context():
+            endpoint = None
+        else:
+            endpoint = request.endpoint or 'desconhecido'
+            dados = g.get('metricas')
+            if dados is not None:
+                dados['sql_qtd'] += 1
+                dados['sql_segundos'] += duracao
+
+        if duracao * 1000 >= self.slow_query_ms:
+            with self._lock:
+                self._consultas_lentas[endpoint or 'sem_requisicao'] += 1
+            logger.warning(
+                'Consulta lenta (%.1f ms) em %s: %s',
+                duracao * 1000, endpoint or 'sem requisição', ' '.join(statement.split())[:1000]
+            )
+
+    # =====================================================
+    # Pool de conexões
+    # =====================================================
+
+    def _ouvir_pool(self, engine, bind):
+        def conectou(dbapi_connection, connection_record):
+            with self._lock:
+                self._conexoes[bind] += 1
+
+        def invalidou(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self._conexoes_invalidadas[bind] += 1
+
+        event.listen(engine, 'connect', conectou)
+        event.listen(engine, 'invalidate', invalidou)
+
+    # =====================================================
+    # Exportação
+    # =====================================================
+
+    def _autorizado(self):
+        if self.token:
+            autorizacao = request.headers.get('Authorization', '')
+            if hmac.compare_digest(autorizacao, f'Bearer {self.token}'):
+                return True
+        try:
+            origem = ipaddress.ip_address(request.remote_addr or '')
+        except ValueError:
+            return False
+        return any(origem in rede for rede in self.redes)
+
+    def exportar(self):
+        """Métricas acumuladas no formato texto do Prometheus."""
+        if not self._autorizado():
+            abort(403)
+
+        linhas = []
+
+        with self._lock:
+            linhas.append('# TYPE http_requests_total counter')
+            for (endpoint, metodo, status), total in sorted(self._requisicoes.items()):
+                linhas.append(
+                    f'http_requests_total{{endpoint="{endpoint}",method="{metodo}",status="{status}"}} {total}'
+                )
+
+            linhas.append('# TYPE http_request_duration_seconds histogram')
+            for endpoint, (soma, buckets) in sorted(self._duracao.items()):
+                total = sum(
+                    v for (e, _, _), v in self._requisicoes.items() if e == endpoint
+                )
+                for limite, qtd in zip(BUCKETS, buckets):
+                    linhas.append(
+                        f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{limite}"}} {qtd}'
+                    )
+                linhas.append(
+                    f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {total}'
+                )
+                linhas.append(f'http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {soma:.6f}')
+                linhas.append(f'http_request_duration_seconds_count{{endpoint="{endpoint}"}} {total}')
+
+            for nome, tipo, valores in (
+                ('db_queries_total', 'counter', self._sql_qtd),
+                ('db_query_duration_seconds_total', 'counter', self._sql_segundos),
+                ('template_render_seconds_total', 'counter', self._template_segundos),
+                ('db_slow_queries_total', 'counter', self._consultas_lentas),
+            ):
+                linhas.append(f'# TYPE {nome} {tipo}')
+                for endpoint, valor in sorted(valores.items()):
+                    linhas.append(f'{nome}{{endpoint="{endpoint}"}} {valor}')
+
+            for nome, valores in (
+                ('db_pool_connections_opened_total', self._conexoes),
+                ('db_pool_connections_invalidated_total', self._conexoes_invalidadas),
+            ):
+                linhas.append(f'# TYPE {nome} counter')
+                for bind, valor in sorted(valores.items()):
+                    linhas.append(f'{nome}{{bind="{bind}"}} {valor}')
+
+        pools = estado_pools()
+        for nome, chave in (
+            ('db_pool_size', 'tamanho'),
+            ('db_pool_checked_out', 'em_uso'),
+            ('db_pool_checked_in', 'livres'),
+            ('db_pool_overflow', 'overflow'),
+        ):
+            linhas.append(f'# TYPE {nome} gauge')
+            for bind, estado in sorted(pools.items()):
+                if chave in estado:
+                    linhas.append(f'{nome}{{bind="{bind}"}} {estado[chave]}')
+
+        return Response('\n'.join(linhas) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+metricas = Metricas()
@@ -0,0 +1,207 @@
+"""indices, contadores, rollup, jobs e estimativas
+
+Revision ID: 4f82276bf966
+Revises: 62e1f938568d
+Create Date: 2026-10-18 13:19:23.622552
+
+Índices de consulta (incluindo os GiST de período, só no PostgreSQL),
+contadores de checkpoints em planejamento, data_fim_prevista em
+checkpoint_atividade e as tabelas rollup, job e estimativa_duracao.
+Contadores e rollups são preenchidos a partir dos dados existentes;
+as estimativas, com `flask atualizar-estimativas`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f82276bf966'
+down_revision = '62e1f938568d'
+branch_labels = None
+depends_on = None
+
+# Mesma expressão de models/periodo.py:faixa_periodo, para que o
+# planejador use os índices nas consultas de janela
+PERIODOS = {
+    'ix_planejamento_periodo': (
+        'planejamento',
+        "tsrange(data_ini, CASE WHEN (data_fim < data_ini) THEN data_ini ELSE data_fim END, '[]')"
+    ),
+    'ix_checkpoint_atividade_periodo': (
+        'checkpoint_atividade',
+        "tsrange(data_ini, CASE WHEN (coalesce(data_fim, data_fim_prevista) < data_ini) "
+        "THEN data_ini ELSE coalesce(data_fim, data_fim_prevista) END, '[]')"
+    ),
+}
+
+# Status de checkpoint -> coluna de contador (models/planejamento.py:STATUS_CONTADORES)
+CONTADORES = {
+    'qtd_pendente': 'Pendente',
+    'qtd_em_andamento': 'Em andamento',
+    'qtd_concluido': 'Concluído',
+}
+
+# Escopo do rollup -> coluna da loja (models/rollup.py:COLUNA_ESCOPO)
+ESCOPOS = {
+    'grupo': 'id_grupo_trabalho',
+    'divisao': 'id_divisao_bandeira',
+}
+
+
+def _parametros_status():
+    return {f'status_{coluna}': status for coluna, status in CONTADORES.items()}
+
+
+def _postgres():
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def upgrade():
+    op.create_table('estimativa_duracao',
+    sa.Column('id_atividade', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('amostras', sa.Integer(), nullable=False),
+    sa.Column('horas_media', sa.Float(), nullable=True),
+    sa.Column('horas_desvio', sa.Float(), nullable=True),
+    sa.Column('horas_p10', sa.Float(), nullable=True),
+    sa.Column('horas_p50', sa.Float(), nullable=True),
+    sa.Column('horas_p90', sa.Float(), nullable=True),
+    sa.Column('amostras_taxa', sa.Integer(), nullable=False),
+    sa.Column('taxa_p10', sa.Float(), nullable=True),
+    sa.Column('taxa_p50', sa.Float(), nullable=True),
+    sa.Column('taxa_p90', sa.Float(), nullable=True),
+    sa.Column('dados_ate', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id_atividade')
+    )
+    op.create_table('job',
+    sa.Column('id_job', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('parametros', sa.JSON(), nullable=True),
+    sa.Column('resultado', sa.JSON(), nullable=True),
+    sa.Column('erro', sa.Text(), nullable=True),
+    sa.Column('progresso', sa.Integer(), nullable=False),
+    sa.Column('mensagem', sa.String(length=255), nullable=True),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('iniciado_em', sa.DateTime(), nullable=True),
+    sa.Column('finalizado_em', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id_job')
+    )
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.create_index('ix_job_status_id', ['status', 'id_job'], unique=False)
+
+    op.create_table('rollup',
+    sa.Column('id_rollup', sa.Integer(), nullable=False),
+    sa.Column('escopo', sa.String(length=20), nullable=False),
+    sa.Column('id_referencia', sa.Integer(), nullable=False),
+    sa.Column('total_lojas', sa.Integer(), nullable=False),
+    sa.Column('total_pessoas', sa.Integer(), nullable=False),
+    sa.Column('total_sku', sa.Integer(), nullable=False),
+    sa.Column('qtd_pendente', sa.Integer(), nullable=False),
+    sa.Column('qtd_em_andamento', sa.Integer(), nullable=False),
+    sa.Column('qtd_concluido', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id_rollup'),
+    sa.UniqueConstraint('escopo', 'id_referencia', name='uq_rollup_escopo_referencia')
+    )
+    with op.batch_alter_table('checkpoint_atividade', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_fim_prevista', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_checkpoint_atividade_atividade_data_ini', ['id_atividade', 'data_ini'], unique=False)
+        batch_op.create_index('ix_checkpoint_atividade_loja_data_ini', ['id_loja', 'data_ini'], unique=False)
+        batch_op.create_index('ix_checkpoint_atividade_loja_status', ['id_loja', 'status'], unique=False)
+        batch_op.create_index('ix_checkpoint_atividade_nome_data_ini', ['nome_checkpoint', 'data_ini'], unique=False)
+        batch_op.create_index('ix_checkpoint_atividade_planejamento_status', ['id_planejamento', 'status'], unique=False)
+
+    with op.batch_alter_table('loja', schema=None) as batch_op:
+        batch_op.create_index('ix_loja_divisao_grupo', ['id_divisao_bandeira', 'id_grupo_trabalho'], unique=False)
+        batch_op.create_index('ix_loja_grupo', ['id_grupo_trabalho'], unique=False)
+
+    with op.batch_alter_table('planejamento', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('qtd_pendente', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('qtd_em_andamento', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('qtd_concluido', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_planejamento_atividade', ['id_atividade'], unique=False)
+        batch_op.create_index('ix_planejamento_grupo_data_ini', ['id_grupo_trabalho', 'data_ini'], unique=False)
+
+    if _postgres():
+        for nome, (tabela, expressao) in PERIODOS.items():
+            op.create_index(nome, tabela, [sa.text(expressao)], postgresql_using='gist')
+
+    _preencher_contadores()
+    _preencher_rollups()
+
+
+def _preencher_contadores():
+    """Equivale a `flask recalcular-planejamentos`."""
+    op.execute(
+        sa.text(
+            'UPDATE planejamento SET ' + ', '.join(
+                f'{coluna} = (SELECT COUNT(*) FROM checkpoint_atividade c '
+                f'WHERE c.id_planejamento = planejamento.id_planejamento AND c.status = :status_{coluna})'
+                for coluna in CONTADORES
+            )
+        ).bindparams(**_parametros_status())
+    )
+    # O SET lê os valores anteriores ao UPDATE: o status vem depois
+    op.execute(
+        "UPDATE planejamento SET status = CASE WHEN qtd_concluido > 0 "
+        "THEN 'Concluído' ELSE 'Pendente' END"
+    )
+
+
+def _preencher_rollups():
+    """Equivale a `flask recalcular-rollups`."""
+    somas = ', '.join(
+        f'SUM(CASE WHEN status = :status_{coluna} THEN 1 ELSE 0 END) AS {coluna}'
+        for coluna in CONTADORES
+    )
+    totais = ', '.join(f'COALESCE(SUM(c.{coluna}), 0)' for coluna in CONTADORES)
+    for escopo, chave in ESCOPOS.items():
+        op.execute(
+            sa.text(
+                'INSERT INTO rollup (escopo, id_referencia, total_lojas, total_pessoas, total_sku, '
+                f'{", ".join(CONTADORES)}, updated_at) '
+                f'SELECT :escopo, l.{chave}, COUNT(l.id_loja), COALESCE(SUM(l.qtd_pessoas), 0), '
+                f'COALESCE(SUM(l.qtd_sku), 0), {totais}, CURRENT_TIMESTAMP '
+                'FROM loja l '
+                f'LEFT JOIN (SELECT id_loja, {somas} FROM checkpoint_atividade GROUP BY id_loja) c '
+                'ON c.id_loja = l.id_loja '
+                f'WHERE l.{chave} IS NOT NULL '
+                f'GROUP BY l.{chave}'
+            ).bindparams(escopo=escopo, **_parametros_status())
+        )
+
+
+def downgrade():
+    if _postgres():
+        for nome, (tabela, _) in PERIODOS.items():
+            op.drop_index(nome, table_name=tabela)
+
+    with op.batch_alter_table('planejamento', schema=None) as batch_op:
+        batch_op.drop_index('ix_planejamento_grupo_data_ini')
+        batch_op.drop_index('ix_planejamento_atividade')
+        batch_op.drop_column('qtd_concluido')
+        batch_op.drop_column('qtd_em_andamento')
+        batch_op.drop_column('qtd_pendente')
+
+    with op.batch_alter_table('loja', schema=None) as batch_op:
+        batch_op.drop_index('ix_loja_grupo')
+        batch_op.drop_index('ix_loja_divisao_grupo')
+
+    with op.batch_alter_table('checkpoint_atividade', schema=None) as batch_op:
+        batch_op.drop_index('ix_checkpoint_atividade_planejamento_status')
+        batch_op.drop_index('ix_checkpoint_atividade_nome_data_ini')
+        batch_op.drop_index('ix_checkpoint_atividade_loja_status')
+        batch_op.drop_index('ix_checkpoint_atividade_loja_data_ini')
+        batch_op.drop_index('ix_checkpoint_atividade_atividade_data_ini')
+        batch_op.drop_column('data_fim_prevista')
+
+    op.drop_table('rollup')
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_index('ix_job_status_id')
+
+    op.drop_table('job')
+    op.drop_table('estimativa_duracao')
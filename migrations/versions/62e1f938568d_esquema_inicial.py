@@ -0,0 +1,111 @@
+"""esquema inicial
+
+Revision ID: 62e1f938568d
+Revises: 
+Create Date: 2026-10-18 13:19:15.159699
+
+Esquema anterior às migrações, como criado por `db.create_all()`. Bancos
+já existentes entram no histórico com `flask db stamp 62e1f938568d`
+antes do `flask db upgrade`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '62e1f938568d'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('atividade',
+    sa.Column('id_atividade', sa.Integer(), nullable=False),
+    sa.Column('titulo', sa.String(length=255), nullable=False),
+    sa.Column('descricao', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id_atividade')
+    )
+    op.create_table('divisao_bandeira',
+    sa.Column('id_bandeira_divisao', sa.Integer(), nullable=False),
+    sa.Column('nome_bandeira', sa.String(length=255), nullable=False),
+    sa.Column('contato', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id_bandeira_divisao')
+    )
+    op.create_table('responsavel',
+    sa.Column('id_responsavel', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=255), nullable=False),
+    sa.Column('contato', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id_responsavel')
+    )
+    op.create_table('grupo_trabalho',
+    sa.Column('id_grupo_trabalho', sa.Integer(), nullable=False),
+    sa.Column('nome_grupo', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('id_responsavel', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['id_responsavel'], ['responsavel.id_responsavel'], ),
+    sa.PrimaryKeyConstraint('id_grupo_trabalho')
+    )
+    op.create_table('loja',
+    sa.Column('id_loja', sa.Integer(), nullable=False),
+    sa.Column('nome_loja', sa.String(length=255), nullable=False),
+    sa.Column('endereco', sa.Text(), nullable=True),
+    sa.Column('qtd_sku', sa.Integer(), nullable=True),
+    sa.Column('qtd_pessoas', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('id_divisao_bandeira', sa.Integer(), nullable=False),
+    sa.Column('id_grupo_trabalho', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['id_divisao_bandeira'], ['divisao_bandeira.id_bandeira_divisao'], ),
+    sa.ForeignKeyConstraint(['id_grupo_trabalho'], ['grupo_trabalho.id_grupo_trabalho'], ),
+    sa.PrimaryKeyConstraint('id_loja')
+    )
+    op.create_table('planejamento',
+    sa.Column('id_planejamento', sa.Integer(), nullable=False),
+    sa.Column('titulo', sa.String(length=255), nullable=False),
+    sa.Column('data_ini', sa.DateTime(), nullable=True),
+    sa.Column('data_fim', sa.DateTime(), nullable=True),
+    sa.Column('id_grupo_trabalho', sa.Integer(), nullable=False),
+    sa.Column('id_atividade', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.ForeignKeyConstraint(['id_atividade'], ['atividade.id_atividade'], ),
+    sa.ForeignKeyConstraint(['id_grupo_trabalho'], ['grupo_trabalho.id_grupo_trabalho'], ),
+    sa.PrimaryKeyConstraint('id_planejamento')
+    )
+    op.create_table('checkpoint_atividade',
+    sa.Column('id_checkpoint_atividade', sa.Integer(), nullable=False),
+    sa.Column('nome_checkpoint', sa.String(length=150), nullable=False),
+    sa.Column('id_atividade', sa.Integer(), nullable=False),
+    sa.Column('id_loja', sa.Integer(), nullable=False),
+    sa.Column('id_planejamento', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('data_ini', sa.DateTime(), nullable=False),
+    sa.Column('data_fim', sa.DateTime(), nullable=True),
+    sa.Column('observacao', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_atividade'], ['atividade.id_atividade'], ),
+    sa.ForeignKeyConstraint(['id_loja'], ['loja.id_loja'], ),
+    sa.ForeignKeyConstraint(['id_planejamento'], ['planejamento.id_planejamento'], ),
+    sa.PrimaryKeyConstraint('id_checkpoint_atividade')
+    )
+
+
+def downgrade():
+    op.drop_table('checkpoint_atividade')
+    op.drop_table('planejamento')
+    op.drop_table('loja')
+    op.drop_table('grupo_trabalho')
+    op.drop_table('responsavel')
+    op.drop_table('divisao_bandeira')
+    op.drop_table('atividade')
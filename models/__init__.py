@@ -11,3 +11,12 @@ from .atividade import Atividade
 from .checkpoint_atividade import CheckpointAtividade
 
 from .planejamento import Planejamento
+
+# Agregados materializados por grupo e divisão
+from .rollup import Rollup
+
+# Duração ajustada por atividade (ver services/estimativa_service.py)
+from .estimativa_duracao import EstimativaDuracao
+
+# Fila de jobs em segundo plano (ver jobs.py)
+from .job import Job
@@ -1,9 +1,25 @@
 from database import db
 from datetime import datetime
+from sqlalchemy import event, func
+from sqlalchemy.ext.hybrid import hybrid_property
+from .planejamento import Planejamento
+from .periodo import indice_periodo
 
 
 class CheckpointAtividade(db.Model):
     __tablename__ = 'checkpoint_atividade'
+    __table_args__ = (
+        # Rollup por loja e listagem de checkpoints de uma loja
+        db.Index('ix_checkpoint_atividade_loja_status', 'id_loja', 'status'),
+        # Conflitos de período na loja (services/conflito_service.py)
+        db.Index('ix_checkpoint_atividade_loja_data_ini', 'id_loja', 'data_ini'),
+        # Contadores/status do planejamento e acompanhamento por grupo
+        db.Index('ix_checkpoint_atividade_planejamento_status', 'id_planejamento', 'status'),
+        # Histórico de execução por atividade
+        db.Index('ix_checkpoint_atividade_atividade_data_ini', 'id_atividade', 'data_ini'),
+        # Listagem agrupada por nome (checkpoint_atividade.index)
+        db.Index('ix_checkpoint_atividade_nome_data_ini', 'nome_checkpoint', 'data_ini'),
+    )
 
     id_checkpoint_atividade = db.Column(db.Integer, primary_key=True)
 
@@ -42,6 +58,9 @@ class CheckpointAtividade(db.Model):
     # Controle de tempo
     data_ini = db.Column(db.DateTime, nullable=False)
     data_fim = db.Column(db.DateTime)
+    # Fim estimado no agendamento (services/agendamento_service.py);
+    # data_fim só recebe o fim real da execução
+    data_fim_prevista = db.Column(db.DateTime)
 
     # Observações / comentários
     observacao = db.Column(db.Text)
@@ -88,6 +107,18 @@ class CheckpointAtividade(db.Model):
             )
         return None
 
+    @hybrid_property
+    def data_fim_agenda(self):
+        """
+        Fim do período na agenda: o real ou, enquanto não executado, o
+        previsto no agendamento. Usado nos conflitos e na timeline.
+        """
+        return self.data_fim if self.data_fim is not None else self.data_fim_prevista
+
+    @data_fim_agenda.expression
+    def data_fim_agenda(cls):
+        return func.coalesce(cls.data_fim, cls.data_fim_prevista)
+
     def to_dict(self):
         return {
             'id_checkpoint_atividade': self.id_checkpoint_atividade,
@@ -107,6 +138,7 @@ class CheckpointAtividade(db.Model):
             'status': self.status,
             'data_ini': self.data_ini.isoformat() if self.data_ini else None,
             'data_fim': self.data_fim.isoformat() if self.data_fim else None,
+            'data_fim_prevista': self.data_fim_prevista.isoformat() if self.data_fim_prevista else None,
             'tempo_gasto_segundos': self.tempo_gasto_segundos,
             'tempo_gasto_horas': self.tempo_gasto_horas,
             'observacao': self.observacao,
@@ -118,16 +150,86 @@ class CheckpointAtividade(db.Model):
     def atualizar_planejamento_status(self):
         """
         Atualiza o status do planejamento relacionado.
+
+        Os contadores já são mantidos no flush; aqui apenas sincroniza o
+        objeto carregado na sessão.
         """
         if self.planejamento:
-            self.planejamento.atualizar_status()
-            db.session.commit()
+            db.session.refresh(self.planejamento)
 
-    # Sobrescrever o método save para garantir a atualização
     def save(self):
         """
-        Salva o checkpoint e atualiza o planejamento relacionado.
+        Salva o checkpoint; os contadores do planejamento são atualizados
+        na mesma transação.
         """
         db.session.add(self)
         db.session.commit()
-        self.atualizar_planejamento_status()
+
+
+# Timeline por janela de datas (services/timeline_service.py)
+indice_periodo(
+    'ix_checkpoint_atividade_periodo',
+    CheckpointAtividade.data_ini,
+    CheckpointAtividade.data_fim_agenda
+)
+
+
+# =====================================================
+# Manutenção incremental dos contadores do planejamento
+# =====================================================
+
+# Valor anterior carregado ao alterar um checkpoint expirado (após um
+# commit), para que a atualização aplique deltas nos dois planejamentos
+for _atributo in (CheckpointAtividade.status, CheckpointAtividade.id_planejamento):
+    event.listen(_atributo, 'set', lambda *args: None, active_history=True)
+
+
+@event.listens_for(CheckpointAtividade, 'after_insert')
+def _checkpoint_inserido(mapper, connection, target):
+    Planejamento.aplicar_deltas(
+        connection,
+        {target.id_planejamento: {target.status: 1}}
+    )
+
+
+@event.listens_for(CheckpointAtividade, 'after_update')
+def _checkpoint_atualizado(mapper, connection, target):
+    estado = db.inspect(target)
+    hist_status = estado.attrs.status.history
+    hist_planejamento = estado.attrs.id_planejamento.history
+
+    if not hist_status.has_changes() and not hist_planejamento.has_changes():
+        return
+
+    # Valor anterior não carregado: sem o planejamento de origem só a
+    # recontagem completa é segura; sem o status, a dos envolvidos
+    if hist_planejamento.has_changes() and not hist_planejamento.deleted:
+        Planejamento.recalcular_contadores(connection)
+        return
+    if hist_status.has_changes() and not hist_status.deleted:
+        ids = {target.id_planejamento}
+        ids.update(i for i in hist_planejamento.deleted if i is not None)
+        Planejamento.recalcular_contadores(connection, ids)
+        return
+
+    status_anterior = hist_status.deleted[0] if hist_status.deleted else target.status
+    planejamento_anterior = (
+        hist_planejamento.deleted[0]
+        if hist_planejamento.deleted else target.id_planejamento
+    )
+
+    deltas = {}
+    deltas.setdefault(planejamento_anterior, {}).setdefault(status_anterior, 0)
+    deltas[planejamento_anterior][status_anterior] -= 1
+    deltas.setdefault(target.id_planejamento, {}).setdefault(target.status, 0)
+    deltas[target.id_planejamento][target.status] += 1
+
+    Planejamento.aplicar_deltas(connection, deltas)
+
+
+@event.listens_for(CheckpointAtividade, 'after_delete')
+def _checkpoint_removido(mapper, connection, target):
+    Planejamento.aplicar_deltas(
+        connection,
+        {target.id_planejamento: {target.status: -1}}
+    )
@@ -0,0 +1,74 @@
+from database import db
+from datetime import datetime
+
+# Colunas ajustadas, na ordem de to_dict
+COLUNAS_PARAMETROS = [
+    'amostras',
+    'horas_media',
+    'horas_desvio',
+    'horas_p10',
+    'horas_p50',
+    'horas_p90',
+    'amostras_taxa',
+    'taxa_p10',
+    'taxa_p50',
+    'taxa_p90',
+]
+
+
+class EstimativaDuracao(db.Model):
+    """
+    Duração de execução ajustada por atividade.
+
+    Calculada a partir dos checkpoints concluídos (services/estimativa_service.py)
+    e atualizada de forma incremental: só as atividades com checkpoints
+    alterados desde `dados_ate` são recalculadas.
+    """
+    __tablename__ = 'estimativa_duracao'
+
+    id_atividade = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    # Horas por checkpoint concluído
+    amostras = db.Column(db.Integer, nullable=False, default=0)
+    horas_media = db.Column(db.Float)
+    horas_desvio = db.Column(db.Float)
+    horas_p10 = db.Column(db.Float)
+    horas_p50 = db.Column(db.Float)
+    horas_p90 = db.Column(db.Float)
+
+    # Horas * qtd_pessoas / qtd_sku, apenas lojas com SKU
+    amostras_taxa = db.Column(db.Integer, nullable=False, default=0)
+    taxa_p10 = db.Column(db.Float)
+    taxa_p50 = db.Column(db.Float)
+    taxa_p90 = db.Column(db.Float)
+
+    # Maior updated_at dos checkpoints vistos no ajuste
+    dados_ate = db.Column(db.DateTime)
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f'<EstimativaDuracao atividade:{self.id_atividade} n:{self.amostras}>'
+
+    def to_dict(self):
+        return {
+            'id_atividade': self.id_atividade,
+            **{coluna: getattr(self, coluna) for coluna in COLUNAS_PARAMETROS},
+            'dados_ate': self.dados_ate.isoformat() if self.dados_ate else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def prever(self, qtd_sku=None, qtd_pessoas=None):
+        """
+        Horas previstas (p10, p50, p90) para uma loja.
+
+        Com SKU e taxa ajustada, escala a taxa pelo tamanho da loja;
+        senão, usa os quantis de horas por checkpoint da atividade.
+        """
+        if qtd_sku and self.taxa_p50 is not None:
+            fator = qtd_sku / (qtd_pessoas or 1)
+            return self.taxa_p10 * fator, self.taxa_p50 * fator, self.taxa_p90 * fator
+        return self.horas_p10, self.horas_p50, self.horas_p90
@@ -29,22 +29,37 @@ class GrupoTrabalho(db.Model):
         self.nome_grupo = nome_grupo
         self.id_responsavel = id_responsavel
     
-    def to_dict(self):
+    def to_dict(self, total_lojas=None, total_pessoas=None, lojas_info=None):
+        """
+        Serializa o grupo.
+
+        Totais e lojas_info podem ser passados já calculados (ver
+        services/grupo_trabalho_service.py) para evitar carregar `self.lojas`.
+        """
+        if total_lojas is None or total_pessoas is None or lojas_info is None:
+            lojas = self.lojas
+            if total_lojas is None:
+                total_lojas = len(lojas)
+            if total_pessoas is None:
+                total_pessoas = self.calculate_total_pessoas()
+            if lojas_info is None:
+                lojas_info = [
+                    {
+                        'id': loja.id_loja,
+                        'nome': loja.nome_loja,
+                        'qtd_pessoas': loja.qtd_pessoas
+                    }
+                    for loja in lojas
+                ]
+
         return {
             'id_grupo_trabalho': self.id_grupo_trabalho,
             'nome_grupo': self.nome_grupo,
             'id_responsavel': self.id_responsavel,
             'responsavel_nome': self.responsavel.nome if self.responsavel else None,
-            'total_lojas': len(self.lojas),
-            'total_pessoas': self.calculate_total_pessoas(),  # Inclui o cálculo de total_pessoas
-            'lojas_info': [
-                {
-                    'id': loja.id_loja,
-                    'nome': loja.nome_loja,
-                    'qtd_pessoas': loja.qtd_pessoas
-                }
-                for loja in self.lojas
-            ],
+            'total_lojas': total_lojas,
+            'total_pessoas': total_pessoas,
+            'lojas_info': lojas_info,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
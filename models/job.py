@@ -0,0 +1,66 @@
+from database import db
+from datetime import datetime
+
+JOB_PENDENTE = 'Pendente'
+JOB_EM_ANDAMENTO = 'Em andamento'
+JOB_CONCLUIDO = 'Concluído'
+JOB_ERRO = 'Erro'
+
+
+class Job(db.Model):
+    """
+    Operação executada em segundo plano pela fila de jobs (ver jobs.py).
+
+    A própria tabela é a fila: workers reservam o job Pendente mais antigo
+    com um UPDATE condicional, então vários processos podem consumi-la.
+    Enquanto roda, o worker renova `updated_at`; um job Em andamento sem
+    renovação dentro do prazo é de um worker que morreu e volta a ser
+    reservado, até o limite de `tentativas`.
+    """
+    __tablename__ = 'job'
+    __table_args__ = (
+        db.Index('ix_job_status_id', 'status', 'id_job'),
+    )
+
+    id_job = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(50), nullable=False, default=JOB_PENDENTE)
+
+    parametros = db.Column(db.JSON)
+    resultado = db.Column(db.JSON)
+    erro = db.Column(db.Text)
+
+    # 0 a 100, atualizado pela tarefa durante a execução
+    progresso = db.Column(db.Integer, nullable=False, default=0)
+    mensagem = db.Column(db.String(255))
+
+    # Reservas feitas até agora (a primeira execução conta como 1)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    iniciado_em = db.Column(db.DateTime)
+    finalizado_em = db.Column(db.DateTime)
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id_job} {self.tipo} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id_job': self.id_job,
+            'tipo': self.tipo,
+            'status': self.status,
+            'parametros': self.parametros,
+            'resultado': self.resultado,
+            'erro': self.erro,
+            'progresso': self.progresso,
+            'mensagem': self.mensagem,
+            'tentativas': self.tentativas,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None
+        }
@@ -3,6 +3,11 @@ from datetime import datetime
 
 class Loja(db.Model):
     __tablename__ = 'loja'
+    __table_args__ = (
+        # Filtros divisão/grupo do dashboard
+        db.Index('ix_loja_divisao_grupo', 'id_divisao_bandeira', 'id_grupo_trabalho'),
+        db.Index('ix_loja_grupo', 'id_grupo_trabalho'),
+    )
 
     id_loja = db.Column(db.Integer, primary_key=True)
     nome_loja = db.Column(db.String(255), nullable=False)
@@ -0,0 +1,40 @@
+from database import db
+from sqlalchemy import and_, case, func, literal_column, or_
+
+
+def faixa_periodo(inicio, fim):
+    """
+    tsrange fechado [inicio, fim] do Postgres.
+
+    Fim nulo vira faixa aberta (ainda em execução); fim anterior ao início
+    (dado inconsistente) vira o instante do início em vez de erro. A mesma
+    expressão é usada nos índices GiST e nas consultas, para que o
+    planejador os reconheça.
+    """
+    return func.tsrange(
+        inicio,
+        case((fim < inicio, inicio), else_=fim),
+        literal_column("'[]'")
+    )
+
+
+def indice_periodo(nome, inicio, fim):
+    """Índice GiST sobre faixa_periodo (criado apenas no Postgres)."""
+    return db.Index(nome, faixa_periodo(inicio, fim), postgresql_using='gist').ddl_if(dialect='postgresql')
+
+
+def sobrepoe_janela(inicio, fim, de, ate, dialeto):
+    """
+    Condição "o período [inicio, fim] cruza a janela [de, ate]".
+
+    Pontas nulas são abertas. No Postgres usa `&&` sobre faixa_periodo
+    (índice GiST); nos demais bancos, comparações simples.
+    """
+    if dialeto == 'postgresql':
+        janela = func.tsrange(de, ate, literal_column("'[]'"))
+        return faixa_periodo(inicio, fim).op('&&', is_comparison=True)(janela)
+    # Fim anterior ao início conta como o início, como em faixa_periodo
+    return and_(
+        or_(inicio <= ate, inicio.is_(None)),
+        or_(fim >= de, inicio >= de, fim.is_(None)),
+    )
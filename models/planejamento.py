@@ -1,9 +1,22 @@
 from database import db
 from datetime import datetime
+from sqlalchemy import case, func, select
+from .periodo import indice_periodo
+
+# Contador mantido em Planejamento para cada status de checkpoint
+STATUS_CONTADORES = {
+    'Pendente': 'qtd_pendente',
+    'Em andamento': 'qtd_em_andamento',
+    'Concluído': 'qtd_concluido',
+}
 
 
 class Planejamento(db.Model):
     __tablename__ = 'planejamento'
+    __table_args__ = (
+        db.Index('ix_planejamento_grupo_data_ini', 'id_grupo_trabalho', 'data_ini'),
+        db.Index('ix_planejamento_atividade', 'id_atividade'),
+    )
 
     id_planejamento = db.Column(db.Integer, primary_key=True)
 
@@ -36,6 +49,12 @@ class Planejamento(db.Model):
         default='Pendente'
     )
 
+    # Contadores de checkpoints por status, mantidos de forma incremental
+    # pelos eventos de CheckpointAtividade (ver models/checkpoint_atividade.py)
+    qtd_pendente = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    qtd_em_andamento = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    qtd_concluido = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     # Relacionamentos
     atividade = db.relationship(
         'Atividade',
@@ -66,15 +85,92 @@ class Planejamento(db.Model):
             'data_fim': self.data_fim.isoformat() if self.data_fim else None,
             'id_grupo_trabalho': self.id_grupo_trabalho,
             'id_atividade': self.id_atividade,
+            'status': self.status,
+            'qtd_pendente': self.qtd_pendente,
+            'qtd_em_andamento': self.qtd_em_andamento,
+            'qtd_concluido': self.qtd_concluido,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
     def atualizar_status(self):
         """
-        Atualiza o status do planejamento com base nos checkpoints relacionados.
+        Atualiza o status do planejamento com base nos contadores de checkpoints.
+        """
+        self.status = status_por_contadores(self.qtd_concluido)
+
+    @classmethod
+    def aplicar_deltas(cls, connection, deltas):
+        """
+        Aplica variações nos contadores por status e recalcula o status.
+
+        `deltas` é um dict {id_planejamento: {status: variação}}. Executado na
+        mesma conexão/transação do flush que alterou os checkpoints.
+        """
+        tabela = cls.__table__
+        for id_planejamento, por_status in deltas.items():
+            valores = {}
+            for status, delta in por_status.items():
+                coluna = STATUS_CONTADORES.get(status)
+                if coluna and delta:
+                    valores[coluna] = tabela.c[coluna] + delta
+
+            if not valores or id_planejamento is None:
+                continue
+
+            valores['status'] = _status_expr(
+                valores.get('qtd_concluido', tabela.c.qtd_concluido)
+            )
+
+            connection.execute(
+                tabela.update()
+                .where(tabela.c.id_planejamento == id_planejamento)
+                .values(**valores)
+            )
+
+    @classmethod
+    def recalcular_contadores(cls, connection, ids=None):
+        """
+        Recalcula contadores e status a partir da tabela de checkpoints.
+
+        Usado para carga inicial e reparo; em operação normal os contadores
+        são mantidos por aplicar_deltas.
         """
-        if any(checkpoint.status == 'Concluído' for checkpoint in self.checkpoint_atividades):
-            self.status = 'Concluído'
-        else:
-            self.status = 'Pendente'
+        from .checkpoint_atividade import CheckpointAtividade
+
+        tabela = cls.__table__
+        checkpoints = CheckpointAtividade.__table__
+
+        def contagem(status):
+            return (
+                select(func.count())
+                .where(
+                    checkpoints.c.id_planejamento == tabela.c.id_planejamento,
+                    checkpoints.c.status == status
+                )
+                .scalar_subquery()
+            )
+
+        valores = {
+            coluna: contagem(status)
+            for status, coluna in STATUS_CONTADORES.items()
+        }
+        valores['status'] = _status_expr(valores['qtd_concluido'])
+
+        stmt = tabela.update().values(**valores)
+        if ids is not None:
+            stmt = stmt.where(tabela.c.id_planejamento.in_(list(ids)))
+
+        return connection.execute(stmt).rowcount
+
+
+# Timeline por janela de datas (services/timeline_service.py)
+indice_periodo('ix_planejamento_periodo', Planejamento.data_ini, Planejamento.data_fim)
+
+
+def status_por_contadores(qtd_concluido):
+    return 'Concluído' if qtd_concluido else 'Pendente'
+
+
+def _status_expr(qtd_concluido):
+    return case((qtd_concluido > 0, 'Concluído'), else_='Pendente')
@@ -17,12 +17,16 @@ class Responsavel(db.Model):
         self.nome = nome
         self.contato = contato
     
-    def to_dict(self):
+    def to_dict(self, grupos_trabalho=None):
+        """`grupos_trabalho` (lista de ids) pode vir pré-calculado para evitar o lazy load."""
+        if grupos_trabalho is None:
+            grupos_trabalho = [grupo.id_grupo_trabalho for grupo in self.grupos_trabalho]
+
         return {
             'id_responsavel': self.id_responsavel,
             'nome': self.nome,
             'contato': self.contato,
-            'grupos_trabalho': [grupo.id_grupo_trabalho for grupo in self.grupos_trabalho],
+            'grupos_trabalho': grupos_trabalho,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -0,0 +1,393 @@
+from database import db
+from datetime import datetime
+from collections import defaultdict
+from sqlalchemy import case, event, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from .loja import Loja
+from .checkpoint_atividade import CheckpointAtividade
+from .planejamento import STATUS_CONTADORES
+
+ESCOPO_GRUPO = 'grupo'
+ESCOPO_DIVISAO = 'divisao'
+
+# Coluna da loja que identifica cada escopo
+COLUNA_ESCOPO = {
+    ESCOPO_GRUPO: 'id_grupo_trabalho',
+    ESCOPO_DIVISAO: 'id_divisao_bandeira',
+}
+
+COLUNAS_TOTAIS = [
+    'total_lojas',
+    'total_pessoas',
+    'total_sku',
+    'qtd_pendente',
+    'qtd_em_andamento',
+    'qtd_concluido',
+]
+
+
+class Rollup(db.Model):
+    """
+    Totais materializados por grupo de trabalho e por divisão/bandeira.
+
+    Mantidos de forma incremental pelos eventos de Loja e CheckpointAtividade
+    e reconstruídos por completo com `flask recalcular-rollups`.
+    """
+    __tablename__ = 'rollup'
+    __table_args__ = (
+        db.UniqueConstraint('escopo', 'id_referencia', name='uq_rollup_escopo_referencia'),
+    )
+
+    id_rollup = db.Column(db.Integer, primary_key=True)
+
+    # 'grupo' (id_grupo_trabalho) ou 'divisao' (id_bandeira_divisao)
+    escopo = db.Column(db.String(20), nullable=False)
+    id_referencia = db.Column(db.Integer, nullable=False)
+
+    total_lojas = db.Column(db.Integer, nullable=False, default=0)
+    total_pessoas = db.Column(db.Integer, nullable=False, default=0)
+    total_sku = db.Column(db.Integer, nullable=False, default=0)
+
+    # Checkpoints das lojas do escopo por status
+    qtd_pendente = db.Column(db.Integer, nullable=False, default=0)
+    qtd_em_andamento = db.Column(db.Integer, nullable=False, default=0)
+    qtd_concluido = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f'<Rollup {self.escopo}:{self.id_referencia}>'
+
+    def to_dict(self):
+        return {
+            'escopo': self.escopo,
+            'id_referencia': self.id_referencia,
+            **{coluna: getattr(self, coluna) for coluna in COLUNAS_TOTAIS},
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    @classmethod
+    def obter(cls, escopo, id_referencia):
+        return cls.query.filter_by(escopo=escopo, id_referencia=id_referencia).first()
+
+    @classmethod
+    def aplicar_deltas(cls, connection, deltas):
+        """
+        Aplica variações nos totais.
+
+        `deltas` é um dict {(escopo, id_referencia): {coluna: variação}}.
+        Cria a linha do escopo quando ainda não existe, com upsert (ON
+        CONFLICT) no PostgreSQL e no SQLite, para que duas transações que
+        criam o mesmo escopo ao mesmo tempo não falhem na constraint única.
+        """
+        tabela = cls.__table__
+        agora = datetime.utcnow()
+        insert_upsert = _INSERT_UPSERT.get(connection.dialect.name)
+
+        for (escopo, id_referencia), por_coluna in deltas.items():
+            por_coluna = {k: v for k, v in por_coluna.items() if v}
+            if id_referencia is None or not por_coluna:
+                continue
+
+            incrementos = {k: tabela.c[k] + v for k, v in por_coluna.items()}
+            valores = {coluna: 0 for coluna in COLUNAS_TOTAIS}
+            valores.update(por_coluna)
+            insert_valores = dict(escopo=escopo, id_referencia=id_referencia, updated_at=agora, **valores)
+
+            if insert_upsert is not None:
+                connection.execute(
+                    insert_upsert(tabela)
+                    .values(**insert_valores)
+                    .on_conflict_do_update(
+                        index_elements=['escopo', 'id_referencia'],
+                        set_=dict(updated_at=agora, **incrementos)
+                    )
+                )
+                continue
+
+            update = (
+                tabela.update()
+                .where(
+                    tabela.c.escopo == escopo,
+                    tabela.c.id_referencia == id_referencia
+                )
+                .values(updated_at=agora, **incrementos)
+            )
+            if connection.execute(update).rowcount:
+                continue
+            try:
+                # Savepoint: se outra transação criou a linha antes, só o
+                # INSERT é desfeito e o UPDATE é repetido
+                with connection.begin_nested():
+                    connection.execute(tabela.insert().values(**insert_valores))
+            except IntegrityError:
+                connection.execute(update)
+
+    @classmethod
+    def recalcular(cls, connection, escopos=None):
+        """
+        Reconstrói os totais a partir de loja e checkpoint_atividade.
+
+        `escopos` limita o recálculo: {escopo: conjunto de ids}. Sem
+        argumento, reconstrói todos os escopos. Retorna o número de linhas.
+        """
+        tabela = cls.__table__
+        lojas = Loja.__table__
+        checkpoints = CheckpointAtividade.__table__
+        agora = datetime.utcnow()
+        total = 0
+
+        if escopos is None:
+            escopos = {escopo: None for escopo in COLUNA_ESCOPO}
+
+        for escopo, ids in escopos.items():
+            if ids is not None:
+                ids = [i for i in ids if i is not None]
+                if not ids:
+                    continue
+
+            chave = lojas.c[COLUNA_ESCOPO[escopo]]
+
+            query_lojas = (
+                select(
+                    chave.label('id_referencia'),
+                    func.count(lojas.c.id_loja).label('total_lojas'),
+                    func.coalesce(func.sum(lojas.c.qtd_pessoas), 0).label('total_pessoas'),
+                    func.coalesce(func.sum(lojas.c.qtd_sku), 0).label('total_sku'),
+                )
+                .where(chave.isnot(None))
+                .group_by(chave)
+            )
+            query_checkpoints = (
+                select(
+                    chave.label('id_referencia'),
+                    *[
+                        func.coalesce(func.sum(case((checkpoints.c.status == status, 1), else_=0)), 0).label(coluna)
+                        for status, coluna in STATUS_CONTADORES.items()
+                    ]
+                )
+                .select_from(checkpoints.join(lojas, lojas.c.id_loja == checkpoints.c.id_loja))
+                .where(chave.isnot(None))
+                .group_by(chave)
+            )
+
+            delete = tabela.delete().where(tabela.c.escopo == escopo)
+            if ids is not None:
+                query_lojas = query_lojas.where(chave.in_(ids))
+                query_checkpoints = query_checkpoints.where(chave.in_(ids))
+                delete = delete.where(tabela.c.id_referencia.in_(ids))
+
+            linhas = defaultdict(lambda: {coluna: 0 for coluna in COLUNAS_TOTAIS})
+            for query in (query_lojas, query_checkpoints):
+                for row in connection.execute(query):
+                    valores = row._asdict()
+                    linhas[valores.pop('id_referencia')].update(valores)
+
+            connection.execute(delete)
+            if linhas:
+                connection.execute(
+                    tabela.insert(),
+                    [
+                        dict(valores, escopo=escopo, id_referencia=id_referencia, updated_at=agora)
+                        for id_referencia, valores in linhas.items()
+                    ]
+                )
+            total += len(linhas)
+
+        return total
+
+
+# Dialetos com INSERT ... ON CONFLICT DO UPDATE
+_INSERT_UPSERT = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def escopos_da_loja(id_grupo_trabalho, id_divisao_bandeira):
+    return [
+        (ESCOPO_GRUPO, id_grupo_trabalho),
+        (ESCOPO_DIVISAO, id_divisao_bandeira),
+    ]
+
+
+def _somar(deltas, escopos, valores, sinal=1):
+    for chave in escopos:
+        por_coluna = deltas.setdefault(chave, {})
+        for coluna, valor in valores.items():
+            por_coluna[coluna] = por_coluna.get(coluna, 0) + sinal * (valor or 0)
+
+
+def _contribuicao_loja(qtd_pessoas, qtd_sku):
+    return {'total_lojas': 1, 'total_pessoas': qtd_pessoas, 'total_sku': qtd_sku}
+
+
+def _escopos_por_loja(connection, id_loja):
+    row = connection.execute(
+        select(Loja.id_grupo_trabalho, Loja.id_divisao_bandeira)
+        .where(Loja.id_loja == id_loja)
+    ).first()
+    return escopos_da_loja(*row) if row else []
+
+
+def _historico_ativo(*atributos):
+    """
+    Carrega o valor anterior dos atributos ao alterar um objeto expirado,
+    para que os eventos after_update sempre tenham o histórico e apliquem
+    deltas em vez de recálculos.
+    """
+    for atributo in atributos:
+        event.listen(atributo, 'set', lambda *args: None, active_history=True)
+
+
+# =====================================================
+# Eventos de Loja
+# =====================================================
+
+_historico_ativo(Loja.id_grupo_trabalho, Loja.id_divisao_bandeira, Loja.qtd_pessoas, Loja.qtd_sku)
+
+
+@event.listens_for(Loja, 'after_insert')
+def _loja_inserida(mapper, connection, target):
+    deltas = {}
+    _somar(
+        deltas,
+        escopos_da_loja(target.id_grupo_trabalho, target.id_divisao_bandeira),
+        _contribuicao_loja(target.qtd_pessoas, target.qtd_sku)
+    )
+    Rollup.aplicar_deltas(connection, deltas)
+
+
+@event.listens_for(Loja, 'after_update')
+def _loja_atualizada(mapper, connection, target):
+    estado = db.inspect(target)
+    anteriores = {}
+    desconhecidos = set()
+    mudou = False
+    for atributo in ('id_grupo_trabalho', 'id_divisao_bandeira', 'qtd_pessoas', 'qtd_sku'):
+        historico = estado.attrs[atributo].history
+        if not historico.has_changes():
+            anteriores[atributo] = getattr(target, atributo)
+            continue
+        mudou = True
+        if historico.deleted:
+            anteriores[atributo] = historico.deleted[0]
+        else:
+            desconhecidos.add(atributo)
+
+    if not mudou:
+        return
+
+    if desconhecidos:
+        # Valor anterior não carregado: recalcula os escopos envolvidos
+        # (todos do tipo quando a loja mudou de grupo/divisão sem histórico)
+        escopos = {}
+        for escopo, atributo in COLUNA_ESCOPO.items():
+            if atributo in desconhecidos:
+                escopos[escopo] = None
+            else:
+                escopos[escopo] = {anteriores[atributo], getattr(target, atributo)}
+        Rollup.recalcular(connection, escopos)
+        return
+
+    escopos_anteriores = escopos_da_loja(
+        anteriores['id_grupo_trabalho'], anteriores['id_divisao_bandeira']
+    )
+    escopos_novos = escopos_da_loja(target.id_grupo_trabalho, target.id_divisao_bandeira)
+
+    deltas = {}
+    _somar(deltas, escopos_anteriores,
+           _contribuicao_loja(anteriores['qtd_pessoas'], anteriores['qtd_sku']), -1)
+    _somar(deltas, escopos_novos,
+           _contribuicao_loja(target.qtd_pessoas, target.qtd_sku))
+
+    # Mudança de grupo/divisão leva junto os checkpoints da loja
+    if escopos_anteriores != escopos_novos:
+        checkpoints = CheckpointAtividade.__table__
+        por_status = {
+            STATUS_CONTADORES[status]: total
+            for status, total in connection.execute(
+                select(checkpoints.c.status, func.count())
+                .where(checkpoints.c.id_loja == target.id_loja)
+                .group_by(checkpoints.c.status)
+            )
+            if status in STATUS_CONTADORES
+        }
+        _somar(deltas, escopos_anteriores, por_status, -1)
+        _somar(deltas, escopos_novos, por_status)
+
+    Rollup.aplicar_deltas(connection, deltas)
+
+
+@event.listens_for(Loja, 'after_delete')
+def _loja_removida(mapper, connection, target):
+    deltas = {}
+    _somar(
+        deltas,
+        escopos_da_loja(target.id_grupo_trabalho, target.id_divisao_bandeira),
+        _contribuicao_loja(target.qtd_pessoas, target.qtd_sku),
+        -1
+    )
+    Rollup.aplicar_deltas(connection, deltas)
+
+
+# =====================================================
+# Eventos de CheckpointAtividade
+# =====================================================
+
+_historico_ativo(CheckpointAtividade.status, CheckpointAtividade.id_loja)
+
+
+def _delta_checkpoint(connection, id_loja, status, sinal):
+    coluna = STATUS_CONTADORES.get(status)
+    if not coluna:
+        return
+    deltas = {}
+    _somar(deltas, _escopos_por_loja(connection, id_loja), {coluna: 1}, sinal)
+    Rollup.aplicar_deltas(connection, deltas)
+
+
+@event.listens_for(CheckpointAtividade, 'after_insert')
+def _checkpoint_inserido(mapper, connection, target):
+    _delta_checkpoint(connection, target.id_loja, target.status, 1)
+
+
+@event.listens_for(CheckpointAtividade, 'after_update')
+def _checkpoint_atualizado(mapper, connection, target):
+    estado = db.inspect(target)
+    hist_status = estado.attrs.status.history
+    hist_loja = estado.attrs.id_loja.history
+
+    if not hist_status.has_changes() and not hist_loja.has_changes():
+        return
+
+    if (hist_status.has_changes() and not hist_status.deleted) or \
+            (hist_loja.has_changes() and not hist_loja.deleted):
+        # Valor anterior não carregado (caso raro com o histórico ativo):
+        # recalcula só os escopos das lojas envolvidas
+        lojas = {target.id_loja, *hist_loja.deleted}
+        escopos = {escopo: set() for escopo in COLUNA_ESCOPO}
+        for row in connection.execute(
+            select(Loja.id_grupo_trabalho, Loja.id_divisao_bandeira)
+            .where(Loja.id_loja.in_(lojas))
+        ):
+            for escopo, id_referencia in escopos_da_loja(*row):
+                escopos[escopo].add(id_referencia)
+        Rollup.recalcular(connection, escopos)
+        return
+
+    status_anterior = hist_status.deleted[0] if hist_status.deleted else target.status
+    loja_anterior = hist_loja.deleted[0] if hist_loja.deleted else target.id_loja
+
+    _delta_checkpoint(connection, loja_anterior, status_anterior, -1)
+    _delta_checkpoint(connection, target.id_loja, target.status, 1)
+
+
+@event.listens_for(CheckpointAtividade, 'after_delete')
+def _checkpoint_removido(mapper, connection, target):
+    _delta_checkpoint(connection, target.id_loja, target.status, -1)
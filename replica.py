@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+logger = logging.getLogger('ativarub.replica')
+
+BIND_REPLICA = 'replica'
+
+
+def somente_leitura(view):
+    """
+    Marca a rota como somente leitura: suas consultas vão para a réplica
+    (quando configurada e dentro da tolerância de atraso).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.somente_leitura = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class SessaoRoteada(Session):
+    """
+    Sessão que envia leituras de rotas `@somente_leitura` para a réplica.
+
+    Escritas, flush e sessões com alterações pendentes sempre usam o
+    primário, assim como qualquer uso fora de requisição (CLI, jobs).
+
+    Se a réplica falhar na execução (OperationalError ou desconexão), ela é
+    marcada como indisponível e o comando é repetido no primário, na mesma
+    requisição.
+    """
+
+    _comando_na_replica = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._pode_usar_replica(clause):
+            engine = roteador.engine_replica()
+            if engine is not None:
+                g.usou_replica = True
+                self._comando_na_replica = True
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def execute(self, statement, *args, **kwargs):
+        self._comando_na_replica = False
+        try:
+            return super().execute(statement, *args, **kwargs)
+        except DBAPIError as erro:
+            if not self._comando_na_replica or not (
+                isinstance(erro, OperationalError) or erro.connection_invalidated
+            ):
+                raise
+            logger.warning('Falha na réplica (%s); repetindo no primário', erro.orig)
+            roteador.marcar_indisponivel()
+            # Descarta a conexão da réplica presa à transação da sessão;
+            # a rota é somente leitura, não há alterações a perder
+            self.rollback()
+            self._comando_na_replica = False
+            g.usou_replica = False
+            return super().execute(statement, *args, **kwargs)
+
+    def _pode_usar_replica(self, clause):
+        if not has_request_context() or not g.get('somente_leitura'):
+            return False
+        if self._flushing or self.new or self.dirty or self.deleted:
+            return False
+        if clause is not None and getattr(clause, 'is_dml', False):
+            return False
+        return True
+
+
+class RoteadorReplica:
+    """
+    Estado da réplica de leitura.
+
+    Configuração:
+
+    DATABASE_REPLICA_URL        URL da réplica (sem ela, tudo vai ao primário)
+    REPLICA_MAX_LAG_S           atraso máximo aceito, em segundos (padrão 30)
+    REPLICA_CHECK_INTERVAL_S    intervalo entre verificações (padrão 10)
+
+    A réplica é verificada no máximo a cada REPLICA_CHECK_INTERVAL_S; se
+    estiver fora do ar ou atrasada demais, as leituras voltam ao primário
+    até a próxima verificação bem-sucedida.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._disponivel = False
+        self._verificado_em = None
+        self.atraso_s = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['replica'] = self
+        self.app = app
+        self.max_atraso = app.config.get('REPLICA_MAX_LAG_S', 30)
+        self.intervalo = app.config.get('REPLICA_CHECK_INTERVAL_S', 10)
+        self.configurada = BIND_REPLICA in (app.config.get('SQLALCHEMY_BINDS') or {})
+
+        if not self.configurada:
+            return
+
+        @app.after_request
+        def _marcar_resposta(response):
+            if g.get('usou_replica'):
+                response.headers['X-Database-Route'] = 'replica'
+            return response
+
+        from database import db
+        with app.app_context():
+            engine = db.engines[BIND_REPLICA]
+
+        # Conexão perdida com a réplica: volta ao primário imediatamente
+        # (o comando que falhou é repetido por SessaoRoteada.execute)
+        @event.listens_for(engine, 'handle_error')
+        def _erro_replica(contexto):
+            if contexto.is_disconnect:
+                logger.warning('Réplica desconectada; usando o primário')
+                self.marcar_indisponivel()
+
+    def engine_replica(self):
+        """Engine da réplica, ou None se não configurada/indisponível."""
+        if not self.configurada:
+            return None
+
+        agora = time.monotonic()
+        if self._verificado_em is None or agora - self._verificado_em >= self.intervalo:
+            with self._lock:
+                if self._verificado_em is None or agora - self._verificado_em >= self.intervalo:
+                    self._verificar()
+
+        if not self._disponivel:
+            return None
+
+        from database import db
+        return db.engines[BIND_REPLICA]
+
+    def _verificar(self):
+        from database import db
+        engine = db.engines[BIND_REPLICA]
+        try:
+            with engine.connect() as conexao:
+                if engine.dialect.name == 'postgresql':
+                    # Sem WAL pendente não há atraso, mesmo sem escritas
+                    # recentes; num servidor que não é réplica tudo é NULL (0)
+                    self.atraso_s = conexao.execute(text(
+                        'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+                        'THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM '
+                        'now() - pg_last_xact_replay_timestamp()), 0) END'
+                    )).scalar()
+                else:
+                    conexao.execute(text('SELECT 1'))
+                    self.atraso_s = 0
+        except Exception as e:
+            logger.warning('Réplica indisponível (%s); usando o primário', e)
+            self._marcar(False)
+            return
+
+        disponivel = float(self.atraso_s) <= self.max_atraso
+        if not disponivel:
+            logger.warning(
+                'Réplica atrasada %.1fs (máximo %ss); usando o primário',
+                self.atraso_s, self.max_atraso
+            )
+        self._marcar(disponivel)
+
+    def marcar_indisponivel(self):
+        """Volta as leituras ao primário até a próxima verificação."""
+        self._marcar(False)
+
+    def _marcar(self, disponivel):
+        self._disponivel = disponivel
+        self._verificado_em = time.monotonic()
+
+
+roteador = RoteadorReplica()
@@ -0,0 +1 @@
+# Serviços de consulta e regras de negócio compartilhados pelos controllers
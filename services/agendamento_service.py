@@ -0,0 +1,328 @@
+from database import db
+from models import Atividade, CheckpointAtividade, Loja, Planejamento
+from services import checkpoint_service, conflito_service, estimativa_service
+from services.analise_service import duracao_segundos
+from sqlalchemy import case, func, select
+from datetime import datetime, timedelta
+import heapq
+import time
+
+# Segunda a sexta (datetime.weekday)
+DIAS_UTEIS = (0, 1, 2, 3, 4)
+
+# Nenhuma loja é agendada com menos que isso
+DURACAO_MINIMA_H = 0.25
+
+
+class Jornada:
+    """
+    Converte horas de trabalho contadas a partir de `inicio` em datas.
+
+    Cada dia útil tem `horas_por_dia` de trabalho começando no horário de
+    `inicio`; um `inicio` fora dos dias úteis passa para o próximo.
+    """
+
+    def __init__(self, inicio, horas_por_dia=8, dias_uteis=DIAS_UTEIS):
+        if not 0 < horas_por_dia <= 24:
+            raise ValueError('horas_por_dia deve estar entre 0 e 24')
+        self.dias_uteis = sorted(set(dias_uteis))
+        if not self.dias_uteis or not set(self.dias_uteis) <= set(range(7)):
+            raise ValueError('dias_uteis deve conter dias da semana de 0 (segunda) a 6')
+
+        self.horas_por_dia = horas_por_dia
+        self.horario = inicio.time()
+
+        dia = inicio.date()
+        while dia.weekday() not in self.dias_uteis:
+            dia += timedelta(days=1)
+        self._semana = dia - timedelta(days=dia.weekday())
+        self._posicao = self.dias_uteis.index(dia.weekday())
+
+    def data(self, horas, fim=False):
+        """Data após `horas` de trabalho; com `fim`, a hora final de um dia cheio fica nesse dia."""
+        dias, resto = divmod(horas, self.horas_por_dia)
+        if fim and resto == 0 and dias:
+            dias, resto = dias - 1, self.horas_por_dia
+
+        semanas, posicao = divmod(self._posicao + int(dias), len(self.dias_uteis))
+        dia = self._semana + timedelta(days=7 * semanas + self.dias_uteis[posicao])
+        return datetime.combine(dia, self.horario) + timedelta(minutes=round(resto * 60))
+
+
+def estimar_horas(id_atividade, lojas, horas_padrao=None):
+    """
+    Horas estimadas de execução da atividade em cada loja, {id_loja: horas}.
+
+    Usa a mediana prevista pela estimativa ajustada da atividade
+    (estimativa_service), quando existe. Senão, o histórico de checkpoints
+    concluídos é resumido no banco em uma taxa de horas por SKU por
+    pessoa; cada loja recebe taxa * qtd_sku / qtd_pessoas. Lojas sem SKU
+    usam a média de horas por loja e, sem histórico nenhum, `horas_padrao`.
+    """
+    previsao = estimativa_service.prever(id_atividade, lojas)
+    if previsao is not None:
+        return {
+            id_loja: max(horas, DURACAO_MINIMA_H)
+            for id_loja, horas in zip(previsao['id_loja'], previsao['p50'])
+        }
+
+    horas = duracao_segundos(CheckpointAtividade.data_fim, CheckpointAtividade.data_ini) / 3600.0
+    pessoas = func.coalesce(func.nullif(Loja.qtd_pessoas, 0), 1)
+
+    taxa, media = db.session.execute(
+        select(
+            func.avg(case((Loja.qtd_sku > 0, horas * pessoas / Loja.qtd_sku))),
+            func.avg(horas),
+        )
+        .select_from(CheckpointAtividade)
+        .join(Loja, Loja.id_loja == CheckpointAtividade.id_loja)
+        .where(
+            CheckpointAtividade.id_atividade == id_atividade,
+            CheckpointAtividade.status == 'Concluído',
+            CheckpointAtividade.data_fim >= CheckpointAtividade.data_ini,
+        )
+    ).one()
+
+    media = float(media) if media is not None else horas_padrao
+    if media is None:
+        raise ValueError('Atividade sem histórico de execução; informe horas_padrao')
+
+    estimativas = {}
+    for loja in lojas:
+        if taxa is not None and loja.qtd_sku:
+            valor = float(taxa) * loja.qtd_sku / (loja.qtd_pessoas or 1)
+        else:
+            valor = media
+        estimativas[loja.id_loja] = max(valor, DURACAO_MINIMA_H)
+    return estimativas
+
+
+def agendar(
+    id_atividade,
+    inicio,
+    lojas=None,
+    id_grupo_trabalho=None,
+    id_divisao_bandeira=None,
+    capacidade=None,
+    equipes_padrao=1,
+    horas_por_dia=8,
+    dias_uteis=DIAS_UTEIS,
+    horas_padrao=None,
+    titulo=None,
+    criar=True,
+    permitir_conflitos=False
+):
+    """
+    Calendário de rollout de uma atividade nas lojas selecionadas.
+
+    As lojas vêm de uma lista de ids, de um grupo ou de uma divisão, e
+    cada uma é executada pelo seu grupo de trabalho. `capacidade` é um dict
+    {id_grupo_trabalho: equipes simultâneas} (`equipes_padrao` para os
+    demais). Cada grupo começa em `inicio` ou, se estiver ocupado nessa
+    data, no dia seguinte ao fim dos planejamentos que o ocupam; se o
+    calendário do grupo alcançar um planejamento posterior, recomeça depois
+    dele, na primeira folga em que cabe inteiro.
+
+    Atribuição gulosa: lojas da maior para a menor duração estimada, cada
+    uma para a equipe do grupo que fica livre primeiro (heap por grupo).
+
+    Com `criar`, grava um Planejamento por grupo e um CheckpointAtividade
+    pendente por loja (INSERT em lote), sem commit; o fim estimado de cada
+    loja vai em data_fim_prevista, e data_fim fica para a execução real.
+    Checkpoints que conflitariam com os existentes nas lojas levantam
+    ConflitoAgenda, salvo com `permitir_conflitos`. Retorna o calendário e o resumo por grupo.
+    """
+    cronometro = time.perf_counter()
+    capacidade = {int(grupo): int(equipes) for grupo, equipes in (capacidade or {}).items()}
+    if equipes_padrao < 1 or any(equipes < 1 for equipes in capacidade.values()):
+        raise ValueError('A capacidade de cada grupo deve ser de pelo menos 1 equipe')
+    if lojas is None and not id_grupo_trabalho and not id_divisao_bandeira:
+        raise ValueError('Informe lojas, id_grupo_trabalho ou id_divisao_bandeira')
+
+    atividade = db.session.get(Atividade, id_atividade)
+    if atividade is None:
+        raise ValueError('Atividade não encontrada')
+
+    query = select(
+        Loja.id_loja, Loja.nome_loja, Loja.qtd_sku, Loja.qtd_pessoas,
+        Loja.id_grupo_trabalho, Loja.id_divisao_bandeira,
+    ).where(Loja.id_grupo_trabalho.isnot(None))
+    if lojas is not None:
+        query = query.where(Loja.id_loja.in_([int(id_loja) for id_loja in lojas]))
+    if id_grupo_trabalho:
+        query = query.where(Loja.id_grupo_trabalho == id_grupo_trabalho)
+    if id_divisao_bandeira:
+        query = query.where(Loja.id_divisao_bandeira == id_divisao_bandeira)
+
+    selecionadas = db.session.execute(query.order_by(Loja.id_loja)).all()
+    if not selecionadas:
+        raise ValueError('Nenhuma loja com grupo de trabalho encontrada para a seleção informada')
+
+    horas = estimar_horas(id_atividade, selecionadas, horas_padrao)
+
+    por_grupo = {}
+    for loja in selecionadas:
+        por_grupo.setdefault(loja.id_grupo_trabalho, []).append(loja)
+    ocupacao = _ocupacao(list(por_grupo), inicio)
+
+    calendario = []
+    grupos = []
+    for id_grupo, lojas_grupo in sorted(por_grupo.items()):
+        lojas_grupo.sort(key=lambda loja: (-horas[loja.id_loja], loja.id_loja))
+        equipes = capacidade.get(id_grupo, equipes_padrao)
+        ocupados = ocupacao.get(id_grupo, [])
+
+        inicio_grupo = inicio
+        while True:
+            livre = _livre_a_partir(ocupados, inicio_grupo, inicio.time())
+            if livre != inicio_grupo:
+                inicio_grupo = livre
+                continue
+            jornada = Jornada(inicio_grupo, horas_por_dia, dias_uteis)
+            itens = _distribuir(lojas_grupo, horas, jornada, equipes, id_grupo)
+            fim_grupo = max(item['data_fim'] for item in itens)
+            # Calendário alcança um planejamento posterior: tenta depois dele
+            seguinte = next((ini for ini, _ in ocupados if inicio_grupo < ini < fim_grupo), None)
+            if seguinte is None:
+                break
+            inicio_grupo = seguinte
+
+        itens.sort(key=lambda item: (item['data_ini'], item['equipe']))
+        calendario.extend(itens)
+        grupos.append({
+            'id_grupo_trabalho': id_grupo,
+            'equipes': equipes,
+            'total_lojas': len(itens),
+            'horas_estimadas': round(sum(item['horas_estimadas'] for item in itens), 2),
+            'data_ini': min(item['data_ini'] for item in itens),
+            'data_fim': max(item['data_fim'] for item in itens),
+        })
+
+    if criar:
+        _gravar(atividade, titulo or f'Rollout {atividade.titulo}', grupos, calendario, permitir_conflitos)
+
+    for item in calendario + grupos:
+        item['data_ini'] = item['data_ini'].isoformat()
+        item['data_fim'] = item['data_fim'].isoformat()
+
+    return {
+        'id_atividade': id_atividade,
+        'criado': criar,
+        'total_lojas': len(calendario),
+        'grupos': grupos,
+        'calendario': calendario,
+        'tempo_ms': round((time.perf_counter() - cronometro) * 1000, 2),
+    }
+
+
+def _distribuir(lojas, horas, jornada, quantidade, id_grupo):
+    """Itens do calendário do grupo, cada loja na equipe que fica livre primeiro."""
+    equipes = [(0.0, equipe) for equipe in range(quantidade)]
+    itens = []
+    for loja in lojas:
+        livre_em, equipe = heapq.heappop(equipes)
+        termino = livre_em + horas[loja.id_loja]
+        heapq.heappush(equipes, (termino, equipe))
+        itens.append({
+            'id_loja': loja.id_loja,
+            'nome_loja': loja.nome_loja,
+            'id_grupo_trabalho': id_grupo,
+            'id_divisao_bandeira': loja.id_divisao_bandeira,
+            'equipe': equipe,
+            'horas_estimadas': round(horas[loja.id_loja], 2),
+            'data_ini': jornada.data(livre_em),
+            'data_fim': jornada.data(termino, fim=True),
+        })
+    return itens
+
+
+def _ocupacao(grupos, inicio):
+    """{id_grupo: [(data_ini, data_fim)] dos planejamentos que terminam depois de `inicio`}, por início."""
+    ocupacao = {}
+    for id_grupo, data_ini, data_fim in db.session.execute(
+        select(Planejamento.id_grupo_trabalho, Planejamento.data_ini, Planejamento.data_fim)
+        .where(
+            Planejamento.id_grupo_trabalho.in_(grupos),
+            Planejamento.data_ini.isnot(None),
+            Planejamento.data_fim > inicio,
+        )
+        .order_by(Planejamento.id_grupo_trabalho, Planejamento.data_ini)
+    ):
+        ocupacao.setdefault(id_grupo, []).append((data_ini, max(data_fim, data_ini)))
+    return ocupacao
+
+
+def _livre_a_partir(ocupados, data, horario):
+    """
+    `data`, se nenhum período de `ocupados` a cobre; senão o dia seguinte
+    (no `horario`) ao fim da sequência de períodos sobrepostos a ela.
+    """
+    fim = None
+    for ini, fim_ocupado in ocupados:
+        if fim is None:
+            if ini > data:
+                break
+            if fim_ocupado > data or ini == data:
+                fim = fim_ocupado
+        elif ini <= fim:
+            fim = max(fim, fim_ocupado)
+        else:
+            break
+    if fim is None:
+        return data
+    return datetime.combine(fim.date() + timedelta(days=1), horario)
+
+
+def _gravar(atividade, titulo, grupos, calendario, permitir_conflitos):
+    if not permitir_conflitos:
+        for grupo in grupos:
+            conflito_service.PLANEJAMENTO.verificar(
+                grupo['id_grupo_trabalho'], grupo['data_ini'], grupo['data_fim']
+            )
+
+        conflitos = conflito_service.CHECKPOINT.conflitos_por_agrupador({
+            item['id_loja']: (item['data_ini'], item['data_fim']) for item in calendario
+        })
+        if conflitos:
+            raise conflito_service.ConflitoAgenda(
+                f'O calendário conflita com checkpoint(s) existente(s) em {len({c["agrupador"] for c in conflitos})} loja(s)',
+                conflitos
+            )
+
+    planejamentos = {}
+    for grupo in grupos:
+        planejamento = Planejamento(
+            titulo=titulo,
+            id_atividade=atividade.id_atividade,
+            id_grupo_trabalho=grupo['id_grupo_trabalho'],
+            data_ini=grupo['data_ini'],
+            data_fim=grupo['data_fim'],
+        )
+        db.session.add(planejamento)
+        planejamentos[grupo['id_grupo_trabalho']] = planejamento
+    db.session.flush()
+
+    for grupo in grupos:
+        grupo['id_planejamento'] = planejamentos[grupo['id_grupo_trabalho']].id_planejamento
+
+    agora = datetime.utcnow()
+    linhas = [
+        {
+            'nome_checkpoint': atividade.titulo,
+            'id_atividade': atividade.id_atividade,
+            'id_loja': item['id_loja'],
+            'id_planejamento': planejamentos[item['id_grupo_trabalho']].id_planejamento,
+            'status': 'Pendente',
+            'data_ini': item['data_ini'],
+            'data_fim': None,
+            'data_fim_prevista': item['data_fim'],
+            'observacao': None,
+            'created_at': agora,
+            'updated_at': agora,
+        }
+        for item in calendario
+    ]
+    checkpoint_service.inserir_em_lote(linhas, {
+        item['id_loja']: (item['id_grupo_trabalho'], item['id_divisao_bandeira'])
+        for item in calendario
+    })
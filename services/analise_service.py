@@ -0,0 +1,217 @@
+from database import db
+from models import CheckpointAtividade, Planejamento, Loja, GrupoTrabalho
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Float, DateTime, Interval
+
+# Dimensões disponíveis: coluna de id e de nome de cada uma
+DIMENSOES = {
+    'grupo': (GrupoTrabalho.id_grupo_trabalho, GrupoTrabalho.nome_grupo),
+    'loja': (Loja.id_loja, Loja.nome_loja),
+    'planejamento': (Planejamento.id_planejamento, Planejamento.titulo),
+}
+
+PERIODOS = ('dia', 'semana')
+
+# Percentis do tempo executado, em pontos percentuais
+PERCENTIS = {
+    'executado_p50_s': 50,
+    'executado_p90_s': 90,
+}
+
+
+# =====================================================
+# Expressões de data dependentes do banco
+# =====================================================
+
+class duracao_segundos(FunctionElement):
+    """Diferença fim - inicio em segundos (NULL se alguma ponta for NULL)."""
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(duracao_segundos)
+def _duracao_padrao(element, compiler, **kw):
+    fim, inicio = list(element.clauses)
+    return 'EXTRACT(EPOCH FROM (%s - %s))' % (
+        compiler.process(fim, **kw), compiler.process(inicio, **kw)
+    )
+
+
+@compiles(duracao_segundos, 'sqlite')
+def _duracao_sqlite(element, compiler, **kw):
+    fim, inicio = list(element.clauses)
+    return '((julianday(%s) - julianday(%s)) * 86400.0)' % (
+        compiler.process(fim, **kw), compiler.process(inicio, **kw)
+    )
+
+
+class intervalo(FunctionElement):
+    """Diferença fim - inicio como timedelta (NULL se alguma ponta for NULL)."""
+    type = Interval()
+    inherit_cache = True
+
+
+@compiles(intervalo)
+def _intervalo_padrao(element, compiler, **kw):
+    fim, inicio = list(element.clauses)
+    return '(%s - %s)' % (compiler.process(fim, **kw), compiler.process(inicio, **kw))
+
+
+@compiles(intervalo, 'sqlite')
+def _intervalo_sqlite(element, compiler, **kw):
+    # Interval no SQLite é a data equivalente a partir de 1970-01-01
+    fim, inicio = list(element.clauses)
+    return "datetime(strftime('%%s', %s) - strftime('%%s', %s), 'unixepoch')" % (
+        compiler.process(fim, **kw), compiler.process(inicio, **kw)
+    )
+
+
+class inicio_periodo(FunctionElement):
+    """Início do dia ou da semana (segunda-feira) de uma data."""
+    type = DateTime()
+    inherit_cache = True
+
+    def __init__(self, periodo, data):
+        self.periodo = periodo
+        super().__init__(data)
+
+
+@compiles(inicio_periodo)
+def _inicio_periodo_padrao(element, compiler, **kw):
+    unidade = 'day' if element.periodo == 'dia' else 'week'
+    return "date_trunc('%s', %s)" % (unidade, compiler.process(element.clauses, **kw))
+
+
+@compiles(inicio_periodo, 'sqlite')
+def _inicio_periodo_sqlite(element, compiler, **kw):
+    data = compiler.process(element.clauses, **kw)
+    if element.periodo == 'dia':
+        return 'date(%s)' % data
+    return "date(%s, '-6 days', 'weekday 1')" % data
+
+
+# =====================================================
+# Planejado x Executado
+# =====================================================
+
+def previsto_executado(agrupar_por='grupo', periodo=None, divisao_id=None,
+                       grupo_id=None, data_de=None, data_ate=None):
+    """
+    Agregados de Planejado x Executado calculados no banco.
+
+    Para cada grupo, loja ou planejamento (e, opcionalmente, por dia ou
+    semana de início do checkpoint) retorna duração prevista e executada
+    médias, variação média, percentis do tempo executado e a taxa de
+    checkpoints concluídos dentro do prazo do planejamento.
+
+    Durações em segundos. Percentis pelo método nearest-rank, apenas
+    sobre checkpoints com data_fim.
+    """
+    if agrupar_por not in DIMENSOES:
+        raise ValueError('agrupar_por inválido (use grupo, loja ou planejamento)')
+    if periodo is not None and periodo not in PERIODOS:
+        raise ValueError('periodo inválido (use dia ou semana)')
+
+    id_dimensao, nome_dimensao = DIMENSOES[agrupar_por]
+
+    executado = duracao_segundos(CheckpointAtividade.data_fim, CheckpointAtividade.data_ini)
+    previsto = duracao_segundos(Planejamento.data_fim, Planejamento.data_ini)
+
+    chaves = [id_dimensao.label('id'), nome_dimensao.label('nome')]
+    if periodo:
+        chaves.append(inicio_periodo(periodo, CheckpointAtividade.data_ini).label('periodo'))
+
+    # Uma linha por checkpoint com as durações já calculadas e a posição do
+    # tempo executado dentro do grupo (para os percentis)
+    base = (
+        select(
+            *chaves,
+            executado.label('executado'),
+            previsto.label('previsto'),
+            case(
+                (CheckpointAtividade.data_fim <= Planejamento.data_fim, 1),
+                else_=0
+            ).label('no_prazo'),
+        )
+        .select_from(CheckpointAtividade)
+        .join(Planejamento, Planejamento.id_planejamento == CheckpointAtividade.id_planejamento)
+        .join(Loja, Loja.id_loja == CheckpointAtividade.id_loja)
+        .join(GrupoTrabalho, GrupoTrabalho.id_grupo_trabalho == Planejamento.id_grupo_trabalho)
+    )
+
+    if divisao_id:
+        base = base.where(Loja.id_divisao_bandeira == divisao_id)
+    if grupo_id:
+        base = base.where(Planejamento.id_grupo_trabalho == grupo_id)
+    if data_de:
+        base = base.where(CheckpointAtividade.data_ini >= data_de)
+    if data_ate:
+        base = base.where(CheckpointAtividade.data_ini <= data_ate)
+
+    base = base.subquery()
+    colunas_chave = [base.c[c.name] for c in chaves]
+
+    ranqueado = select(
+        *colunas_chave,
+        base.c.executado,
+        base.c.previsto,
+        base.c.no_prazo,
+        func.row_number().over(
+            partition_by=colunas_chave,
+            # Checkpoints sem data_fim por último em qualquer banco
+            order_by=(base.c.executado.is_(None), base.c.executado)
+        ).label('posicao'),
+        func.count(base.c.executado).over(partition_by=colunas_chave).label('executados'),
+    ).subquery()
+
+    colunas_chave = [ranqueado.c[c.name] for c in chaves]
+    concluido = ranqueado.c.executado.isnot(None)
+
+    percentis = [
+        # nearest-rank: menor valor cuja posição >= p% de n (em inteiros)
+        func.min(
+            case(
+                (concluido & (ranqueado.c.posicao * 100 >= ranqueado.c.executados * p),
+                 ranqueado.c.executado),
+            )
+        ).label(nome)
+        for nome, p in PERCENTIS.items()
+    ]
+
+    query = (
+        select(
+            *colunas_chave,
+            func.count().label('total_checkpoints'),
+            func.count(ranqueado.c.executado).label('executados'),
+            func.avg(ranqueado.c.previsto).label('previsto_medio_s'),
+            func.avg(ranqueado.c.executado).label('executado_medio_s'),
+            func.avg(ranqueado.c.executado - ranqueado.c.previsto).label('variacao_media_s'),
+            *percentis,
+            func.sum(case((concluido, ranqueado.c.no_prazo), else_=0)).label('no_prazo'),
+        )
+        .group_by(*colunas_chave)
+        .order_by(ranqueado.c.nome, *colunas_chave)
+    )
+
+    return [_linha_para_dict(row, periodo) for row in db.session.execute(query)]
+
+
+def _linha_para_dict(row, periodo):
+    dados = row._asdict()
+
+    if periodo:
+        valor = dados['periodo']
+        dados['periodo'] = valor.isoformat()[:10] if hasattr(valor, 'isoformat') else valor
+
+    for coluna in ('previsto_medio_s', 'executado_medio_s', 'variacao_media_s', *PERCENTIS):
+        if dados[coluna] is not None:
+            dados[coluna] = round(float(dados[coluna]), 1)
+
+    dados['no_prazo'] = int(dados['no_prazo'] or 0)
+    dados['taxa_no_prazo'] = (
+        round(dados['no_prazo'] / dados['executados'], 4)
+        if dados['executados'] else None
+    )
+    return dados
@@ -0,0 +1,272 @@
+from database import db
+from models import CheckpointAtividade, Atividade, Loja, Planejamento, Rollup
+from models.rollup import escopos_da_loja
+from models.planejamento import STATUS_CONTADORES
+from cache import cache
+from services import conflito_service, esquemas
+from sqlalchemy import case, func, select, exists
+from datetime import datetime, timedelta
+import math
+import time
+
+# Tamanho do lote lido do cursor do servidor no modo streaming
+STREAM_BATCH_SIZE = 1000
+
+# Linhas por página na listagem web
+LISTAGEM_POR_PAGINA = 100
+
+
+def consulta_api(after=None, limit=None, campos=None):
+    """
+    SELECT de checkpoints para a API (ver esquemas.CHECKPOINT).
+
+    Paginação por keyset em id_checkpoint_atividade: `after` é o último id
+    recebido pelo cliente e `limit` o tamanho da página. `campos` restringe
+    as colunas e junções; o id é sempre selecionado (cursor).
+    """
+    query = esquemas.CHECKPOINT.select(campos)
+
+    if after:
+        query = query.where(CheckpointAtividade.id_checkpoint_atividade > after)
+
+    query = query.order_by(CheckpointAtividade.id_checkpoint_atividade)
+
+    if limit:
+        query = query.limit(limit)
+
+    return query
+
+
+def listar_api(after=None, limit=None, campos=None):
+    """Página da API: (linhas do SQL, dicts no formato de to_dict)."""
+    rows = db.session.execute(consulta_api(after=after, limit=limit, campos=campos)).all()
+    return rows, esquemas.CHECKPOINT.linhas(rows, campos)
+
+
+def iterar_api(after=None, campos=None):
+    """Itera as linhas da API a partir de um cursor do servidor, em lotes."""
+    query = (
+        consulta_api(after=after, campos=campos)
+        .execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+    )
+    for row in db.session.execute(query):
+        yield esquemas.CHECKPOINT.linha(row, campos)
+
+
+def criar_em_lote(
+    nome_checkpoint,
+    id_atividade,
+    id_planejamento,
+    data_ini,
+    data_fim=None,
+    status='Pendente',
+    observacao=None,
+    lojas=None,
+    id_grupo_trabalho=None,
+    id_divisao_bandeira=None,
+    permitir_conflitos=False
+):
+    """
+    Cria o mesmo checkpoint para várias lojas com um único INSERT (executemany).
+
+    As lojas vêm de uma lista de ids, de um grupo de trabalho ou de uma
+    divisão. Atividade, planejamento e lojas são validados em uma única
+    consulta, e os conflitos de período de todas as lojas em outra
+    (ConflitoAgenda, salvo com `permitir_conflitos`). Retorna um resumo
+    com o resultado por loja e o tempo gasto.
+    """
+    inicio = time.perf_counter()
+
+    if lojas is None and not id_grupo_trabalho and not id_divisao_bandeira:
+        raise ValueError('Informe lojas, id_grupo_trabalho ou id_divisao_bandeira')
+
+    lojas_query = select(
+        Loja.id_loja,
+        Loja.id_grupo_trabalho,
+        Loja.id_divisao_bandeira,
+        exists().where(Atividade.id_atividade == id_atividade).label('atividade_ok'),
+        exists().where(Planejamento.id_planejamento == id_planejamento).label('planejamento_ok'),
+    )
+
+    if lojas is not None:
+        lojas = [int(id_loja) for id_loja in lojas]
+        lojas_query = lojas_query.where(Loja.id_loja.in_(lojas))
+    if id_grupo_trabalho:
+        lojas_query = lojas_query.where(Loja.id_grupo_trabalho == id_grupo_trabalho)
+    if id_divisao_bandeira:
+        lojas_query = lojas_query.where(Loja.id_divisao_bandeira == id_divisao_bandeira)
+
+    encontradas = db.session.execute(lojas_query.order_by(Loja.id_loja)).all()
+
+    if not encontradas:
+        raise ValueError('Nenhuma loja encontrada para a seleção informada')
+    if not encontradas[0].atividade_ok:
+        raise ValueError('Atividade não encontrada')
+    if not encontradas[0].planejamento_ok:
+        raise ValueError('Planejamento não encontrado')
+
+    ids_validos = [row.id_loja for row in encontradas]
+    if not permitir_conflitos:
+        conflito_service.CHECKPOINT.verificar(ids_validos, data_ini, data_fim)
+
+    agora = datetime.utcnow()
+
+    linhas = [
+        {
+            'nome_checkpoint': nome_checkpoint,
+            'id_atividade': id_atividade,
+            'id_loja': id_loja,
+            'id_planejamento': id_planejamento,
+            'status': status,
+            'data_ini': data_ini,
+            'data_fim': data_fim,
+            'observacao': observacao,
+            'created_at': agora,
+            'updated_at': agora,
+        }
+        for id_loja in ids_validos
+    ]
+
+    inserir_em_lote(linhas, {
+        row.id_loja: (row.id_grupo_trabalho, row.id_divisao_bandeira)
+        for row in encontradas
+    })
+
+    resultados = [
+        {'id_loja': id_loja, 'resultado': 'criado'}
+        for id_loja in ids_validos
+    ]
+    if lojas is not None:
+        validos = set(ids_validos)
+        resultados.extend(
+            {'id_loja': id_loja, 'resultado': 'loja não encontrada'}
+            for id_loja in lojas if id_loja not in validos
+        )
+
+    return {
+        'total_criados': len(linhas),
+        'total_ignorados': len(resultados) - len(linhas),
+        'resultados': resultados,
+        'tempo_ms': round((time.perf_counter() - inicio) * 1000, 2),
+    }
+
+
+def inserir_em_lote(linhas, escopos):
+    """
+    INSERT de checkpoints em lote (executemany), aplicando os contadores
+    dos planejamentos e os rollups que os eventos do mapper aplicariam.
+
+    `linhas` são dicts de colunas (com id_loja, id_planejamento e status);
+    `escopos` mapeia id_loja -> (id_grupo_trabalho, id_divisao_bandeira).
+    """
+    connection = db.session.connection()
+    connection.execute(CheckpointAtividade.__table__.insert(), linhas)
+
+    # INSERT em lote não dispara os eventos do mapper
+    deltas_planejamento = {}
+    deltas_rollup = {}
+    for linha in linhas:
+        por_status = deltas_planejamento.setdefault(linha['id_planejamento'], {})
+        por_status[linha['status']] = por_status.get(linha['status'], 0) + 1
+
+        coluna_status = STATUS_CONTADORES.get(linha['status'])
+        if coluna_status:
+            for escopo in escopos_da_loja(*escopos[linha['id_loja']]):
+                por_coluna = deltas_rollup.setdefault(escopo, {coluna_status: 0})
+                por_coluna[coluna_status] += 1
+
+    Planejamento.aplicar_deltas(connection, deltas_planejamento)
+    Rollup.aplicar_deltas(connection, deltas_rollup)
+    cache.marcar_alterado(db.session, 'checkpoint_atividade', 'planejamento', 'periodo')
+
+
+# =====================================================
+# LISTAGEM WEB
+# =====================================================
+
+def _filtrar_listagem(query, status=None, data_de=None, data_ate=None, id_grupo_trabalho=None):
+    if status:
+        query = query.where(CheckpointAtividade.status.in_(status))
+    if data_de:
+        query = query.where(CheckpointAtividade.data_ini >= data_de)
+    if data_ate:
+        # data_ate é inclusiva (dia inteiro)
+        query = query.where(CheckpointAtividade.data_ini < data_ate + timedelta(days=1))
+    if id_grupo_trabalho:
+        query = query.where(
+            CheckpointAtividade.id_planejamento.in_(
+                select(Planejamento.id_planejamento)
+                .where(Planejamento.id_grupo_trabalho == id_grupo_trabalho)
+            )
+        )
+    return query
+
+
+def listar_paginado(pagina=1, por_pagina=LISTAGEM_POR_PAGINA, **filtros):
+    """
+    Página da listagem agrupada por nome_checkpoint.
+
+    Seleciona só as colunas exibidas e calcula, em SQL, o total filtrado e os
+    totais por status de cada grupo presente na página.
+    """
+    total = db.session.scalar(
+        _filtrar_listagem(
+            select(func.count(CheckpointAtividade.id_checkpoint_atividade)),
+            **filtros
+        )
+    )
+    paginas = max(1, math.ceil(total / por_pagina))
+    pagina = min(max(1, pagina), paginas)
+
+    registros = db.session.execute(
+        _filtrar_listagem(
+            select(
+                CheckpointAtividade.id_checkpoint_atividade,
+                CheckpointAtividade.nome_checkpoint,
+                Atividade.titulo.label('atividade_titulo'),
+                Loja.nome_loja,
+                CheckpointAtividade.status,
+                CheckpointAtividade.data_ini,
+                CheckpointAtividade.data_fim,
+            )
+            .outerjoin(Atividade, Atividade.id_atividade == CheckpointAtividade.id_atividade)
+            .outerjoin(Loja, Loja.id_loja == CheckpointAtividade.id_loja),
+            **filtros
+        )
+        .order_by(
+            CheckpointAtividade.nome_checkpoint.asc(),
+            CheckpointAtividade.data_ini.desc(),
+            CheckpointAtividade.id_checkpoint_atividade
+        )
+        .limit(por_pagina)
+        .offset((pagina - 1) * por_pagina)
+    ).all()
+
+    grupos = {}
+    nomes = {r.nome_checkpoint for r in registros}
+    if nomes:
+        contagens = db.session.execute(
+            _filtrar_listagem(
+                select(
+                    CheckpointAtividade.nome_checkpoint,
+                    func.count().label('total'),
+                    *[
+                        func.sum(case((CheckpointAtividade.status == status, 1), else_=0)).label(coluna)
+                        for status, coluna in STATUS_CONTADORES.items()
+                    ]
+                )
+                .where(CheckpointAtividade.nome_checkpoint.in_(nomes))
+                .group_by(CheckpointAtividade.nome_checkpoint),
+                **filtros
+            )
+        )
+        grupos = {row.nome_checkpoint: row._asdict() for row in contagens}
+
+    return {
+        'registros': registros,
+        'grupos': grupos,
+        'total': total,
+        'pagina': pagina,
+        'paginas': paginas,
+        'por_pagina': por_pagina,
+    }
@@ -0,0 +1,240 @@
+from database import db
+from models import CheckpointAtividade, Planejamento
+from models.periodo import sobrepoe_janela
+from sqlalchemy import and_, or_, select
+import heapq
+
+# Conflitos devolvidos por verificação e no relatório (padrão)
+LIMITE_CONFLITOS = 20
+LIMITE_RELATORIO = 1000
+
+
+class ConflitoAgenda(ValueError):
+    """Período sobreposto a outro do mesmo grupo/loja; `conflitos` traz os registros."""
+
+    def __init__(self, mensagem, conflitos):
+        super().__init__(mensagem)
+        self.conflitos = conflitos
+
+
+class Regra:
+    """
+    Períodos de `modelo` que não podem se sobrepor dentro de `agrupador`.
+
+    Dois períodos conflitam quando um começa antes do fim do outro, ou
+    quando começam no mesmo instante; um período que começa exatamente
+    quando o outro termina não conflita. Sem data_fim (ou com fim anterior
+    ao início) o período é só o instante de início, para que um checkpoint
+    pendente não bloqueie a loja indefinidamente. Sem data_ini não há
+    período a comparar.
+    """
+
+    def __init__(self, nome, modelo, agrupador, data_ini, data_fim, descricao):
+        self.nome = nome
+        self.chave = modelo.__mapper__.primary_key[0]
+        self.agrupador = agrupador
+        self.data_ini = data_ini
+        self.data_fim = data_fim
+        self.descricao = descricao
+
+    def conflitos(self, agrupadores, inicio, fim=None, ignorar=None, limite=LIMITE_CONFLITOS):
+        """
+        Registros de `agrupadores` (um id ou lista) que conflitam com
+        [inicio, fim], exceto o id `ignorar` (o próprio registro na edição).
+
+        Uma consulta só, pelo índice GiST de período no Postgres e pelo de
+        (agrupador, data_ini) nos demais bancos.
+        """
+        if not isinstance(agrupadores, (list, tuple, set)):
+            agrupadores = [agrupadores]
+        if not agrupadores or inicio is None:
+            return []
+
+        query = self._consulta(agrupadores, inicio, fim).limit(limite)
+        if ignorar is not None:
+            query = query.where(self.chave != ignorar)
+
+        return [_registro(row) for row in db.session.execute(query)]
+
+    def conflitos_por_agrupador(self, periodos, limite=LIMITE_CONFLITOS):
+        """
+        Conflitos de vários períodos novos, um por agrupador:
+        `periodos` é {agrupador: (inicio, fim)}.
+
+        Uma consulta pela janela fechada que cobre todos os períodos; a
+        regra de conflito de cada agrupador é aplicada por `conflitam` nas
+        linhas devolvidas.
+        """
+        periodos = {chave: _normalizar(*periodo) for chave, periodo in periodos.items()}
+        if not periodos:
+            return []
+
+        query = self._candidatos(
+            list(periodos),
+            min(inicio for inicio, _ in periodos.values()),
+            max(fim for _, fim in periodos.values()),
+        )
+
+        conflitos = []
+        for row in db.session.execute(query):
+            inicio, fim = periodos[row.agrupador]
+            if conflitam(row.data_ini, row.data_fim, inicio, fim):
+                conflitos.append(_registro(row))
+                if len(conflitos) >= limite:
+                    break
+        return conflitos
+
+    def verificar(self, agrupadores, inicio, fim=None, ignorar=None):
+        """Levanta ConflitoAgenda se houver conflito."""
+        conflitos = self.conflitos(agrupadores, inicio, fim, ignorar)
+        if conflitos:
+            raise ConflitoAgenda(
+                f'Período sobreposto a {self.nome}(s) existente(s): '
+                + ', '.join(f'#{c["id"]} {c["descricao"]}' for c in conflitos[:5]),
+                conflitos
+            )
+
+    def _candidatos(self, agrupadores, inicio, fim):
+        """Registros cujo período fechado cruza [inicio, fim], pelo índice de período."""
+        return (
+            select(
+                self.chave.label('id'),
+                self.agrupador.label('agrupador'),
+                self.descricao.label('descricao'),
+                self.data_ini.label('data_ini'),
+                self.data_fim.label('data_fim'),
+            )
+            .where(
+                self.agrupador.in_(agrupadores),
+                sobrepoe_janela(self.data_ini, self.data_fim, inicio, fim, db.engine.dialect.name),
+            )
+            .order_by(self.agrupador, self.data_ini, self.chave)
+        )
+
+    def _consulta(self, agrupadores, inicio, fim):
+        inicio, fim = _normalizar(inicio, fim)
+
+        # As comparações estritas aplicam a regra de `conflitam` nas pontas
+        return self._candidatos(agrupadores, inicio, fim).where(
+            or_(
+                and_(
+                    self.data_ini < fim,
+                    or_(self.data_fim > inicio, self.data_ini > inicio),
+                ),
+                self.data_ini == inicio,
+            )
+        )
+
+    def relatorio(self, agrupador=None, limite=LIMITE_RELATORIO):
+        """
+        Todos os pares conflitantes, em uma passada pelos registros
+        ordenados por (agrupador, data_ini).
+
+        Varredura: os períodos ainda abertos do agrupador ficam em um heap
+        pelo fim; cada novo período descarta os que já terminaram e
+        conflita com todos os restantes. O(n log n + pares), sem comparar
+        todos com todos.
+        """
+        query = (
+            select(
+                self.chave.label('id'),
+                self.agrupador.label('agrupador'),
+                self.data_ini.label('data_ini'),
+                self.data_fim.label('data_fim'),
+            )
+            .where(self.data_ini.isnot(None))
+            .order_by(self.agrupador, self.data_ini, self.chave)
+            .execution_options(yield_per=5000)
+        )
+        if agrupador is not None:
+            query = query.where(self.agrupador == agrupador)
+
+        pares = []
+        total = 0
+        por_agrupador = {}
+        atual = object()
+        abertos = []
+
+        for row in db.session.execute(query):
+            if row.agrupador != atual:
+                atual = row.agrupador
+                abertos = []
+
+            inicio, fim = _normalizar(row.data_ini, row.data_fim)
+
+            # (fim, início, id): terminou antes deste início, ou exatamente
+            # nele sem ter começado no mesmo instante
+            while abertos and (abertos[0][0], abertos[0][1]) < (inicio, inicio):
+                heapq.heappop(abertos)
+
+            for fim_aberto, _, id_aberto in abertos:
+                total += 1
+                por_agrupador[atual] = por_agrupador.get(atual, 0) + 1
+                if len(pares) < limite:
+                    pares.append({
+                        'agrupador': atual,
+                        'ids': [id_aberto, row.id],
+                        'inicio': inicio.isoformat(),
+                        'fim': min(fim, fim_aberto).isoformat(),
+                    })
+
+            heapq.heappush(abertos, (fim, inicio, row.id))
+
+        return {
+            'regra': self.nome,
+            'total': total,
+            'por_agrupador': [
+                {'agrupador': chave, 'conflitos': quantidade}
+                for chave, quantidade in sorted(por_agrupador.items(), key=lambda item: -item[1])
+            ],
+            'conflitos': pares,
+            'truncado': total > len(pares),
+        }
+
+
+def conflitam(inicio_a, fim_a, inicio_b, fim_b):
+    """A regra de conflito entre dois períodos, em Python."""
+    if inicio_a is None or inicio_b is None:
+        return False
+    inicio_a, fim_a = _normalizar(inicio_a, fim_a)
+    inicio_b, fim_b = _normalizar(inicio_b, fim_b)
+    return inicio_a == inicio_b or (inicio_a < fim_b and inicio_b < fim_a)
+
+
+def _normalizar(inicio, fim):
+    """Sem fim, ou com fim antes do início, o período é só o início."""
+    return inicio, max(fim, inicio) if fim is not None else inicio
+
+
+def _registro(row):
+    return {
+        'id': row.id,
+        'agrupador': row.agrupador,
+        'descricao': row.descricao,
+        'data_ini': row.data_ini.isoformat() if row.data_ini else None,
+        'data_fim': row.data_fim.isoformat() if row.data_fim else None,
+    }
+
+
+# Um grupo de trabalho não executa dois planejamentos ao mesmo tempo
+PLANEJAMENTO = Regra(
+    'planejamento',
+    Planejamento,
+    agrupador=Planejamento.id_grupo_trabalho,
+    data_ini=Planejamento.data_ini,
+    data_fim=Planejamento.data_fim,
+    descricao=Planejamento.titulo,
+)
+
+# Uma loja não executa dois checkpoints ao mesmo tempo; um checkpoint
+# agendado ocupa a loja até o fim previsto
+CHECKPOINT = Regra(
+    'checkpoint',
+    CheckpointAtividade,
+    agrupador=CheckpointAtividade.id_loja,
+    data_ini=CheckpointAtividade.data_ini,
+    data_fim=CheckpointAtividade.data_fim_agenda,
+    descricao=CheckpointAtividade.nome_checkpoint,
+)
+
+REGRAS = {regra.nome: regra for regra in (PLANEJAMENTO, CHECKPOINT)}
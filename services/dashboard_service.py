@@ -0,0 +1,185 @@
+from database import db
+from models import (
+    Loja,
+    DivisaoBandeira,
+    GrupoTrabalho,
+    Responsavel,
+    CheckpointAtividade,
+    Planejamento,
+    Atividade,
+)
+from services.analise_service import intervalo
+
+
+def carregar_dashboard(divisao_id=None, grupo_id=None):
+    """
+    Monta os dados do dashboard de gestão.
+
+    Seleciona apenas as colunas renderizadas em dashboard.html e aplica os
+    filtros de divisão e grupo diretamente no SQL. Blocos que o template não
+    exibe para a combinação de filtros não são consultados.
+    """
+    divisoes = listar_divisoes()
+
+    selected_divisao = None
+    grupos = []
+    grupos_loja = []
+
+    if divisao_id:
+        selected_divisao = next(
+            (d for d in divisoes if d.id_bandeira_divisao == divisao_id),
+            None
+        )
+        grupos = listar_grupos_da_divisao(divisao_id)
+        grupos_loja = listar_lojas_com_grupo(divisao_id, grupo_id)
+
+    atividades_planejamento = []
+    if grupo_id:
+        atividades_planejamento = listar_atividades_planejamento(grupo_id)
+
+    return {
+        'divisoes': divisoes,
+        'grupos': grupos,
+        'grupos_loja': grupos_loja,
+        'selected_id': divisao_id,
+        'selected_group_id': grupo_id,
+        'selected_divisao': selected_divisao,
+        'atividades_planejamento': atividades_planejamento,
+        'acompanhamento_planejamento': listar_acompanhamento(divisao_id, grupo_id),
+    }
+
+
+def listar_divisoes():
+    return (
+        db.session.query(
+            DivisaoBandeira.id_bandeira_divisao,
+            DivisaoBandeira.nome_bandeira,
+        )
+        .order_by(DivisaoBandeira.nome_bandeira)
+        .all()
+    )
+
+
+def listar_grupos_da_divisao(divisao_id):
+    """Grupos com pelo menos uma loja na divisão, já com o nome do responsável."""
+    lojas_da_divisao = (
+        db.session.query(Loja.id_loja)
+        .filter(
+            Loja.id_grupo_trabalho == GrupoTrabalho.id_grupo_trabalho,
+            Loja.id_divisao_bandeira == divisao_id
+        )
+        .exists()
+    )
+
+    grupos = (
+        db.session.query(
+            GrupoTrabalho.id_grupo_trabalho,
+            GrupoTrabalho.nome_grupo,
+            Responsavel.nome.label('responsavel_nome'),
+        )
+        .outerjoin(Responsavel, Responsavel.id_responsavel == GrupoTrabalho.id_responsavel)
+        .filter(lojas_da_divisao)
+        .order_by(GrupoTrabalho.nome_grupo)
+        .all()
+    )
+
+    return [
+        {
+            'id_grupo_trabalho': g.id_grupo_trabalho,
+            'nome_grupo': g.nome_grupo,
+            'responsavel_nome': g.responsavel_nome or 'Não definido'
+        }
+        for g in grupos
+    ]
+
+
+def listar_lojas_com_grupo(divisao_id=None, grupo_id=None):
+    query = (
+        db.session.query(
+            Loja.nome_loja.label('nome_loja'),
+            Loja.qtd_sku.label('qtd_sku'),
+            Loja.qtd_pessoas.label('qtd_pessoas'),
+            GrupoTrabalho.nome_grupo.label('nome_grupo'),
+            Responsavel.nome.label('responsavel_nome'),
+            Responsavel.contato.label('responsavel_contato'),
+        )
+        .join(GrupoTrabalho, GrupoTrabalho.id_grupo_trabalho == Loja.id_grupo_trabalho)
+        .outerjoin(Responsavel, Responsavel.id_responsavel == GrupoTrabalho.id_responsavel)
+    )
+
+    if divisao_id:
+        query = query.filter(Loja.id_divisao_bandeira == divisao_id)
+
+    if grupo_id:
+        query = query.filter(Loja.id_grupo_trabalho == grupo_id)
+
+    return query.order_by(Loja.nome_loja).all()
+
+
+def listar_atividades_planejamento(grupo_id):
+    return (
+        db.session.query(
+            GrupoTrabalho.nome_grupo.label('nome_grupo'),
+            Atividade.titulo.label('titulo'),
+            Atividade.descricao.label('descricao'),
+            Planejamento.data_ini.label('data_ini'),
+            Planejamento.data_fim.label('data_fim'),
+        )
+        .select_from(Planejamento)
+        .join(Atividade, Atividade.id_atividade == Planejamento.id_atividade)
+        .join(GrupoTrabalho, GrupoTrabalho.id_grupo_trabalho == Planejamento.id_grupo_trabalho)
+        .filter(Planejamento.id_grupo_trabalho == grupo_id)
+        .order_by(Planejamento.data_ini.desc())
+        .all()
+    )
+
+
+def listar_acompanhamento(divisao_id=None, grupo_id=None):
+    """Acompanhamento Planejado x Executado (uma linha por checkpoint)."""
+    return consulta_acompanhamento(divisao_id, grupo_id).all()
+
+
+def consulta_acompanhamento(divisao_id=None, grupo_id=None):
+    query = (
+        db.session.query(
+            GrupoTrabalho.nome_grupo.label('nome_grupo'),
+
+            Planejamento.data_ini.label('plan_data_ini'),
+            Planejamento.data_fim.label('plan_data_fim'),
+            Planejamento.titulo.label('titulo'),
+
+            # Previsto (Planejado)
+            intervalo(Planejamento.data_fim, Planejamento.data_ini).label('previsto'),
+
+            Loja.nome_loja.label('nome_loja'),
+
+            CheckpointAtividade.nome_checkpoint.label('nome_checkpoint'),
+            CheckpointAtividade.data_ini.label('ck_data_ini'),
+            CheckpointAtividade.data_fim.label('ck_data_fim'),
+
+            # Executado
+            intervalo(CheckpointAtividade.data_fim, CheckpointAtividade.data_ini).label('executado'),
+        )
+        .select_from(CheckpointAtividade)
+        .join(Loja, Loja.id_loja == CheckpointAtividade.id_loja)
+        .outerjoin(
+            Planejamento,
+            Planejamento.id_planejamento == CheckpointAtividade.id_planejamento
+        )
+        .outerjoin(
+            GrupoTrabalho,
+            GrupoTrabalho.id_grupo_trabalho == Planejamento.id_grupo_trabalho
+        )
+    )
+
+    if divisao_id:
+        query = query.filter(Loja.id_divisao_bandeira == divisao_id)
+
+    if grupo_id:
+        query = query.filter(Planejamento.id_grupo_trabalho == grupo_id)
+
+    return query.order_by(
+        GrupoTrabalho.nome_grupo,
+        Loja.nome_loja,
+        Planejamento.data_ini.desc()
+    )
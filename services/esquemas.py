@@ -0,0 +1,291 @@
+from models import (
+    Atividade,
+    CheckpointAtividade,
+    DivisaoBandeira,
+    GrupoTrabalho,
+    Loja,
+    Planejamento,
+    Responsavel,
+)
+from services import grupo_trabalho_service
+from services.serializacao import Campo, Colecao, Esquema
+from sqlalchemy import func, select
+
+# Esquemas das respostas /api. Os campos padrão produzem o mesmo formato do
+# to_dict() do modelo, direto das linhas do SQL; as expansões (?expand=)
+# trazem relacionamentos completos (ver services/serializacao.py).
+
+
+def _relacionado(join, **colunas):
+    """
+    Campo com o objeto relacionado {nome: coluna}, unido por `join`.
+    A primeira coluna deve ser a chave: quando nula, o valor é None.
+    """
+    rotulos = {nome: f'{join}__{nome}' for nome in colunas}
+    chave = next(iter(rotulos.values()))
+    return Campo(
+        *(coluna.label(rotulos[nome]) for nome, coluna in colunas.items()),
+        valor=lambda row: {
+            nome: getattr(row, rotulo) for nome, rotulo in rotulos.items()
+        } if getattr(row, chave) is not None else None,
+        joins=(join,)
+    )
+
+
+def _tempo_gasto_segundos(row):
+    if row.ck_data_ini and row.ck_data_fim:
+        return (row.ck_data_fim - row.ck_data_ini).total_seconds()
+    return None
+
+
+def _tempo_gasto_horas(row):
+    segundos = _tempo_gasto_segundos(row)
+    return round(segundos / 3600, 2) if segundos is not None else None
+
+
+_DATAS_CHECKPOINT = (
+    CheckpointAtividade.data_ini.label('ck_data_ini'),
+    CheckpointAtividade.data_fim.label('ck_data_fim'),
+)
+
+
+CHECKPOINT = Esquema(
+    CheckpointAtividade,
+    {
+        'id_checkpoint_atividade': Campo(CheckpointAtividade.id_checkpoint_atividade),
+        'nome_checkpoint': Campo(CheckpointAtividade.nome_checkpoint),
+        'atividade': Campo(
+            CheckpointAtividade.id_atividade.label('ck_id_atividade'),
+            Atividade.titulo.label('atividade_titulo'),
+            valor=lambda row: {
+                'id': row.ck_id_atividade,
+                'titulo': row.atividade_titulo
+            } if row.atividade_titulo is not None else None,
+            joins=('atividade',)
+        ),
+        'loja': Campo(
+            CheckpointAtividade.id_loja.label('ck_id_loja'),
+            Loja.nome_loja.label('loja_nome'),
+            valor=lambda row: {
+                'id': row.ck_id_loja,
+                'nome': row.loja_nome
+            } if row.loja_nome is not None else None,
+            joins=('loja',)
+        ),
+        'id_planejamento': Campo(CheckpointAtividade.id_planejamento),
+        'status': Campo(CheckpointAtividade.status),
+        'data_ini': Campo(CheckpointAtividade.data_ini),
+        'data_fim': Campo(CheckpointAtividade.data_fim),
+        'data_fim_prevista': Campo(CheckpointAtividade.data_fim_prevista),
+        'tempo_gasto_segundos': Campo(*_DATAS_CHECKPOINT, valor=_tempo_gasto_segundos),
+        'tempo_gasto_horas': Campo(*_DATAS_CHECKPOINT, valor=_tempo_gasto_horas),
+        'observacao': Campo(CheckpointAtividade.observacao),
+        'created_at': Campo(CheckpointAtividade.created_at),
+        'updated_at': Campo(CheckpointAtividade.updated_at),
+    },
+    joins={
+        'atividade': (Atividade, Atividade.id_atividade == CheckpointAtividade.id_atividade),
+        'loja': (Loja, Loja.id_loja == CheckpointAtividade.id_loja),
+        'planejamento': (
+            Planejamento,
+            Planejamento.id_planejamento == CheckpointAtividade.id_planejamento
+        ),
+    },
+    expansoes={
+        'planejamento': _relacionado(
+            'planejamento',
+            id_planejamento=Planejamento.id_planejamento,
+            titulo=Planejamento.titulo,
+            status=Planejamento.status,
+            data_ini=Planejamento.data_ini,
+            data_fim=Planejamento.data_fim,
+        ),
+    }
+)
+
+
+LOJA = Esquema(
+    Loja,
+    {
+        'id_loja': Campo(Loja.id_loja),
+        'nome_loja': Campo(Loja.nome_loja),
+        'endereco': Campo(Loja.endereco),
+        'qtd_sku': Campo(Loja.qtd_sku),
+        'qtd_pessoas': Campo(Loja.qtd_pessoas),
+        'id_divisao_bandeira': Campo(Loja.id_divisao_bandeira),
+        'id_grupo_trabalho': Campo(Loja.id_grupo_trabalho),
+        'divisao_bandeira_nome': Campo(
+            DivisaoBandeira.nome_bandeira.label('divisao_nome'),
+            valor=lambda row: row.divisao_nome,
+            joins=('divisao_bandeira',)
+        ),
+        'grupo_trabalho': Campo(
+            GrupoTrabalho.id_grupo_trabalho.label('grupo_id'),
+            GrupoTrabalho.nome_grupo.label('grupo_nome'),
+            valor=lambda row: {
+                'id': row.grupo_id,
+                'nome': row.grupo_nome
+            } if row.grupo_id is not None else None,
+            joins=('grupo_trabalho',)
+        ),
+        'created_at': Campo(Loja.created_at),
+        'updated_at': Campo(Loja.updated_at),
+    },
+    joins={
+        'divisao_bandeira': (
+            DivisaoBandeira,
+            DivisaoBandeira.id_bandeira_divisao == Loja.id_divisao_bandeira
+        ),
+        'grupo_trabalho': (
+            GrupoTrabalho,
+            GrupoTrabalho.id_grupo_trabalho == Loja.id_grupo_trabalho
+        ),
+    },
+    expansoes={
+        'divisao_bandeira': _relacionado(
+            'divisao_bandeira',
+            id_bandeira_divisao=DivisaoBandeira.id_bandeira_divisao,
+            nome_bandeira=DivisaoBandeira.nome_bandeira,
+            contato=DivisaoBandeira.contato,
+        ),
+        'grupo_trabalho': _relacionado(
+            'grupo_trabalho',
+            id_grupo_trabalho=GrupoTrabalho.id_grupo_trabalho,
+            nome_grupo=GrupoTrabalho.nome_grupo,
+            id_responsavel=GrupoTrabalho.id_responsavel,
+        ),
+    }
+)
+
+
+PLANEJAMENTO = Esquema(
+    Planejamento,
+    {
+        nome: Campo(getattr(Planejamento, nome))
+        for nome in (
+            'id_planejamento', 'titulo', 'data_ini', 'data_fim',
+            'id_grupo_trabalho', 'id_atividade', 'status',
+            'qtd_pendente', 'qtd_em_andamento', 'qtd_concluido',
+            'created_at', 'updated_at',
+        )
+    },
+    joins={
+        'atividade': (Atividade, Atividade.id_atividade == Planejamento.id_atividade),
+        'grupo_trabalho': (
+            GrupoTrabalho,
+            GrupoTrabalho.id_grupo_trabalho == Planejamento.id_grupo_trabalho
+        ),
+    },
+    expansoes={
+        'atividade': _relacionado(
+            'atividade',
+            id_atividade=Atividade.id_atividade,
+            titulo=Atividade.titulo,
+        ),
+        'grupo_trabalho': _relacionado(
+            'grupo_trabalho',
+            id_grupo_trabalho=GrupoTrabalho.id_grupo_trabalho,
+            nome_grupo=GrupoTrabalho.nome_grupo,
+        ),
+    }
+)
+
+
+ATIVIDADE = Esquema(
+    Atividade,
+    {
+        nome: Campo(getattr(Atividade, nome))
+        for nome in ('id_atividade', 'titulo', 'descricao', 'created_at', 'updated_at')
+    }
+)
+
+
+DIVISAO = Esquema(
+    DivisaoBandeira,
+    {
+        'id_bandeira_divisao': Campo(DivisaoBandeira.id_bandeira_divisao),
+        'nome_bandeira': Campo(DivisaoBandeira.nome_bandeira),
+        'contato': Campo(DivisaoBandeira.contato),
+        'created_at': Campo(DivisaoBandeira.created_at),
+        'updated_at': Campo(DivisaoBandeira.updated_at),
+        # COUNT correlacionado: só entra no SELECT quando pedido
+        'total_lojas': Campo(
+            select(func.count(Loja.id_loja))
+            .where(Loja.id_divisao_bandeira == DivisaoBandeira.id_bandeira_divisao)
+            .scalar_subquery()
+        ),
+    },
+    expansoes={
+        'lojas': Colecao(
+            Loja.id_divisao_bandeira,
+            {'id': Loja.id_loja, 'nome': Loja.nome_loja},
+            ordem=Loja.id_loja
+        ),
+    }
+)
+
+
+GRUPO = Esquema(
+    GrupoTrabalho,
+    {
+        'id_grupo_trabalho': Campo(GrupoTrabalho.id_grupo_trabalho),
+        'nome_grupo': Campo(GrupoTrabalho.nome_grupo),
+        'id_responsavel': Campo(GrupoTrabalho.id_responsavel),
+        'responsavel_nome': Campo(Responsavel.nome, joins=('responsavel',)),
+        # Mesmos totais de serializar_grupos (rollup, ou as lojas sem ele)
+        'total_lojas': Campo(grupo_trabalho_service.TOTAL_LOJAS),
+        'total_pessoas': Campo(grupo_trabalho_service.TOTAL_PESSOAS),
+        'lojas_info': Colecao(
+            Loja.id_grupo_trabalho,
+            {'id': Loja.id_loja, 'nome': Loja.nome_loja, 'qtd_pessoas': Loja.qtd_pessoas},
+            ordem=Loja.id_loja
+        ),
+        'created_at': Campo(GrupoTrabalho.created_at),
+        'updated_at': Campo(GrupoTrabalho.updated_at),
+    },
+    joins={
+        'responsavel': (Responsavel, Responsavel.id_responsavel == GrupoTrabalho.id_responsavel),
+    },
+    expansoes={
+        'responsavel': _relacionado(
+            'responsavel',
+            id_responsavel=Responsavel.id_responsavel,
+            nome=Responsavel.nome,
+            contato=Responsavel.contato,
+        ),
+        'planejamentos': Colecao(
+            Planejamento.id_grupo_trabalho,
+            {
+                'id': Planejamento.id_planejamento,
+                'titulo': Planejamento.titulo,
+                'status': Planejamento.status,
+            },
+            ordem=Planejamento.id_planejamento
+        ),
+    }
+)
+
+
+RESPONSAVEL = Esquema(
+    Responsavel,
+    {
+        'id_responsavel': Campo(Responsavel.id_responsavel),
+        'nome': Campo(Responsavel.nome),
+        'contato': Campo(Responsavel.contato),
+        'grupos_trabalho': Colecao(
+            GrupoTrabalho.id_responsavel,
+            GrupoTrabalho.id_grupo_trabalho,
+            ordem=GrupoTrabalho.id_grupo_trabalho
+        ),
+        'created_at': Campo(Responsavel.created_at),
+        'updated_at': Campo(Responsavel.updated_at),
+    },
+    expansoes={
+        # Substitui a lista de ids pelos grupos {id, nome}
+        'grupos_trabalho': Colecao(
+            GrupoTrabalho.id_responsavel,
+            {'id': GrupoTrabalho.id_grupo_trabalho, 'nome': GrupoTrabalho.nome_grupo},
+            ordem=GrupoTrabalho.id_grupo_trabalho
+        ),
+    }
+)
@@ -0,0 +1,243 @@
+from database import db
+from cache import cache
+from models import CheckpointAtividade, EstimativaDuracao, Loja
+from models.estimativa_duracao import COLUNAS_PARAMETROS
+from services.analise_service import duracao_segundos
+from sqlalchemy import func, select
+from datetime import datetime, timedelta
+import math
+
+# NumPy (requirements.txt) vetoriza o ajuste; o mesmo cálculo em Python
+# puro fica para ambientes sem ele e como referência nos testes
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+QUANTIS = (0.1, 0.5, 0.9)
+
+# Checkpoints alterados pouco antes da última atualização também são
+# relidos: commits concorrentes podem gravar updated_at fora de ordem
+MARGEM_INCREMENTAL = timedelta(minutes=5)
+
+
+def atualizar(completo=False):
+    """
+    Ajusta a tabela estimativa_duracao a partir dos checkpoints concluídos.
+
+    Incremental por padrão: recalcula só as atividades com checkpoints
+    alterados (updated_at) desde a última atualização, sempre sobre todo o
+    histórico de cada uma, então os quantis são exatos. Exclusões de
+    checkpoints não alteram updated_at; use `completo` para recalcular tudo.
+    Não faz commit. Retorna {'atividades', 'amostras', 'completo', 'motor'}.
+    """
+    ultimo = None if completo else db.session.scalar(select(func.max(EstimativaDuracao.dados_ate)))
+    dados_ate = db.session.scalar(select(func.max(CheckpointAtividade.updated_at)))
+
+    if ultimo is None:
+        completo = True
+        atividades = None
+    else:
+        atividades = db.session.scalars(
+            select(CheckpointAtividade.id_atividade)
+            .where(CheckpointAtividade.updated_at > ultimo - MARGEM_INCREMENTAL)
+            .distinct()
+        ).all()
+        if not atividades:
+            return {'atividades': 0, 'amostras': 0, 'completo': False, 'motor': _motor()}
+
+    colunas = _historico(atividades)
+    parametros = _ajustar(*colunas)
+
+    tabela = EstimativaDuracao.__table__
+    connection = db.session.connection()
+    remover = tabela.delete()
+    if atividades is not None:
+        remover = remover.where(tabela.c.id_atividade.in_(atividades))
+    connection.execute(remover)
+
+    agora = datetime.utcnow()
+    if parametros:
+        connection.execute(tabela.insert(), [
+            {**linha, 'dados_ate': dados_ate, 'updated_at': agora}
+            for linha in parametros
+        ])
+    cache.marcar_alterado(db.session, 'estimativa_duracao')
+
+    return {
+        'atividades': len(parametros),
+        'amostras': len(colunas[0]),
+        'completo': completo,
+        'motor': _motor(),
+    }
+
+
+def obter(id_atividade):
+    return db.session.get(EstimativaDuracao, id_atividade)
+
+
+def prever(id_atividade, lojas):
+    """
+    Horas previstas por loja para um novo planejamento, em colunas:
+    {'id_loja', 'p10', 'p50', 'p90'} (listas) e os totais de p50/p90.
+
+    `lojas` são linhas com id_loja, qtd_sku e qtd_pessoas. Retorna None se
+    a atividade ainda não tem estimativa ajustada.
+    """
+    estimativa = obter(id_atividade)
+    if estimativa is None or not estimativa.amostras:
+        return None
+
+    colunas = {'id_loja': [], 'p10': [], 'p50': [], 'p90': []}
+    for loja in lojas:
+        previsao = estimativa.prever(loja.qtd_sku, loja.qtd_pessoas)
+        colunas['id_loja'].append(loja.id_loja)
+        for nome, valor in zip(('p10', 'p50', 'p90'), previsao):
+            colunas[nome].append(round(valor, 2))
+
+    return {
+        **colunas,
+        'total_p50': round(sum(colunas['p50']), 2),
+        'total_p90': round(sum(colunas['p90']), 2),
+    }
+
+
+def _motor():
+    return 'numpy' if np is not None else 'python'
+
+
+def _historico(atividades=None):
+    """Colunas (id_atividade, horas, qtd_sku, qtd_pessoas) dos checkpoints concluídos."""
+    horas = duracao_segundos(CheckpointAtividade.data_fim, CheckpointAtividade.data_ini) / 3600.0
+    query = (
+        select(
+            CheckpointAtividade.id_atividade,
+            horas,
+            func.coalesce(Loja.qtd_sku, 0),
+            func.coalesce(func.nullif(Loja.qtd_pessoas, 0), 1),
+        )
+        .join(Loja, Loja.id_loja == CheckpointAtividade.id_loja)
+        .where(
+            CheckpointAtividade.status == 'Concluído',
+            CheckpointAtividade.data_fim >= CheckpointAtividade.data_ini,
+        )
+    )
+    if atividades is not None:
+        query = query.where(CheckpointAtividade.id_atividade.in_(atividades))
+
+    linhas = db.session.execute(query).all()
+    if not linhas:
+        return [], [], [], []
+    return [list(coluna) for coluna in zip(*linhas)]
+
+
+def _ajustar(atividades, horas, skus, pessoas):
+    """Parâmetros por atividade: dicts com id_atividade e COLUNAS_PARAMETROS."""
+    if not atividades:
+        return []
+    if np is not None:
+        return _ajustar_numpy(atividades, horas, skus, pessoas)
+    return _ajustar_python(atividades, horas, skus, pessoas)
+
+
+def _ajustar_numpy(atividades, horas, skus, pessoas):
+    atividades = np.asarray(atividades, dtype=np.int64)
+    horas = np.asarray(horas, dtype=float)
+    skus = np.asarray(skus, dtype=float)
+    pessoas = np.asarray(pessoas, dtype=float)
+
+    ids, contagens, media, desvio, quantis_horas = _resumo_numpy(atividades, horas)
+
+    com_sku = skus > 0
+    ids_taxa, contagens_taxa, _, _, quantis_taxa = _resumo_numpy(
+        atividades[com_sku], horas[com_sku] * pessoas[com_sku] / skus[com_sku]
+    )
+    taxa = {
+        int(id_atividade): (int(n), *(float(q[i]) for q in quantis_taxa))
+        for i, (id_atividade, n) in enumerate(zip(ids_taxa, contagens_taxa))
+    }
+
+    parametros = []
+    for i, id_atividade in enumerate(ids.tolist()):
+        amostras_taxa, *quantis = taxa.get(id_atividade, (0, None, None, None))
+        parametros.append(dict(zip(['id_atividade', *COLUNAS_PARAMETROS], [
+            id_atividade,
+            int(contagens[i]),
+            float(media[i]),
+            float(desvio[i]) if contagens[i] > 1 else None,
+            *(float(q[i]) for q in quantis_horas),
+            amostras_taxa,
+            *quantis,
+        ])))
+    return parametros
+
+
+def _resumo_numpy(grupos, valores):
+    """
+    Contagem, média, desvio amostral e QUANTIS de `valores` por grupo,
+    sem laço por linha: ordena por (grupo, valor) uma vez e calcula tudo
+    por índices nos limites de cada grupo.
+    """
+    if not len(valores):
+        vazio = np.array([])
+        return vazio, vazio, vazio, vazio, [vazio for _ in QUANTIS]
+
+    ordem = np.lexsort((valores, grupos))
+    grupos, valores = grupos[ordem], valores[ordem]
+
+    inicios = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+    contagens = np.diff(np.r_[inicios, len(valores)])
+
+    media = np.add.reduceat(valores, inicios) / contagens
+    desvios = valores - np.repeat(media, contagens)
+    variancia = np.add.reduceat(desvios * desvios, inicios) / np.maximum(contagens - 1, 1)
+
+    # Interpolação linear entre as posições vizinhas (método padrão do NumPy)
+    quantis = []
+    for q in QUANTIS:
+        posicao = q * (contagens - 1)
+        abaixo = np.floor(posicao).astype(np.int64)
+        acima = np.minimum(abaixo + 1, contagens - 1)
+        fracao = posicao - abaixo
+        quantis.append(
+            valores[inicios + abaixo] * (1 - fracao) + valores[inicios + acima] * fracao
+        )
+
+    return grupos[inicios], contagens, media, np.sqrt(variancia), quantis
+
+
+def _ajustar_python(atividades, horas, skus, pessoas):
+    por_atividade = {}
+    for id_atividade, h, sku, n_pessoas in zip(atividades, horas, skus, pessoas):
+        amostras = por_atividade.setdefault(id_atividade, ([], []))
+        amostras[0].append(h)
+        if sku > 0:
+            amostras[1].append(h * n_pessoas / sku)
+
+    parametros = []
+    for id_atividade in sorted(por_atividade):
+        valores, taxas = (sorted(lista) for lista in por_atividade[id_atividade])
+        n = len(valores)
+        media = sum(valores) / n
+        desvio = (
+            math.sqrt(sum((v - media) ** 2 for v in valores) / (n - 1))
+            if n > 1 else None
+        )
+        parametros.append(dict(zip(['id_atividade', *COLUNAS_PARAMETROS], [
+            id_atividade,
+            n,
+            media,
+            desvio,
+            *(_quantil(valores, q) for q in QUANTIS),
+            len(taxas),
+            *(_quantil(taxas, q) if taxas else None for q in QUANTIS),
+        ])))
+    return parametros
+
+
+def _quantil(ordenados, q):
+    posicao = q * (len(ordenados) - 1)
+    abaixo = math.floor(posicao)
+    acima = min(abaixo + 1, len(ordenados) - 1)
+    fracao = posicao - abaixo
+    return ordenados[abaixo] * (1 - fracao) + ordenados[acima] * fracao
@@ -0,0 +1,250 @@
+from database import db
+from flask import request
+from models import Atividade, DivisaoBandeira, Loja, Planejamento
+from sqlalchemy import and_, or_
+from datetime import datetime, timedelta
+import base64
+import json
+
+# Parâmetros das listagens que não são filtros
+PARAMETROS_RESERVADOS = {'fields', 'expand', 'sort', 'q', 'limit', 'after'}
+
+LIMITE_MAXIMO = 1000
+
+
+class Filtros:
+    """
+    Especificação de consulta das listagens /api, só com colunas permitidas.
+
+    ?<coluna>=v1,v2            igualdade (ou IN) nas colunas de `filtros`
+    ?<data>_de=...&<data>_ate= intervalo nas colunas de `datas`, em ISO 8601;
+                               `_ate` com data sem hora inclui o dia inteiro
+    ?q=texto                   busca sem distinção de maiúsculas em `busca`
+    ?sort=-a,b                 ordenação pelas colunas de `ordenacoes`
+    ?limit=n&after=<cursor>    paginação por keyset; o próximo cursor vem
+                               no header X-Next-Cursor
+
+    Tudo vira WHERE/ORDER BY/LIMIT no SQL; parâmetros fora da lista geram
+    ValueError.
+    """
+
+    def __init__(self, modelo, filtros=(), datas=(), busca=(), ordenacoes=()):
+        self.chave = modelo.__mapper__.primary_key[0]
+        self.filtros = {atributo.key: _coluna(atributo) for atributo in filtros}
+        self.datas = {atributo.key: _coluna(atributo) for atributo in datas}
+        self.busca = [_coluna(atributo) for atributo in busca]
+        self.ordenacoes = {atributo.key: _coluna(atributo) for atributo in ordenacoes}
+
+    def da_requisicao(self):
+        return self.consulta(request.args)
+
+    def consulta(self, args):
+        """Monta a Consulta a partir dos parâmetros (um MultiDict ou dict)."""
+        condicoes = []
+
+        for nome in args:
+            if nome in PARAMETROS_RESERVADOS:
+                continue
+            valor = args.get(nome)
+
+            if nome in self.filtros:
+                coluna = self.filtros[nome]
+                valores = [_converter(coluna, v.strip()) for v in valor.split(',') if v.strip()]
+                if len(valores) == 1:
+                    condicoes.append(coluna == valores[0])
+                elif valores:
+                    condicoes.append(coluna.in_(valores))
+            elif nome.endswith('_de') and nome[:-3] in self.datas:
+                coluna = self.datas[nome[:-3]]
+                condicoes.append(coluna >= _converter(coluna, valor))
+            elif nome.endswith('_ate') and nome[:-4] in self.datas:
+                coluna = self.datas[nome[:-4]]
+                limite = _converter(coluna, valor)
+                if len(valor) == 10:
+                    condicoes.append(coluna < limite + timedelta(days=1))
+                else:
+                    condicoes.append(coluna <= limite)
+            else:
+                raise ValueError(
+                    f'Parâmetro inválido: {nome}. Filtros disponíveis: '
+                    f'{", ".join(self._parametros())}'
+                )
+
+        texto = args.get('q', '').strip()
+        if texto:
+            if not self.busca:
+                raise ValueError('Esta listagem não aceita busca (q)')
+            condicoes.append(or_(*(
+                coluna.icontains(texto, autoescape=True) for coluna in self.busca
+            )))
+
+        ordem = []
+        for nome in (args.get('sort') or '').split(','):
+            nome = nome.strip()
+            if not nome:
+                continue
+            desc = nome.startswith('-')
+            nome = nome.lstrip('-+')
+            if nome not in self.ordenacoes:
+                raise ValueError(
+                    f'Ordenação inválida: {nome}. Disponíveis: {", ".join(self.ordenacoes)}'
+                )
+            ordem.append((self.ordenacoes[nome], desc))
+
+        limit = args.get('limit')
+        if limit is not None:
+            try:
+                limit = max(1, min(int(limit), LIMITE_MAXIMO))
+            except ValueError:
+                raise ValueError('limit deve ser um número inteiro')
+
+        return Consulta(self.chave, condicoes, ordem, limit, args.get('after'))
+
+    def _parametros(self):
+        return list(self.filtros) + [
+            f'{nome}{sufixo}' for nome in self.datas for sufixo in ('_de', '_ate')
+        ]
+
+
+class Consulta:
+    """Filtros, ordenação e página já validados de uma requisição."""
+
+    def __init__(self, chave, condicoes, ordem, limit=None, after=None):
+        self.chave = chave
+        self.condicoes = condicoes
+        # A chave primária desempata a ordenação e fecha o cursor; colunas
+        # depois dela (ou repetidas) não mudam a ordem
+        self.ordem = []
+        for coluna, desc in ordem:
+            if any(coluna is anterior for anterior, _ in self.ordem):
+                continue
+            self.ordem.append((coluna, desc))
+            if coluna is chave:
+                break
+        else:
+            self.ordem.append((chave, False))
+        self.limit = limit
+        self.after = self._ler_cursor(after) if after else None
+
+    def aplicar(self, query):
+        """Aplica WHERE, ORDER BY, cursor e LIMIT a um SELECT."""
+        # Colunas de ordenação entram no SELECT para montar o próximo cursor
+        query = query.add_columns(*(
+            coluna.label(f'_ordem_{i}') for i, (coluna, _) in enumerate(self.ordem)
+        ))
+
+        if self.condicoes:
+            query = query.where(*self.condicoes)
+        if self.after is not None:
+            query = query.where(self._depois_do_cursor())
+
+        for coluna, desc in self.ordem:
+            ordenacao = coluna.desc() if desc else coluna.asc()
+            # NULLs por último nas duas direções (o cursor depende disso)
+            query = query.order_by(ordenacao.nulls_last() if coluna.nullable else ordenacao)
+
+        if self.limit:
+            query = query.limit(self.limit)
+        return query
+
+    def listar(self, esquema, campos=None):
+        """(dicts do esquema, próximo cursor ou None)."""
+        rows = db.session.execute(self.aplicar(esquema.select(campos))).all()
+        proximo = None
+        if self.limit and len(rows) == self.limit:
+            proximo = self._cursor(rows[-1])
+        return esquema.linhas(rows, campos), proximo
+
+    def _cursor(self, row):
+        valores = [getattr(row, f'_ordem_{i}') for i in range(len(self.ordem))]
+        valores = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+        return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip('=')
+
+    def _ler_cursor(self, cursor):
+        try:
+            valores = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        except ValueError:
+            raise ValueError('Cursor inválido')
+        if not isinstance(valores, list) or len(valores) != len(self.ordem):
+            raise ValueError('Cursor inválido para esta ordenação')
+        if any(isinstance(valor, (list, dict)) for valor in valores):
+            raise ValueError('Cursor inválido')
+        # Valores sempre convertidos para o tipo da coluna: um cursor
+        # adulterado vira 400, não erro do banco
+        return [
+            _converter(coluna, str(valor)) if valor is not None else None
+            for (coluna, _), valor in zip(self.ordem, valores)
+        ]
+
+    def _depois_do_cursor(self):
+        """Linhas estritamente depois do cursor na ordem (com NULLs por último)."""
+        alternativas = []
+        iguais = []
+        for (coluna, desc), valor in zip(self.ordem, self.after):
+            if valor is None:
+                # Só NULLs empatam; nada vem depois deles
+                iguais.append(coluna.is_(None))
+                continue
+            depois = coluna < valor if desc else coluna > valor
+            if coluna.nullable:
+                depois = or_(depois, coluna.is_(None))
+            alternativas.append(and_(*iguais, depois))
+            iguais.append(coluna == valor)
+        return or_(*alternativas)
+
+
+def _coluna(atributo):
+    return atributo.property.columns[0]
+
+
+def _converter(coluna, texto):
+    """Converte o texto do parâmetro para o tipo Python da coluna."""
+    tipo = coluna.type.python_type
+    try:
+        if tipo is datetime:
+            return datetime.fromisoformat(texto)
+        return tipo(texto)
+    except ValueError:
+        raise ValueError(f'Valor inválido para {coluna.key}: {texto}')
+
+
+LOJA = Filtros(
+    Loja,
+    filtros=[Loja.id_loja, Loja.id_divisao_bandeira, Loja.id_grupo_trabalho],
+    busca=[Loja.nome_loja, Loja.endereco],
+    ordenacoes=[Loja.id_loja, Loja.nome_loja, Loja.qtd_sku, Loja.qtd_pessoas, Loja.created_at],
+)
+
+ATIVIDADE = Filtros(
+    Atividade,
+    filtros=[Atividade.id_atividade],
+    busca=[Atividade.titulo, Atividade.descricao],
+    ordenacoes=[Atividade.id_atividade, Atividade.titulo, Atividade.created_at],
+)
+
+PLANEJAMENTO = Filtros(
+    Planejamento,
+    filtros=[
+        Planejamento.id_planejamento,
+        Planejamento.id_grupo_trabalho,
+        Planejamento.id_atividade,
+        Planejamento.status,
+    ],
+    datas=[Planejamento.data_ini, Planejamento.data_fim],
+    busca=[Planejamento.titulo],
+    ordenacoes=[
+        Planejamento.id_planejamento,
+        Planejamento.data_ini,
+        Planejamento.data_fim,
+        Planejamento.titulo,
+        Planejamento.status,
+        Planejamento.created_at,
+    ],
+)
+
+DIVISAO = Filtros(
+    DivisaoBandeira,
+    filtros=[DivisaoBandeira.id_bandeira_divisao],
+    busca=[DivisaoBandeira.nome_bandeira, DivisaoBandeira.contato],
+    ordenacoes=[DivisaoBandeira.id_bandeira_divisao, DivisaoBandeira.nome_bandeira, DivisaoBandeira.created_at],
+)
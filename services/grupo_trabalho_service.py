@@ -0,0 +1,115 @@
+from database import db
+from models import GrupoTrabalho, Loja, Rollup
+from models.rollup import ESCOPO_GRUPO
+from sqlalchemy import func, select
+from collections import defaultdict
+
+
+def _total_do_grupo(coluna_rollup, agregado_lojas):
+    """
+    Total do grupo, correlacionado a GrupoTrabalho: o da linha de rollup
+    ou, para grupos ainda sem ela (banco migrado antes de
+    `flask recalcular-rollups`, por exemplo), o calculado das lojas.
+    """
+    return func.coalesce(
+        select(coluna_rollup)
+        .where(
+            Rollup.escopo == ESCOPO_GRUPO,
+            Rollup.id_referencia == GrupoTrabalho.id_grupo_trabalho,
+        )
+        .scalar_subquery(),
+        select(agregado_lojas)
+        .where(Loja.id_grupo_trabalho == GrupoTrabalho.id_grupo_trabalho)
+        .scalar_subquery(),
+    )
+
+
+# Usados aqui e nos campos de esquemas.GRUPO (/grupos_trabalho/api), para
+# que HTML e API mostrem os mesmos totais
+TOTAL_LOJAS = _total_do_grupo(Rollup.total_lojas, func.count(Loja.id_loja))
+TOTAL_PESSOAS = _total_do_grupo(Rollup.total_pessoas, func.coalesce(func.sum(Loja.qtd_pessoas), 0))
+
+
+def totais_por_grupo(ids=None):
+    """{id_grupo_trabalho: (total_lojas, total_pessoas)} em uma consulta."""
+    query = select(GrupoTrabalho.id_grupo_trabalho, TOTAL_LOJAS, TOTAL_PESSOAS)
+    if ids is not None:
+        query = query.where(GrupoTrabalho.id_grupo_trabalho.in_(ids))
+
+    return {
+        id_grupo: (total_lojas, total_pessoas)
+        for id_grupo, total_lojas, total_pessoas in db.session.execute(query)
+    }
+
+
+def lojas_info_por_grupo(ids):
+    """{id_grupo_trabalho: [lojas_info]} com uma única consulta de colunas."""
+    lojas = defaultdict(list)
+    if not ids:
+        return lojas
+
+    query = (
+        select(Loja.id_grupo_trabalho, Loja.id_loja, Loja.nome_loja, Loja.qtd_pessoas)
+        .where(Loja.id_grupo_trabalho.in_(ids))
+        .order_by(Loja.id_loja)
+    )
+    for row in db.session.execute(query):
+        lojas[row.id_grupo_trabalho].append({
+            'id': row.id_loja,
+            'nome': row.nome_loja,
+            'qtd_pessoas': row.qtd_pessoas
+        })
+    return lojas
+
+
+def serializar_grupos(grupos):
+    """
+    Serializa uma lista de grupos com número fixo de consultas.
+
+    O responsável já vem no JOIN do próprio grupo; totais e lojas_info são
+    buscados em uma consulta cada, independentemente do número de grupos.
+    """
+    ids = [grupo.id_grupo_trabalho for grupo in grupos]
+    totais = totais_por_grupo(ids) if ids else {}
+    lojas = lojas_info_por_grupo(ids)
+
+    return [
+        grupo.to_dict(
+            total_lojas=totais.get(grupo.id_grupo_trabalho, (0, 0))[0],
+            total_pessoas=totais.get(grupo.id_grupo_trabalho, (0, 0))[1],
+            lojas_info=lojas[grupo.id_grupo_trabalho]
+        )
+        for grupo in grupos
+    ]
+
+
+def serializar_grupo(grupo):
+    return serializar_grupos([grupo])[0]
+
+
+def grupos_por_responsavel(ids):
+    """{id_responsavel: [ids dos grupos]} com uma única consulta."""
+    grupos = defaultdict(list)
+    if not ids:
+        return grupos
+
+    query = (
+        select(GrupoTrabalho.id_responsavel, GrupoTrabalho.id_grupo_trabalho)
+        .where(GrupoTrabalho.id_responsavel.in_(ids))
+        .order_by(GrupoTrabalho.id_grupo_trabalho)
+    )
+    for id_responsavel, id_grupo in db.session.execute(query):
+        grupos[id_responsavel].append(id_grupo)
+    return grupos
+
+
+def serializar_responsaveis(responsaveis):
+    grupos = grupos_por_responsavel([r.id_responsavel for r in responsaveis])
+    return [
+        responsavel.to_dict(grupos_trabalho=grupos[responsavel.id_responsavel])
+        for responsavel in responsaveis
+    ]
+
+
+def serializar_responsavel(responsavel):
+    return serializar_responsaveis([responsavel])[0]
@@ -0,0 +1,115 @@
+from database import db
+from models import CheckpointAtividade, Loja, GrupoTrabalho, Planejamento
+from services.dashboard_service import consulta_acompanhamento
+from sqlalchemy import func, select
+import json
+
+
+def consultas_monitoradas():
+    """
+    Consultas quentes verificadas pelo relatório, com ids reais do banco.
+
+    Cada item é (nome, statement).
+    """
+    id_divisao, id_grupo = db.session.execute(
+        select(Loja.id_divisao_bandeira, Loja.id_grupo_trabalho)
+        .where(Loja.id_grupo_trabalho.isnot(None))
+        .limit(1)
+    ).first() or (1, 1)
+    id_loja = db.session.scalar(select(func.min(Loja.id_loja))) or 1
+    id_planejamento = db.session.scalar(select(func.min(Planejamento.id_planejamento))) or 1
+
+    return [
+        (
+            'gestao.dashboard (acompanhamento por divisão e grupo)',
+            consulta_acompanhamento(id_divisao, id_grupo).statement,
+        ),
+        (
+            'checkpoint_atividade.index (listagem por nome)',
+            select(CheckpointAtividade.id_checkpoint_atividade)
+            .order_by(CheckpointAtividade.nome_checkpoint, CheckpointAtividade.data_ini.desc())
+            .limit(50),
+        ),
+        (
+            'planejamento (recontagem de status)',
+            select(func.count())
+            .where(
+                CheckpointAtividade.id_planejamento == id_planejamento,
+                CheckpointAtividade.status == 'Concluído'
+            ),
+        ),
+        (
+            'rollup (checkpoints da loja por status)',
+            select(CheckpointAtividade.status, func.count())
+            .where(CheckpointAtividade.id_loja == id_loja)
+            .group_by(CheckpointAtividade.status),
+        ),
+        (
+            'dashboard (grupos da divisão)',
+            select(GrupoTrabalho.id_grupo_trabalho)
+            .join(Loja, Loja.id_grupo_trabalho == GrupoTrabalho.id_grupo_trabalho)
+            .where(Loja.id_divisao_bandeira == id_divisao)
+            .distinct(),
+        ),
+    ]
+
+
+def gerar_relatorio():
+    """
+    Executa EXPLAIN nas consultas monitoradas e aponta varreduras sequenciais.
+
+    Suporta PostgreSQL (EXPLAIN FORMAT JSON) e SQLite (EXPLAIN QUERY PLAN).
+    """
+    connection = db.session.connection()
+    dialeto = connection.dialect.name
+    relatorio = []
+
+    for nome, statement in consultas_monitoradas():
+        compilado = statement.compile(dialect=connection.dialect)
+        if compilado.positional:
+            parametros = tuple(compilado.params[k] for k in compilado.positiontup)
+        else:
+            parametros = compilado.params
+
+        if dialeto == 'postgresql':
+            plano = connection.exec_driver_sql(
+                f'EXPLAIN (FORMAT JSON) {compilado}', parametros
+            ).scalar()
+            if isinstance(plano, str):
+                plano = json.loads(plano)
+            varreduras = _seq_scans_postgres(plano[0]['Plan'])
+            linhas_plano = [json.dumps(plano[0]['Plan'], ensure_ascii=False)]
+        elif dialeto == 'sqlite':
+            linhas_plano = [
+                row[-1] for row in connection.exec_driver_sql(
+                    f'EXPLAIN QUERY PLAN {compilado}', parametros
+                )
+            ]
+            varreduras = [
+                detalhe for detalhe in linhas_plano
+                if detalhe.startswith('SCAN ') and 'USING' not in detalhe
+            ]
+        else:
+            linhas_plano = [
+                str(row[0]) for row in connection.exec_driver_sql(
+                    f'EXPLAIN {compilado}', parametros
+                )
+            ]
+            varreduras = []
+
+        relatorio.append({
+            'consulta': nome,
+            'varreduras_sequenciais': varreduras,
+            'plano': linhas_plano,
+        })
+
+    return relatorio
+
+
+def _seq_scans_postgres(no):
+    encontrados = []
+    if no.get('Node Type') == 'Seq Scan':
+        encontrados.append(no.get('Relation Name'))
+    for filho in no.get('Plans', []):
+        encontrados.extend(_seq_scans_postgres(filho))
+    return encontrados
@@ -0,0 +1,102 @@
+from datetime import datetime
+import math
+
+_EPOCA = datetime(1970, 1, 1)
+
+
+def epoca(data, padrao=None):
+    """datetime (UTC, sem fuso) em segundos desde 1970; `padrao` se None."""
+    if data is None:
+        return padrao
+    return (data - _EPOCA).total_seconds()
+
+
+class ArvoreIntervalos:
+    """
+    Árvore de intervalos centrada, estática, para consultas por janela.
+
+    Construída uma vez a partir de (inicio, fim, valor) com pontas numéricas
+    (use `epoca` para datas; None vira aberto). `sobrepostos(de, ate)`
+    devolve os valores cujos intervalos fechados cruzam [de, ate] em
+    O(log n + k).
+    """
+
+    __slots__ = ('_raiz', '_tamanho')
+
+    def __init__(self, intervalos):
+        itens = []
+        for inicio, fim, valor in intervalos:
+            inicio = -math.inf if inicio is None else inicio
+            # Fim anterior ao início é tratado como o próprio início
+            fim = math.inf if fim is None else max(fim, inicio)
+            itens.append((inicio, fim, valor))
+        self._tamanho = len(itens)
+        self._raiz = _construir(itens)
+
+    def __len__(self):
+        return self._tamanho
+
+    def sobrepostos(self, de=None, ate=None):
+        de = -math.inf if de is None else de
+        ate = math.inf if ate is None else ate
+
+        resultado = []
+        pilha = [self._raiz]
+        while pilha:
+            no = pilha.pop()
+            if no is None:
+                continue
+            centro, por_inicio, por_fim, esquerda, direita = no
+
+            if ate < centro:
+                # Janela à esquerda do centro: basta o início ser <= ate
+                for inicio, _, valor in por_inicio:
+                    if inicio > ate:
+                        break
+                    resultado.append(valor)
+                pilha.append(esquerda)
+            elif de > centro:
+                # Janela à direita do centro: basta o fim ser >= de
+                for _, fim, valor in por_fim:
+                    if fim < de:
+                        break
+                    resultado.append(valor)
+                pilha.append(direita)
+            else:
+                resultado.extend(valor for _, _, valor in por_inicio)
+                pilha.append(esquerda)
+                pilha.append(direita)
+        return resultado
+
+
+# Pontas amostradas por nó para escolher o centro
+_AMOSTRA = 64
+
+
+def _construir(itens):
+    """Nó = (centro, por início asc, por fim desc, esquerda, direita)."""
+    if not itens:
+        return None
+
+    # Mediana de uma amostra das pontas finitas: divide bem sem ordenar
+    # todas as pontas em cada nível
+    passo = max(1, len(itens) // _AMOSTRA)
+    pontos = sorted(
+        ponta
+        for inicio, fim, _ in itens[::passo]
+        for ponta in (inicio, fim)
+        if -math.inf < ponta < math.inf
+    )
+    centro = pontos[len(pontos) // 2] if pontos else 0
+
+    esquerda = [item for item in itens if item[1] < centro]
+    direita = [item for item in itens if item[0] > centro]
+    meio = [item for item in itens if item[0] <= centro <= item[1]]
+
+    return (
+        centro,
+        sorted(meio, key=lambda item: item[0]),
+        sorted(meio, key=lambda item: item[1], reverse=True),
+        _construir(esquerda),
+        _construir(direita),
+    )
@@ -0,0 +1,305 @@
+from database import db
+from cache import cache
+from models import Loja, DivisaoBandeira, GrupoTrabalho, Rollup
+from models.rollup import ESCOPO_GRUPO, ESCOPO_DIVISAO
+from sqlalchemy import bindparam, or_, select
+from datetime import datetime
+import csv
+import io
+import json
+import time
+
+# Linhas por lote de INSERT/UPDATE na importação
+IMPORT_BATCH_SIZE = 500
+
+# Colunas do arquivo de importação/exportação (divisão e grupo por nome)
+COLUNAS_ARQUIVO = [
+    'id_loja',
+    'nome_loja',
+    'endereco',
+    'qtd_sku',
+    'qtd_pessoas',
+    'divisao_bandeira',
+    'grupo_trabalho',
+]
+
+
+# =====================================================
+# LEITURA INCREMENTAL
+# =====================================================
+
+def ler_csv(stream, encoding='utf-8'):
+    """Gera um dict por linha de um CSV (arquivo binário ou texto)."""
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding=encoding, newline='')
+    for linha in csv.DictReader(stream):
+        yield linha
+
+
+def ler_jsonl(stream, encoding='utf-8'):
+    """Gera um dict por linha de um arquivo JSON Lines."""
+    for linha in stream:
+        if isinstance(linha, bytes):
+            linha = linha.decode(encoding)
+        linha = linha.strip()
+        if linha:
+            yield json.loads(linha)
+
+
+# =====================================================
+# IMPORTAÇÃO
+# =====================================================
+
+def importar_lojas(linhas, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Importa lojas em lotes, inserindo novas e atualizando existentes.
+
+    A loja é identificada por `id_loja`, quando informado, ou pelo par
+    (nome_loja, divisão). Divisão e grupo podem vir por id ou por nome
+    (`divisao_bandeira` / `grupo_trabalho`), resolvidos e validados por
+    mapas carregados uma única vez. Na atualização só as colunas presentes
+    na linha são alteradas. Não faz commit.
+    """
+    inicio = time.perf_counter()
+
+    divisoes = {
+        nome: id_divisao
+        for id_divisao, nome in db.session.execute(
+            select(DivisaoBandeira.id_bandeira_divisao, DivisaoBandeira.nome_bandeira)
+        )
+    }
+    grupos = {
+        nome: id_grupo
+        for id_grupo, nome in db.session.execute(
+            select(GrupoTrabalho.id_grupo_trabalho, GrupoTrabalho.nome_grupo)
+        )
+    }
+
+    # Ids numéricos informados no arquivo precisam existir (evita erro de FK no flush)
+    ids_validos = {
+        'id_divisao_bandeira': set(divisoes.values()),
+        'id_grupo_trabalho': set(grupos.values()),
+    }
+
+    resumo = {'lidas': 0, 'inseridas': 0, 'atualizadas': 0, 'erros': []}
+    lote = []
+
+    for numero, linha in enumerate(linhas, start=1):
+        resumo['lidas'] += 1
+        try:
+            lote.append((numero, _normalizar_linha(linha, divisoes, grupos, ids_validos)))
+        except (ValueError, TypeError) as e:
+            resumo['erros'].append({'linha': numero, 'erro': str(e)})
+            continue
+
+        if len(lote) >= batch_size:
+            _gravar_lote(lote, resumo)
+            lote = []
+
+    if lote:
+        _gravar_lote(lote, resumo)
+
+    tempo = time.perf_counter() - inicio
+    resumo['tempo_s'] = round(tempo, 3)
+    resumo['linhas_por_segundo'] = round(resumo['lidas'] / tempo, 1) if tempo else None
+    return resumo
+
+
+def _normalizar_linha(linha, divisoes, grupos, ids_validos):
+    """
+    Colunas da loja presentes na linha, com divisão e grupo resolvidos.
+
+    `id_loja` vem sempre (None para identificar por nome e divisão, que
+    passam a ser obrigatórios); as demais só quando a linha traz a coluna.
+    """
+    loja = {'id_loja': _inteiro(linha.get('id_loja'))}
+
+    if 'nome_loja' in linha or loja['id_loja'] is None:
+        loja['nome_loja'] = (linha.get('nome_loja') or '').strip()
+        if not loja['nome_loja']:
+            raise ValueError('nome_loja é obrigatório')
+
+    if 'endereco' in linha:
+        loja['endereco'] = linha['endereco'] or None
+    for coluna in ('qtd_sku', 'qtd_pessoas'):
+        if coluna in linha:
+            loja[coluna] = _inteiro(linha[coluna]) or 0
+
+    id_divisao = _referencia(
+        linha, 'id_divisao_bandeira', 'divisao_bandeira', divisoes, ids_validos, 'Divisão/bandeira não encontrada'
+    )
+    if id_divisao is not None:
+        loja['id_divisao_bandeira'] = id_divisao
+    elif loja['id_loja'] is None or 'id_divisao_bandeira' in linha or 'divisao_bandeira' in linha:
+        raise ValueError(
+            f'Divisão/bandeira não encontrada: {(linha.get("divisao_bandeira") or "").strip()!r}'
+        )
+
+    if 'id_grupo_trabalho' in linha or 'grupo_trabalho' in linha:
+        loja['id_grupo_trabalho'] = _referencia(
+            linha, 'id_grupo_trabalho', 'grupo_trabalho', grupos, ids_validos, 'Grupo de trabalho não encontrado'
+        )
+
+    return loja
+
+
+def _referencia(linha, coluna_id, coluna_nome, ids_por_nome, ids_validos, erro):
+    """Id da coluna numérica (se existir) ou do nome; None se nenhum foi informado."""
+    id_referencia = _inteiro(linha.get(coluna_id))
+    if id_referencia is not None:
+        if id_referencia not in ids_validos[coluna_id]:
+            raise ValueError(f'{erro}: {coluna_id}={id_referencia}')
+        return id_referencia
+
+    nome = (linha.get(coluna_nome) or '').strip()
+    if not nome:
+        return None
+    if nome not in ids_por_nome:
+        raise ValueError(f'{erro}: {nome!r}')
+    return ids_por_nome[nome]
+
+
+def _inteiro(valor):
+    if valor is None or valor == '':
+        return None
+    return int(valor)
+
+
+def _gravar_lote(lote, resumo):
+    """Resolve as lojas existentes do lote em uma consulta e grava em lote."""
+    tabela = Loja.__table__
+    connection = db.session.connection()
+
+    ids = {l['id_loja'] for _, l in lote if l['id_loja'] is not None}
+    nomes = {l['nome_loja'] for _, l in lote if l['id_loja'] is None}
+
+    existentes_por_id = set()
+    existentes_por_nome = {}
+    # Grupos e divisões cujo rollup é recalculado ao final do lote
+    afetados = {ESCOPO_GRUPO: set(), ESCOPO_DIVISAO: set()}
+    condicoes = []
+    if ids:
+        condicoes.append(tabela.c.id_loja.in_(ids))
+    if nomes:
+        condicoes.append(tabela.c.nome_loja.in_(nomes))
+    for row in connection.execute(
+        select(
+            tabela.c.id_loja,
+            tabela.c.nome_loja,
+            tabela.c.id_divisao_bandeira,
+            tabela.c.id_grupo_trabalho
+        )
+        .where(or_(*condicoes))
+    ):
+        afetados[ESCOPO_GRUPO].add(row.id_grupo_trabalho)
+        afetados[ESCOPO_DIVISAO].add(row.id_divisao_bandeira)
+        existentes_por_id.add(row.id_loja)
+        existentes_por_nome[(row.nome_loja, row.id_divisao_bandeira)] = row.id_loja
+
+    agora = datetime.utcnow()
+    # Novas lojas por (nome, divisão): repetições no mesmo lote prevalecem
+    inserir = {}
+    # Atualizações agrupadas pelas colunas presentes (um UPDATE em lote por formato)
+    atualizar = {}
+
+    for numero, loja in lote:
+        id_loja = loja.pop('id_loja')
+        if 'id_grupo_trabalho' in loja:
+            afetados[ESCOPO_GRUPO].add(loja['id_grupo_trabalho'])
+        if 'id_divisao_bandeira' in loja:
+            afetados[ESCOPO_DIVISAO].add(loja['id_divisao_bandeira'])
+
+        if id_loja is not None and id_loja not in existentes_por_id:
+            resumo['erros'].append({'linha': numero, 'erro': f'Loja não encontrada: id_loja={id_loja}'})
+            continue
+
+        if id_loja is None:
+            id_loja = existentes_por_nome.get(
+                (loja['nome_loja'], loja['id_divisao_bandeira'])
+            )
+
+        if id_loja is None:
+            chave = (loja['nome_loja'], loja['id_divisao_bandeira'])
+            inserir[chave] = {
+                'endereco': None,
+                'qtd_sku': 0,
+                'qtd_pessoas': 0,
+                'id_grupo_trabalho': None,
+                **loja,
+                'created_at': agora,
+                'updated_at': agora,
+            }
+        else:
+            atualizar.setdefault(tuple(sorted(loja)), []).append({
+                **{f'b_{k}': v for k, v in loja.items()},
+                'b_id_loja': id_loja,
+                'b_updated_at': agora,
+            })
+
+    if inserir:
+        connection.execute(tabela.insert(), list(inserir.values()))
+
+    for colunas, linhas in atualizar.items():
+        connection.execute(
+            tabela.update()
+            .where(tabela.c.id_loja == bindparam('b_id_loja'))
+            .values(
+                updated_at=bindparam('b_updated_at'),
+                **{coluna: bindparam(f'b_{coluna}') for coluna in colunas}
+            ),
+            linhas
+        )
+
+    Rollup.recalcular(connection, afetados)
+    cache.marcar_alterado(db.session, 'loja')
+
+    resumo['inseridas'] += len(inserir)
+    resumo['atualizadas'] += sum(len(linhas) for linhas in atualizar.values())
+
+
+# =====================================================
+# EXPORTAÇÃO
+# =====================================================
+
+# Linhas lidas por vez do cursor do servidor na exportação
+EXPORT_BATCH_SIZE = 1000
+
+
+def iterar_exportacao():
+    """Itera as lojas (com nomes de divisão e grupo) direto do cursor do servidor."""
+    query = (
+        select(
+            Loja.id_loja,
+            Loja.nome_loja,
+            Loja.endereco,
+            Loja.qtd_sku,
+            Loja.qtd_pessoas,
+            DivisaoBandeira.nome_bandeira.label('divisao_bandeira'),
+            GrupoTrabalho.nome_grupo.label('grupo_trabalho'),
+        )
+        .outerjoin(DivisaoBandeira, DivisaoBandeira.id_bandeira_divisao == Loja.id_divisao_bandeira)
+        .outerjoin(GrupoTrabalho, GrupoTrabalho.id_grupo_trabalho == Loja.id_grupo_trabalho)
+        .order_by(Loja.id_loja)
+        .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    )
+    for row in db.session.execute(query):
+        yield row._asdict()
+
+
+def exportar_csv(linhas):
+    """Gera o CSV em pedaços de texto, começando pelo cabeçalho."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUNAS_ARQUIVO)
+    writer.writeheader()
+    for linha in linhas:
+        writer.writerow(linha)
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def exportar_jsonl(linhas):
+    for linha in linhas:
+        yield json.dumps(linha, ensure_ascii=False) + '\n'
@@ -0,0 +1,85 @@
+from database import db
+from cache import cache
+from models import CheckpointAtividade, Loja, Planejamento, Rollup
+from models.rollup import escopos_da_loja
+from models.planejamento import STATUS_CONTADORES
+from sqlalchemy import func, select
+
+EXCLUSAO_LOTE = 5000
+# Até quantos checkpoints a exclusão roda na própria requisição, sem job
+EXCLUSAO_SINCRONA_MAX = 500
+
+
+def contar_checkpoints(id_planejamento):
+    return db.session.scalar(
+        select(func.count())
+        .select_from(CheckpointAtividade)
+        .where(CheckpointAtividade.id_planejamento == id_planejamento)
+    )
+
+
+def excluir_planejamento(id_planejamento, lote=EXCLUSAO_LOTE, progresso=None):
+    """
+    Exclui o planejamento e seus checkpoints em lotes.
+
+    Equivale ao cascade do ORM, mas apaga os checkpoints com DELETE por
+    lote e aplica os deltas de rollup agregados, sem carregar os objetos.
+    Cada lote também recalcula os contadores e o status do planejamento,
+    então um commit no meio (via `progresso(excluidos, total)`, chamado
+    após cada lote) deixa planejamento e rollups consistentes mesmo que a
+    exclusão falhe depois. Retorna o número de checkpoints excluídos.
+    """
+    if db.session.get(Planejamento, id_planejamento) is None:
+        raise ValueError('Planejamento não encontrado')
+
+    checkpoints = CheckpointAtividade.__table__
+    lojas = Loja.__table__
+
+    total = contar_checkpoints(id_planejamento)
+    excluidos = 0
+
+    while True:
+        connection = db.session.connection()
+        linhas = connection.execute(
+            select(
+                checkpoints.c.id_checkpoint_atividade,
+                checkpoints.c.status,
+                lojas.c.id_grupo_trabalho,
+                lojas.c.id_divisao_bandeira,
+            )
+            .select_from(checkpoints.join(lojas, lojas.c.id_loja == checkpoints.c.id_loja))
+            .where(checkpoints.c.id_planejamento == id_planejamento)
+            .limit(lote)
+        ).all()
+        if not linhas:
+            break
+
+        deltas = {}
+        for linha in linhas:
+            coluna = STATUS_CONTADORES.get(linha.status)
+            if not coluna:
+                continue
+            for escopo in escopos_da_loja(linha.id_grupo_trabalho, linha.id_divisao_bandeira):
+                por_coluna = deltas.setdefault(escopo, {})
+                por_coluna[coluna] = por_coluna.get(coluna, 0) - 1
+
+        connection.execute(
+            checkpoints.delete().where(
+                checkpoints.c.id_checkpoint_atividade.in_(
+                    [linha.id_checkpoint_atividade for linha in linhas]
+                )
+            )
+        )
+        Rollup.aplicar_deltas(connection, deltas)
+        Planejamento.recalcular_contadores(connection, [id_planejamento])
+        cache.marcar_alterado(db.session, 'checkpoint_atividade', 'planejamento', 'periodo')
+
+        excluidos += len(linhas)
+        if progresso:
+            progresso(excluidos, total)
+
+    # Sem checkpoints restantes o cascade do ORM não tem o que carregar
+    db.session.delete(db.session.get(Planejamento, id_planejamento))
+    db.session.flush()
+
+    return excluidos
@@ -0,0 +1,64 @@
+from database import db
+from cache import cache
+from models import DivisaoBandeira, GrupoTrabalho, Responsavel, Atividade
+
+# Listas de referência usadas nos formulários. Guardadas no cache como
+# dicts simples (os templates acessam os mesmos nomes de atributo).
+
+
+def listar_divisoes():
+    return cache.memoize(
+        ['divisao_bandeira'], 'referencia:divisoes',
+        lambda: _linhas(
+            db.session.query(
+                DivisaoBandeira.id_bandeira_divisao,
+                DivisaoBandeira.nome_bandeira,
+            )
+            .order_by(DivisaoBandeira.nome_bandeira)
+        )
+    )
+
+
+def listar_grupos():
+    return cache.memoize(
+        ['grupo_trabalho'], 'referencia:grupos',
+        lambda: _linhas(
+            db.session.query(
+                GrupoTrabalho.id_grupo_trabalho,
+                GrupoTrabalho.nome_grupo,
+                GrupoTrabalho.id_responsavel,
+            )
+            .order_by(GrupoTrabalho.nome_grupo)
+        )
+    )
+
+
+def listar_responsaveis():
+    return cache.memoize(
+        ['responsavel'], 'referencia:responsaveis',
+        lambda: _linhas(
+            db.session.query(
+                Responsavel.id_responsavel,
+                Responsavel.nome,
+                Responsavel.contato,
+            )
+            .order_by(Responsavel.nome)
+        )
+    )
+
+
+def listar_atividades():
+    return cache.memoize(
+        ['atividade'], 'referencia:atividades',
+        lambda: _linhas(
+            db.session.query(
+                Atividade.id_atividade,
+                Atividade.titulo,
+            )
+            .order_by(Atividade.titulo)
+        )
+    )
+
+
+def _linhas(query):
+    return [row._asdict() for row in query]
@@ -0,0 +1,214 @@
+from database import db
+from flask import Response, request
+from sqlalchemy import select
+from sqlalchemy.sql.elements import Label
+from collections import defaultdict
+import json
+
+# Encoder JSON rápido opcional: com orjson instalado, datas saem no mesmo
+# formato de isoformat() sem passar por Python
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(dados):
+    """Serializa para JSON (bytes), com orjson quando disponível."""
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':'), default=_padrao).encode('utf-8')
+
+
+def _padrao(valor):
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    raise TypeError(f'{type(valor).__name__} não é serializável em JSON')
+
+
+def resposta_json(dados, status=200, headers=None):
+    """Equivalente a jsonify usando `dumps`."""
+    return Response(dumps(dados), status=status, headers=headers, mimetype='application/json')
+
+
+class Campo:
+    """
+    Campo de saída de um esquema.
+
+    Sem `valor`, o campo é a própria coluna (rotulada com o nome do campo).
+    Campos compostos recebem colunas já rotuladas e `valor(row)`, que monta
+    o valor a partir delas; `joins` lista as junções do esquema necessárias.
+    """
+
+    def __init__(self, *colunas, valor=None, joins=()):
+        self.colunas = colunas
+        self.valor = valor
+        self.joins = joins
+
+
+class Colecao:
+    """
+    Coleção um-para-muitos de um esquema.
+
+    Carregada em uma segunda consulta com `chave IN (ids da página)`, como
+    o selectinload, mas só com as colunas pedidas. `colunas` é um dict
+    {nome: coluna} (lista de dicts) ou uma única coluna (lista de valores).
+    """
+
+    def __init__(self, chave, colunas, ordem):
+        self.chave = chave
+        self.colunas = colunas
+        self.ordem = ordem
+
+    def carregar(self, ids):
+        """{id do pai: [itens]} para os ids informados."""
+        por_pai = defaultdict(list)
+        if not ids:
+            return por_pai
+
+        if isinstance(self.colunas, dict):
+            colunas = [coluna.label(nome) for nome, coluna in self.colunas.items()]
+        else:
+            colunas = [self.colunas.label('valor')]
+
+        query = (
+            select(self.chave.label('id_pai'), *colunas)
+            .where(self.chave.in_(ids))
+            .order_by(self.ordem)
+        )
+        for row in db.session.execute(query):
+            if isinstance(self.colunas, dict):
+                por_pai[row.id_pai].append({nome: getattr(row, nome) for nome in self.colunas})
+            else:
+                por_pai[row.id_pai].append(row.valor)
+        return por_pai
+
+
+class Esquema:
+    """
+    Serialização dirigida por esquema, direto das tuplas do SQL.
+
+    Seleciona apenas as colunas e junções dos campos pedidos (`?fields=`)
+    e monta os dicts sem instanciar objetos do ORM. Relacionamentos fora
+    da saída padrão entram com `?expand=`. Datas vão como datetime e são
+    convertidas pelo encoder (ver `dumps`).
+    """
+
+    def __init__(self, modelo, campos, joins=None, expansoes=None):
+        self.modelo = modelo
+        self.campos = campos
+        self.joins = joins or {}
+        self.expansoes = expansoes or {}
+        self.chave = modelo.__mapper__.primary_key[0]
+
+    def campos_pedidos(self, fields=None, expand=None):
+        """
+        {nome: campo} a partir de `fields` e `expand` ('a,b,c').
+
+        Sem `fields`, todos os campos padrão. Cada expansão é acrescentada
+        ao final ou substitui o campo de mesmo nome (p.ex. a referência
+        {id, nome} pelo objeto completo).
+        """
+        if fields:
+            nomes = _nomes(fields, self.campos, 'Campo(s) inválido(s)')
+            campos = {nome: self.campos[nome] for nome in nomes}
+        else:
+            campos = dict(self.campos)
+
+        for nome in _nomes(expand, self.expansoes, 'Expansão(ões) inválida(s)'):
+            campos[nome] = self.expansoes[nome]
+        return campos
+
+    def campos_da_requisicao(self):
+        return self.campos_pedidos(request.args.get('fields'), request.args.get('expand'))
+
+    def select(self, campos=None):
+        """SELECT só com as colunas e junções dos campos pedidos (e a chave)."""
+        campos = self._resolver(campos)
+
+        colunas = {self.chave.key: self.chave.label(self.chave.key)}
+        joins = []
+        for nome, campo in campos.items():
+            if isinstance(campo, Colecao):
+                continue
+            for coluna in campo.colunas:
+                # Colunas de campos compostos já vêm rotuladas no esquema
+                if isinstance(coluna, Label):
+                    colunas.setdefault(coluna.name, coluna)
+                else:
+                    colunas.setdefault(nome, coluna.label(nome))
+            for join in campo.joins:
+                if join not in joins:
+                    joins.append(join)
+
+        query = select(*colunas.values()).select_from(self.modelo)
+        for join in joins:
+            alvo, condicao = self.joins[join]
+            query = query.outerjoin(alvo, condicao)
+        return query
+
+    def linha(self, row, campos=None, colecoes=None):
+        """
+        Dict de uma linha. `colecoes` ({nome: {id: itens}}) é obrigatório
+        quando há campos Colecao; use `linhas` para carregá-las.
+        """
+        campos = self._resolver(campos)
+        item = {}
+        for nome, campo in campos.items():
+            if isinstance(campo, Colecao):
+                item[nome] = colecoes[nome].get(getattr(row, self.chave.key), [])
+            elif campo.valor:
+                item[nome] = campo.valor(row)
+            else:
+                item[nome] = getattr(row, nome)
+        return item
+
+    def linhas(self, rows, campos=None):
+        campos = self._resolver(campos)
+
+        colecoes = {}
+        if any(isinstance(campo, Colecao) for campo in campos.values()):
+            rows = list(rows)
+            ids = [getattr(row, self.chave.key) for row in rows]
+            colecoes = {
+                nome: campo.carregar(ids)
+                for nome, campo in campos.items()
+                if isinstance(campo, Colecao)
+            }
+
+        return [self.linha(row, campos, colecoes) for row in rows]
+
+    def listar(self, campos=None, filtro=None):
+        """Executa o SELECT (ordenado pela chave) e devolve a lista de dicts."""
+        campos = self._resolver(campos)
+        query = self.select(campos)
+        if filtro is not None:
+            query = filtro(query)
+        rows = db.session.execute(query.order_by(self.chave))
+        return self.linhas(rows, campos)
+
+    def obter(self, id, campos=None):
+        """Dict de um único registro pela chave, ou None."""
+        dados = self.listar(campos, lambda query: query.where(self.chave == id))
+        return dados[0] if dados else None
+
+    def _resolver(self, campos):
+        """Aceita None (todos), lista de nomes ou o dict de `campos_pedidos`."""
+        if campos is None:
+            return self.campos
+        if isinstance(campos, dict):
+            return campos
+        return {nome: self.campos[nome] for nome in campos}
+
+
+def _nomes(texto, validos, erro):
+    if not texto:
+        return []
+    nomes = [nome.strip() for nome in texto.split(',') if nome.strip()]
+    invalidos = [nome for nome in nomes if nome not in validos]
+    if invalidos:
+        raise ValueError(
+            f'{erro}: {", ".join(invalidos)}. '
+            f'Disponíveis: {", ".join(validos)}'
+        )
+    return nomes
@@ -0,0 +1,47 @@
+from database import db
+from jobs import fila
+from models import Planejamento
+from services import checkpoint_service, estimativa_service, planejamento_service
+from datetime import datetime
+
+# Tarefas executadas pela fila de jobs (ver jobs.py). Os parâmetros chegam
+# do JSON gravado no job; datas vêm em ISO 8601.
+
+
+@fila.tarefa('criar_checkpoints_em_lote')
+def criar_checkpoints_em_lote(contexto, data_ini, data_fim=None, **parametros):
+    contexto.progresso(0, 'Criando checkpoints')
+    resumo = checkpoint_service.criar_em_lote(
+        data_ini=datetime.fromisoformat(data_ini),
+        data_fim=datetime.fromisoformat(data_fim) if data_fim else None,
+        **parametros
+    )
+    return resumo
+
+
+@fila.tarefa('recalcular_planejamentos')
+def recalcular_planejamentos(contexto, ids=None):
+    contexto.progresso(0, 'Recalculando contadores')
+    total = Planejamento.recalcular_contadores(db.session.connection(), ids)
+    return {'planejamentos_recalculados': total}
+
+
+@fila.tarefa('excluir_planejamento')
+def excluir_planejamento(contexto, id_planejamento):
+    def progresso(excluidos, total):
+        # Cada lote é confirmado junto com o progresso
+        contexto.progresso(
+            excluidos * 100 / total if total else 100,
+            f'{excluidos} de {total} checkpoint(s) excluído(s)'
+        )
+
+    excluidos = planejamento_service.excluir_planejamento(
+        id_planejamento, progresso=progresso
+    )
+    return {'id_planejamento': id_planejamento, 'checkpoints_excluidos': excluidos}
+
+
+@fila.tarefa('atualizar_estimativas')
+def atualizar_estimativas(contexto, completo=False):
+    contexto.progresso(0, 'Ajustando estimativas de duração')
+    return estimativa_service.atualizar(completo=completo)
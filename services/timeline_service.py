@@ -0,0 +1,286 @@
+from database import db
+from cache import cache
+from models import CheckpointAtividade, Loja, Planejamento
+from models.periodo import sobrepoe_janela
+from services.analise_service import duracao_segundos
+from services.intervalos import ArvoreIntervalos, epoca
+from flask import current_app
+from sqlalchemy import event, inspect, literal, select
+from sqlalchemy.orm import Session
+from datetime import datetime
+import logging
+import math
+import threading
+
+logger = logging.getLogger('ativarub.timeline')
+
+# Barras por série em uma resposta; acima disso a resposta vem truncada
+LIMITE_BARRAS = 20000
+
+# Ids por consulta ao buscar as linhas encontradas no índice em memória
+TAMANHO_LOTE = 500
+
+# Margem da janela no índice em memória, em segundos
+FOLGA_S = 1
+
+# Série -> (modelo, chave, início, fim, colunas devolvidas)
+SERIES = {
+    'planejamentos': (
+        Planejamento,
+        Planejamento.id_planejamento,
+        Planejamento.data_ini,
+        Planejamento.data_fim,
+        {
+            'titulo': Planejamento.titulo,
+            'id_grupo_trabalho': Planejamento.id_grupo_trabalho,
+            'id_atividade': Planejamento.id_atividade,
+        },
+    ),
+    'checkpoints': (
+        CheckpointAtividade,
+        CheckpointAtividade.id_checkpoint_atividade,
+        CheckpointAtividade.data_ini,
+        CheckpointAtividade.data_fim_agenda,
+        {
+            'id_planejamento': CheckpointAtividade.id_planejamento,
+            'id_loja': CheckpointAtividade.id_loja,
+        },
+    ),
+}
+
+# Índices em memória por série: nome -> (versão de 'periodo', ArvoreIntervalos)
+_indices = {}
+# Reconstruções em andamento: nome -> thread
+_reconstruindo = {}
+_lock = threading.Lock()
+
+
+def timeline(inicio, fim, grupo_id=None, divisao_id=None, checkpoints=True,
+             limite=LIMITE_BARRAS):
+    """
+    Planejamentos e checkpoints cujo período cruza a janela [inicio, fim].
+
+    O resultado é colunar (uma lista por campo) para caber milhares de
+    barras em uma resposta: datas em segundos desde 1970 (UTC), fim nulo
+    para o que ainda está em execução (checkpoints agendados trazem o fim
+    previsto) e status como índice em `status`.
+    Cada série vem ordenada por início e limitada a `limite` barras
+    (`truncado` indica o corte).
+
+    No Postgres a janela usa os índices GiST de tsrange (models/periodo.py);
+    nos demais bancos, com o cache ativo, uma árvore de intervalos em
+    memória, reconstruída em segundo plano quando algum período muda.
+    """
+    if inicio is None or fim is None:
+        raise ValueError('Informe inicio e fim da janela')
+    if fim < inicio:
+        raise ValueError('fim deve ser posterior a inicio')
+
+    status = _Dicionario()
+    resultado = {
+        'janela': {'inicio': inicio.isoformat(), 'fim': fim.isoformat()},
+        'status': status.valores,
+        'truncado': False,
+    }
+
+    series = ['planejamentos', 'checkpoints'] if checkpoints else ['planejamentos']
+    for nome in series:
+        linhas, truncado = _linhas(nome, inicio, fim, _escopo(nome, grupo_id, divisao_id), limite)
+        resultado[nome] = _colunas(nome, linhas, status)
+        resultado['truncado'] = resultado['truncado'] or truncado
+
+    if checkpoints:
+        resultado['lojas'] = _lojas(set(resultado['checkpoints']['id_loja']))
+    return resultado
+
+
+def _escopo(nome, grupo_id, divisao_id):
+    """Condições de grupo/divisão da série."""
+    condicoes = []
+    if nome == 'planejamentos':
+        if grupo_id:
+            condicoes.append(Planejamento.id_grupo_trabalho == grupo_id)
+        if divisao_id:
+            # Planejamentos dos grupos com lojas na divisão
+            condicoes.append(Planejamento.id_grupo_trabalho.in_(
+                select(Loja.id_grupo_trabalho).where(Loja.id_divisao_bandeira == divisao_id)
+            ))
+    else:
+        if grupo_id:
+            condicoes.append(CheckpointAtividade.id_planejamento.in_(
+                select(Planejamento.id_planejamento).where(Planejamento.id_grupo_trabalho == grupo_id)
+            ))
+        if divisao_id:
+            condicoes.append(CheckpointAtividade.id_loja.in_(
+                select(Loja.id_loja).where(Loja.id_divisao_bandeira == divisao_id)
+            ))
+    return condicoes
+
+
+def _linhas(nome, inicio, fim, condicoes, limite):
+    """(linhas da série na janela em ordem de início, truncado)."""
+    modelo, chave, data_ini, data_fim, colunas = SERIES[nome]
+    query = select(
+        chave.label('id'), data_ini.label('inicio'), data_fim.label('fim'),
+        *(coluna.label(campo) for campo, coluna in colunas.items()),
+        modelo.status.label('status'),
+    )
+    ordem = (data_ini.asc().nulls_first(), chave)
+
+    dialeto = db.engine.dialect.name
+    janela = sobrepoe_janela(data_ini, data_fim, inicio, fim, dialeto)
+    arvore = _indice(nome) if dialeto != 'postgresql' else None
+
+    if arvore is None:
+        linhas = db.session.execute(query.where(janela, *condicoes).order_by(*ordem).limit(limite + 1)).all()
+        return linhas[:limite], len(linhas) > limite
+
+    # O índice devolve candidatos (início, id) na ordem final, com folga
+    # para o arredondamento dos segundos. O escopo filtra os candidatos
+    # uma única vez; a janela exata é aplicada na busca das linhas, lote a
+    # lote, até completar o limite
+    candidatos = sorted(arvore.sobrepostos(epoca(inicio) - FOLGA_S, epoca(fim) + FOLGA_S))
+    ids = [id_ for _, id_ in candidatos]
+    if condicoes and ids:
+        no_escopo = set(db.session.scalars(select(chave).where(*condicoes)))
+        ids = [id_ for id_ in ids if id_ in no_escopo]
+
+    linhas = []
+    for i in range(0, len(ids), TAMANHO_LOTE):
+        linhas.extend(db.session.execute(
+            query.where(chave.in_(ids[i:i + TAMANHO_LOTE]), janela).order_by(*ordem)
+        ).all())
+        if len(linhas) > limite:
+            break
+    return linhas[:limite], len(linhas) > limite
+
+
+def _indice(nome):
+    """
+    Árvore de intervalos da série, ou None com o cache desligado ou
+    enquanto ela é (re)construída em segundo plano; nesse caso a consulta
+    segue pelo SQL.
+    """
+    versao = cache.versao('periodo')
+    if versao is None:
+        return None
+
+    with _lock:
+        atual = _indices.get(nome)
+        if atual is not None and atual[0] == versao:
+            return atual[1]
+        if nome not in _reconstruindo:
+            thread = threading.Thread(
+                target=_reconstruir, args=(current_app._get_current_object(), nome),
+                name=f'timeline-indice-{nome}', daemon=True
+            )
+            _reconstruindo[nome] = thread
+            thread.start()
+    return None
+
+
+def _reconstruir(app, nome):
+    try:
+        with app.app_context():
+            try:
+                construir_indice(nome)
+            finally:
+                db.session.remove()
+    except Exception:
+        logger.exception('Falha ao construir o índice da timeline (%s)', nome)
+    finally:
+        with _lock:
+            _reconstruindo.pop(nome, None)
+
+
+def construir_indice(nome):
+    """Carrega a árvore de intervalos da série e a publica em `_indices`."""
+    # Versão lida antes da carga: uma mudança durante a leitura deixa o
+    # índice já desatualizado e provoca nova reconstrução
+    versao = cache.versao('periodo')
+    if versao is None:
+        return None
+
+    # Segundos calculados no banco: evita converter cada data em Python
+    _, chave, data_ini, data_fim, _ = SERIES[nome]
+    linhas = db.session.execute(select(chave, _segundos(data_ini), _segundos(data_fim)))
+    arvore = ArvoreIntervalos(
+        (ini, fim, (-math.inf if ini is None else ini, id_))
+        for id_, ini, fim in linhas
+    )
+    with _lock:
+        _indices[nome] = (versao, arvore)
+    return arvore
+
+
+def _segundos(coluna):
+    return duracao_segundos(coluna, literal(datetime(1970, 1, 1)))
+
+
+def _colunas(nome, linhas, status):
+    """Linhas de `_linhas` transpostas em uma lista por campo."""
+    campos = ['id', 'inicio', 'fim', *SERIES[nome][4], 'status']
+    colunas = dict(zip(campos, map(list, zip(*linhas)))) if linhas else {campo: [] for campo in campos}
+
+    for campo in ('inicio', 'fim'):
+        colunas[campo] = [
+            int(epoca(data)) if data is not None else None for data in colunas[campo]
+        ]
+    colunas['status'] = [status.indice(valor) for valor in colunas['status']]
+    return colunas
+
+
+def _lojas(ids):
+    """Nomes das lojas presentes nos checkpoints, em colunas."""
+    lojas = {'id': [], 'nome': []}
+    ids = sorted(ids)
+    for i in range(0, len(ids), TAMANHO_LOTE):
+        for id_loja, nome in db.session.execute(
+            select(Loja.id_loja, Loja.nome_loja)
+            .where(Loja.id_loja.in_(ids[i:i + TAMANHO_LOTE]))
+            .order_by(Loja.id_loja)
+        ):
+            lojas['id'].append(id_loja)
+            lojas['nome'].append(nome)
+    return lojas
+
+
+# =====================================================
+# Invalidação do índice
+# =====================================================
+
+_MODELOS_PERIODO = tuple(modelo for modelo, *_ in SERIES.values())
+
+# Colunas que definem o período de cada modelo
+_DATAS_PERIODO = ('data_ini', 'data_fim', 'data_fim_prevista')
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_periodos(session, flush_context):
+    """Marca 'periodo' só quando um período entra, sai ou muda de datas."""
+    for obj in list(session.new) + list(session.deleted) + list(session.dirty):
+        if not isinstance(obj, _MODELOS_PERIODO):
+            continue
+        if obj in session.dirty:
+            atributos = inspect(obj).attrs
+            if not any(
+                atributos[nome].history.has_changes()
+                for nome in _DATAS_PERIODO if nome in atributos
+            ):
+                continue
+        cache.marcar_alterado(session, 'periodo')
+        return
+
+
+class _Dicionario:
+    """Valores repetidos (status) trocados por índices em uma lista única."""
+
+    def __init__(self):
+        self.valores = []
+        self._indices = {}
+
+    def indice(self, valor):
+        if valor not in self._indices:
+            self._indices[valor] = len(self.valores)
+            self.valores.append(valor)
+        return self._indices[valor]
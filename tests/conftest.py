@@ -0,0 +1,135 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Configuração lida na importação de config.py: banco SQLite em memória,
+# cache local, sem threads da fila de jobs e com o detector de N+1 ativo
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('SECRET_KEY', 'testes')
+os.environ.setdefault('CACHE_TYPE', 'memory')
+os.environ.setdefault('JOBS_WORKERS', '0')
+# Cargas lazy repetidas (N+1) falham o teste em vez de só irem para o log
+os.environ.setdefault('NPLUS1_DETECTOR', 'raise')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from cache import cache
+from database import db
+from models import (
+    Atividade,
+    CheckpointAtividade,
+    DivisaoBandeira,
+    GrupoTrabalho,
+    Loja,
+    Planejamento,
+    Responsavel,
+)
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all(bind_key=None)
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
+        cache.backend.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def consultas(app):
+    """Lista com o SQL de cada comando executado; zerada com `.clear()`."""
+    executados = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        executados.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    yield executados
+    event.remove(db.engine, 'before_cursor_execute', registrar)
+
+
+@pytest.fixture
+def popular(app):
+    """
+    Acrescenta `lojas` lojas (com `checkpoints` checkpoints cada) sobre uma
+    base fixa de 2 divisões, 3 grupos, 3 responsáveis e 2 planejamentos por
+    grupo. Chamadas repetidas só aumentam o volume, os ids da base não mudam.
+    """
+    base = {}
+    inicio = datetime(2026, 1, 5, 8)
+
+    def criar_base():
+        responsaveis = [Responsavel(nome=f'Responsável {i}', contato=f'r{i}@ex.com') for i in range(3)]
+        db.session.add_all(responsaveis)
+        db.session.flush()
+
+        divisoes = [DivisaoBandeira(nome_bandeira=f'Divisão {i}') for i in range(2)]
+        grupos = [
+            GrupoTrabalho(nome_grupo=f'Grupo {i}', id_responsavel=responsaveis[i].id_responsavel)
+            for i in range(3)
+        ]
+        atividades = [Atividade(titulo=f'Atividade {i}') for i in range(2)]
+        db.session.add_all(divisoes + grupos + atividades)
+        db.session.flush()
+
+        planejamentos = [
+            Planejamento(
+                titulo=f'Planejamento {i}',
+                id_atividade=atividades[i % 2].id_atividade,
+                id_grupo_trabalho=grupos[i % 3].id_grupo_trabalho,
+                data_ini=inicio + timedelta(days=7 * i),
+                data_fim=inicio + timedelta(days=7 * i + 5),
+            )
+            for i in range(6)
+        ]
+        db.session.add_all(planejamentos)
+        db.session.flush()
+
+        base.update(divisoes=divisoes, grupos=grupos, planejamentos=planejamentos)
+
+    def acrescentar(lojas, checkpoints=2):
+        if not base:
+            criar_base()
+
+        total = db.session.query(Loja).count()
+        novas = [
+            Loja(
+                nome_loja=f'Loja {total + i}',
+                qtd_sku=100 + i,
+                qtd_pessoas=1 + i % 4,
+                id_divisao_bandeira=base['divisoes'][i % 2].id_bandeira_divisao,
+                id_grupo_trabalho=base['grupos'][i % 3].id_grupo_trabalho,
+            )
+            for i in range(lojas)
+        ]
+        db.session.add_all(novas)
+        db.session.flush()
+
+        for i, loja in enumerate(novas):
+            for j in range(checkpoints):
+                planejamento = base['planejamentos'][(i + j) % 6]
+                data_ini = planejamento.data_ini + timedelta(hours=j)
+                db.session.add(CheckpointAtividade(
+                    nome_checkpoint=f'Checkpoint {j}',
+                    id_atividade=planejamento.id_atividade,
+                    id_loja=loja.id_loja,
+                    id_planejamento=planejamento.id_planejamento,
+                    status='Concluído' if j % 2 else 'Pendente',
+                    data_ini=data_ini,
+                    data_fim=data_ini + timedelta(hours=2) if j % 2 else None,
+                ))
+        db.session.commit()
+        return base
+
+    return acrescentar
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import db
+from models import CheckpointAtividade, Loja
+from services import timeline_service
+from services.agendamento_service import agendar
+from services.conflito_service import CHECKPOINT, ConflitoAgenda
+from services.intervalos import epoca
+
+
+def _loja_do_grupo(base, indice=0):
+    id_grupo = base['grupos'][indice].id_grupo_trabalho
+    return db.session.query(Loja).filter_by(id_grupo_trabalho=id_grupo).order_by(Loja.id_loja).first()
+
+
+def test_agendar_grava_checkpoints_sem_data_fim(popular):
+    base = popular(3)
+    loja = _loja_do_grupo(base)
+    atividade = base['planejamentos'][0].id_atividade
+
+    resultado = agendar(atividade, datetime(2026, 6, 1, 8), lojas=[loja.id_loja], horas_padrao=2)
+    db.session.commit()
+
+    checkpoint = db.session.query(CheckpointAtividade).filter_by(
+        id_planejamento=resultado['grupos'][0]['id_planejamento']
+    ).one()
+    assert checkpoint.status == 'Pendente'
+    assert checkpoint.data_fim is None
+    assert checkpoint.data_fim_prevista.isoformat() == resultado['calendario'][0]['data_fim']
+
+
+def test_agendar_comeca_na_primeira_folga(popular):
+    # Grupo 0 tem planejamentos de 05/01 a 10/01 e de 26/01 a 31/01
+    base = popular(3)
+    loja = _loja_do_grupo(base)
+    atividade = base['planejamentos'][0].id_atividade
+
+    def inicio_agendado(inicio):
+        resultado = agendar(atividade, inicio, lojas=[loja.id_loja], horas_padrao=2, criar=False)
+        return resultado['grupos'][0]['data_ini']
+
+    # Livre na data pedida, apesar do planejamento posterior
+    assert inicio_agendado(datetime(2026, 1, 12, 8)) == '2026-01-12T08:00:00'
+    # Ocupado: dia seguinte ao fim (domingo), ou seja, segunda-feira
+    assert inicio_agendado(datetime(2026, 1, 7, 8)) == '2026-01-12T08:00:00'
+    # O calendário alcançaria o planejamento de 26/01: recomeça depois dele
+    assert inicio_agendado(datetime(2026, 1, 25, 20)) == '2026-02-02T20:00:00'
+
+
+def test_agendar_mesma_loja_duas_vezes_conflita(popular, monkeypatch):
+    base = popular(3)
+    loja = _loja_do_grupo(base)
+    atividade = base['planejamentos'][0].id_atividade
+    inicio = datetime(2026, 6, 1, 8)
+
+    item = agendar(atividade, inicio, lojas=[loja.id_loja])['calendario'][0]
+    db.session.commit()
+
+    # O checkpoint agendado ocupa a loja até o fim previsto, não só no início
+    fim = datetime.fromisoformat(item['data_fim'])
+    assert CHECKPOINT.conflitos(loja.id_loja, fim - timedelta(minutes=30), fim)
+
+    # Pelo mesmo grupo, o segundo rollout começa depois do primeiro
+    segundo = agendar(atividade, inicio, lojas=[loja.id_loja], criar=False)['calendario'][0]
+    assert datetime.fromisoformat(segundo['data_ini']) >= fim
+
+    # Por outro grupo, livre no período, o checkpoint da loja conflita
+    loja.id_grupo_trabalho = base['grupos'][1].id_grupo_trabalho
+    db.session.commit()
+    with pytest.raises(ConflitoAgenda):
+        agendar(atividade, inicio, lojas=[loja.id_loja])
+    db.session.rollback()
+
+    # Na timeline (pelo índice em memória) aparece com o fim previsto, não
+    # como barra aberta
+    monkeypatch.setattr(timeline_service, '_indices', {})
+    for nome in timeline_service.SERIES:
+        timeline_service.construir_indice(nome)
+    dados = timeline_service.timeline(datetime(2026, 6, 1), datetime(2026, 6, 30))
+    agendado = db.session.query(CheckpointAtividade).filter(
+        CheckpointAtividade.data_fim_prevista.isnot(None)
+    ).one()
+    posicao = dados['checkpoints']['id'].index(agendado.id_checkpoint_atividade)
+    assert dados['checkpoints']['fim'][posicao] == int(epoca(fim))
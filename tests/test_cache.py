@@ -0,0 +1,75 @@
+import time
+
+import pytest
+from flask import Flask, g
+
+from cache import Cache
+
+
+@pytest.fixture
+def cache_local():
+    app = Flask(__name__)
+    app.config['CACHE_TYPE'] = 'memory'
+    return Cache(app), app
+
+
+def test_memoize_nao_guarda_valor_invalidado_durante_carga(cache_local):
+    cache, _ = cache_local
+
+    def carregar_com_commit_concorrente():
+        cache.invalidar('loja')
+        return 'antigo'
+
+    assert cache.memoize(['loja'], 'k', carregar_com_commit_concorrente) == 'antigo'
+    assert cache.memoize(['loja'], 'k', lambda: 'novo') == 'novo'
+
+
+def test_resposta_nao_guarda_headers_da_requisicao(cache_local):
+    cache, app = cache_local
+    chamadas = []
+
+    @app.route('/dados')
+    @cache.resposta('loja')
+    def dados():
+        chamadas.append(1)
+        return 'ok', 200, {'X-Next-Cursor': '10', 'X-Database-Route': 'replica'}
+
+    client = app.test_client()
+    client.get('/dados')
+    resposta = client.get('/dados')
+
+    assert len(chamadas) == 1
+    assert resposta.headers['X-Next-Cursor'] == '10'
+    assert 'X-Database-Route' not in resposta.headers
+
+
+def test_memory_exige_um_processo_web():
+    app = Flask(__name__)
+    app.config.update(CACHE_TYPE='memory', WEB_CONCURRENCY=4)
+    with pytest.raises(RuntimeError):
+        Cache(app)
+
+
+def test_resposta_lida_na_replica_expira_no_atraso_da_replica(cache_local, monkeypatch):
+    cache, app = cache_local
+    corpo = ['antigo']
+
+    @app.route('/dados')
+    @cache.resposta('loja', ttl=300)
+    def dados():
+        g.usou_replica = True
+        return corpo[0]
+
+    agora = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: agora[0])
+    client = app.test_client()
+
+    # Réplica atrasada: o corpo anterior ao commit ficou sob a versão nova
+    cache.invalidar('loja')
+    assert client.get('/dados').get_data(as_text=True) == 'antigo'
+    corpo[0] = 'novo'
+
+    agora[0] += cache.ttl_replica - 1
+    assert client.get('/dados').get_data(as_text=True) == 'antigo'
+    agora[0] += 2
+    assert client.get('/dados').get_data(as_text=True) == 'novo'
@@ -0,0 +1,95 @@
+from database import db
+from models import CheckpointAtividade, Planejamento, Rollup
+from models.rollup import COLUNAS_TOTAIS
+
+URL = '/checkpoint-atividades/api/bulk'
+
+
+def _estado():
+    """Contadores dos planejamentos e totais de rollup como estão no banco."""
+    db.session.expire_all()
+    return (
+        {
+            p.id_planejamento: (p.qtd_pendente, p.qtd_em_andamento, p.qtd_concluido, p.status)
+            for p in Planejamento.query.all()
+        },
+        {
+            (r.escopo, r.id_referencia): tuple(getattr(r, c) for c in COLUNAS_TOTAIS)
+            for r in Rollup.query.all()
+        },
+    )
+
+
+def _recontado():
+    connection = db.session.connection()
+    Planejamento.recalcular_contadores(connection)
+    Rollup.recalcular(connection)
+    estado = _estado()
+    db.session.rollback()
+    return estado
+
+
+def _checkpoint(planejamento, **extra):
+    return {
+        'nome_checkpoint': 'Contagem',
+        'id_atividade': planejamento.id_atividade,
+        'id_planejamento': planejamento.id_planejamento,
+        'data_ini': '2026-04-06T08:00:00',
+        'data_fim': '2026-04-06T12:00:00',
+        **extra,
+    }
+
+
+def test_criacao_em_lote_mantem_contadores_e_rollups(client, popular):
+    base = popular(9)
+    planejamento = base['planejamentos'][1]
+
+    for corpo in (
+        {'checkpoint': _checkpoint(planejamento, status='Concluído'),
+         'id_divisao_bandeira': base['divisoes'][0].id_bandeira_divisao},
+        {'checkpoint': _checkpoint(planejamento, status='Em andamento', data_ini='2026-04-07T08:00:00',
+                                   data_fim='2026-04-07T12:00:00'),
+         'id_grupo_trabalho': base['grupos'][2].id_grupo_trabalho},
+    ):
+        resposta = client.post(URL, json=corpo)
+        assert resposta.status_code == 201, resposta.get_json()
+        assert resposta.get_json()['total_criados'] > 0
+
+    estado = _estado()
+    assert estado == _recontado()
+    assert estado[0][planejamento.id_planejamento][3] == 'Concluído'
+
+
+def test_criacao_em_lote_referencias_inexistentes_400(client, popular):
+    base = popular(3)
+    planejamento = base['planejamentos'][0]
+    lojas = [1, 2]
+
+    for checkpoint, erro in (
+        (_checkpoint(planejamento, id_atividade=999), 'Atividade não encontrada'),
+        (_checkpoint(planejamento, id_planejamento=999), 'Planejamento não encontrado'),
+    ):
+        resposta = client.post(URL, json={'checkpoint': checkpoint, 'lojas': lojas})
+        assert resposta.status_code == 400
+        assert resposta.get_json()['error'] == erro
+
+    assert client.post(URL, json={'checkpoint': {'nome_checkpoint': 'x'}, 'lojas': lojas}).status_code == 400
+    assert CheckpointAtividade.query.filter_by(nome_checkpoint='Contagem').count() == 0
+
+
+def test_criacao_em_lote_com_conflito_409(client, popular):
+    base = popular(3)
+    planejamento = base['planejamentos'][0]
+    corpo = {'checkpoint': _checkpoint(planejamento), 'lojas': [1, 2]}
+    assert client.post(URL, json=corpo).status_code == 201
+    antes = _estado()
+
+    resposta = client.post(URL, json={**corpo, 'lojas': [2, 3]})
+    assert resposta.status_code == 409
+    assert [c['agrupador'] for c in resposta.get_json()['conflitos']] == [2]
+    assert _estado() == antes
+
+    # Com permitir_conflitos o lote é criado
+    resposta = client.post(URL, json={**corpo, 'lojas': [2, 3], 'permitir_conflitos': True})
+    assert resposta.status_code == 201
+    assert _estado() == _recontado()
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from database import db
+from models import CheckpointAtividade, Loja
+from services.conflito_service import CHECKPOINT
+
+
+def _checkpoint(base, loja, inicio, fim=None):
+    planejamento = base['planejamentos'][0]
+    db.session.add(CheckpointAtividade(
+        nome_checkpoint='Existente',
+        id_atividade=planejamento.id_atividade,
+        id_loja=loja.id_loja,
+        id_planejamento=planejamento.id_planejamento,
+        status='Pendente',
+        data_ini=inicio,
+        data_fim=fim,
+    ))
+
+
+def test_conflitos_por_agrupador_periodo_pontual_no_fim_da_janela(popular):
+    base = popular(2, checkpoints=0)
+    loja_a, loja_b = db.session.query(Loja).order_by(Loja.id_loja).all()
+    inicio = datetime(2026, 6, 1, 8)
+    fim = inicio + timedelta(hours=4)
+
+    # Na loja B o novo período é só o instante `fim`, o fim da janela comum,
+    # e já existe um checkpoint pendente começando nele
+    _checkpoint(base, loja_b, fim)
+    # Começar quando o outro termina não conflita
+    _checkpoint(base, loja_a, fim)
+    db.session.commit()
+
+    conflitos = CHECKPOINT.conflitos_por_agrupador({
+        loja_a.id_loja: (inicio, fim),
+        loja_b.id_loja: (fim, None),
+    })
+
+    assert [c['agrupador'] for c in conflitos] == [loja_b.id_loja]
@@ -0,0 +1,49 @@
+import pytest
+
+from services.dashboard_service import carregar_dashboard
+
+# Comandos SQL por combinação de filtros: um por bloco exibido no template
+ORCAMENTO = {
+    'sem_filtro': 2,
+    'divisao': 4,
+    'grupo': 3,
+    'divisao_grupo': 5,
+}
+
+
+def _filtros(base, combinacao):
+    divisao_id = base['divisoes'][0].id_bandeira_divisao
+    grupo_id = base['grupos'][0].id_grupo_trabalho
+    return {
+        'sem_filtro': {},
+        'divisao': {'divisao_id': divisao_id},
+        'grupo': {'grupo_id': grupo_id},
+        'divisao_grupo': {'divisao_id': divisao_id, 'grupo_id': grupo_id},
+    }[combinacao]
+
+
+@pytest.mark.parametrize('combinacao', sorted(ORCAMENTO))
+def test_carregar_dashboard_consultas_fixas(popular, consultas, combinacao):
+    contagens = []
+    for lojas in (3, 60):
+        filtros = _filtros(popular(lojas), combinacao)
+        consultas.clear()
+        dados = carregar_dashboard(**filtros)
+        contagens.append(len(consultas))
+
+    assert contagens == [ORCAMENTO[combinacao]] * 2
+    assert dados['acompanhamento_planejamento']
+
+
+@pytest.mark.parametrize('combinacao', sorted(ORCAMENTO))
+def test_rota_dashboard_consultas_fixas(popular, consultas, client, combinacao):
+    """A renderização do template não dispara consultas por linha."""
+    contagens = []
+    for lojas in (3, 60):
+        filtros = _filtros(popular(lojas), combinacao)
+        consultas.clear()
+        resposta = client.get('/gestao/dashboard', query_string=filtros)
+        assert resposta.status_code == 200
+        contagens.append(len(consultas))
+
+    assert contagens[0] == contagens[1] <= ORCAMENTO[combinacao]
@@ -0,0 +1,49 @@
+import pytest
+from flask import render_template_string
+
+from database import db
+from detector_n1 import NMais1Detectado, detector_n1
+from models import Planejamento
+
+# A relação lazy é lida na linha 3 do template
+TEMPLATE = """<ul>
+{% for planejamento in planejamentos %}
+  <li>{{ planejamento.grupo_trabalho.nome_grupo }}</li>
+{% endfor %}
+</ul>"""
+
+
+def test_carga_lazy_repetida_no_template_levanta(app, client, popular):
+    # 6 planejamentos em 3 grupos, nenhum ainda na sessão
+    popular(0)
+    db.session.expunge_all()
+
+    @app.route('/teste/n1')
+    def listar():
+        return render_template_string(TEMPLATE, planejamentos=Planejamento.query.all())
+
+    with pytest.raises(NMais1Detectado) as erro:
+        client.get('/teste/n1')
+
+    ocorrencia, = erro.value.ocorrencias
+    assert ocorrencia['relacao'] == 'Planejamento.grupo_trabalho'
+    assert ocorrencia['origem'].endswith(':3')
+    assert ocorrencia['vezes'] == 3
+
+
+def test_monitorar_fora_de_requisicao(popular):
+    popular(0)
+    db.session.expunge_all()
+
+    with pytest.raises(NMais1Detectado) as erro:
+        with detector_n1.monitorar():
+            for planejamento in Planejamento.query.all():
+                planejamento.grupo_trabalho.nome_grupo
+
+    assert erro.value.ocorrencias[0]['origem'].startswith('tests/test_detector_n1.py:')
+
+    # Carregadas juntas (selectinload) não acusam
+    db.session.expunge_all()
+    with detector_n1.monitorar():
+        for planejamento in Planejamento.query.options(db.selectinload(Planejamento.grupo_trabalho)):
+            planejamento.grupo_trabalho.nome_grupo
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from database import db
+from models import CheckpointAtividade, EstimativaDuracao, Loja
+from services import estimativa_service
+
+# Horas de cada checkpoint concluído, por loja (desvio e quantis não triviais)
+DURACOES_H = [1.5, 2, 3.25, 4, 6.5, 8, 2.75, 5]
+
+
+@pytest.fixture
+def historico(popular):
+    """Checkpoints concluídos das duas atividades da base, com durações variadas."""
+    base = popular(len(DURACOES_H), checkpoints=0)
+    lojas = db.session.query(Loja).order_by(Loja.id_loja).all()
+    # Loja sem SKU: entra nas horas, mas não na taxa
+    lojas[-1].qtd_sku = 0
+
+    planejamentos = base['planejamentos'][:2]
+    inicio = datetime(2026, 1, 5, 8)
+    for i, (loja, horas) in enumerate(zip(lojas, DURACOES_H)):
+        for j, planejamento in enumerate(planejamentos):
+            data_ini = inicio + timedelta(days=i)
+            db.session.add(CheckpointAtividade(
+                nome_checkpoint='Execução',
+                id_atividade=planejamento.id_atividade,
+                id_loja=loja.id_loja,
+                id_planejamento=planejamento.id_planejamento,
+                status='Concluído',
+                data_ini=data_ini,
+                data_fim=data_ini + timedelta(hours=horas * (j + 1)),
+            ))
+    db.session.flush()
+    # Histórico antigo: fora da margem do incremental
+    db.session.execute(update(CheckpointAtividade).values(updated_at=datetime(2026, 1, 1)))
+    db.session.commit()
+    return [planejamento.id_atividade for planejamento in planejamentos]
+
+
+def _por_atividade(parametros):
+    return {linha['id_atividade']: linha for linha in parametros}
+
+
+def test_ajuste_numpy_igual_ao_python(historico):
+    pytest.importorskip('numpy')
+    colunas = estimativa_service._historico()
+
+    python = _por_atividade(estimativa_service._ajustar_python(*colunas))
+    numpy = _por_atividade(estimativa_service._ajustar_numpy(*colunas))
+
+    assert set(python) == set(numpy) == set(historico)
+    for id_atividade, linha in python.items():
+        assert numpy[id_atividade] == pytest.approx(linha)
+        assert linha['amostras'] == len(DURACOES_H)
+        assert linha['amostras_taxa'] == len(DURACOES_H) - 1
+
+
+def test_ajuste_python_quantis(historico):
+    colunas = estimativa_service._historico()
+    linha = _por_atividade(estimativa_service._ajustar_python(*colunas))[historico[0]]
+
+    ordenadas = sorted(DURACOES_H)
+    assert linha['horas_media'] == pytest.approx(sum(DURACOES_H) / len(DURACOES_H))
+    # Mediana de 8 valores: média dos dois centrais
+    assert linha['horas_p50'] == pytest.approx((ordenadas[3] + ordenadas[4]) / 2)
+    assert linha['horas_p10'] == pytest.approx(ordenadas[0] + 0.7 * (ordenadas[1] - ordenadas[0]))
+
+
+def test_atualizacao_incremental(historico):
+    primeira, segunda = historico
+    ultimo = datetime(2026, 1, 2)
+    db.session.execute(
+        update(CheckpointAtividade)
+        .where(CheckpointAtividade.id_atividade == segunda)
+        .values(updated_at=ultimo)
+    )
+    db.session.commit()
+
+    assert estimativa_service.atualizar()['completo'] is True
+    db.session.commit()
+    assert db.session.get(EstimativaDuracao, primeira).dados_ate == ultimo
+
+    # Só os checkpoints dentro da margem da última atualização são relidos
+    resumo = estimativa_service.atualizar()
+    db.session.commit()
+    assert (resumo['atividades'], resumo['amostras'], resumo['completo']) == (1, len(DURACOES_H), False)
+
+    def alterar_primeira(updated_at):
+        checkpoint = db.session.query(CheckpointAtividade).filter_by(id_atividade=primeira).first()
+        checkpoint.data_fim += timedelta(hours=10)
+        checkpoint.updated_at = updated_at
+        db.session.commit()
+        estimativa_service.atualizar()
+        db.session.commit()
+        db.session.expire_all()
+        return db.session.get(EstimativaDuracao, primeira).horas_media
+
+    media = db.session.get(EstimativaDuracao, primeira).horas_media
+    # Fora da margem a alteração não é vista pelo incremental...
+    assert alterar_primeira(ultimo - 2 * estimativa_service.MARGEM_INCREMENTAL) == media
+    # ...dentro dela (commit concorrente gravado fora de ordem), sim
+    margem = alterar_primeira(ultimo - estimativa_service.MARGEM_INCREMENTAL / 2)
+    assert margem == pytest.approx(media + 20 / len(DURACOES_H))
+
+    # O ajuste completo relê todas as atividades
+    resumo = estimativa_service.atualizar(completo=True)
+    db.session.commit()
+    assert (resumo['atividades'], resumo['completo']) == (2, True)
+    assert db.session.get(EstimativaDuracao, primeira).horas_media == pytest.approx(margem)
+
+
+def test_prever_escala_pela_loja():
+    estimativa = EstimativaDuracao(
+        horas_p10=1, horas_p50=2, horas_p90=3,
+        taxa_p10=0.01, taxa_p50=0.02, taxa_p90=0.04,
+    )
+
+    # Taxa (horas * pessoas / SKU) escalada por SKU / pessoas
+    assert estimativa.prever(200, 4) == pytest.approx((0.5, 1, 2))
+    assert estimativa.prever(200, None) == pytest.approx((2, 4, 8))
+    # Sem SKU, os quantis de horas da atividade
+    assert estimativa.prever(0, 4) == (1, 2, 3)
+
+    estimativa.taxa_p50 = None
+    assert estimativa.prever(200, 4) == (1, 2, 3)
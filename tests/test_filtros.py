@@ -0,0 +1,149 @@
+import base64
+import json
+
+import pytest
+
+from database import db
+from models import Loja, Planejamento
+from services import filtros
+
+
+def _paginas(client, url, chave, limite=3):
+    """Ids de todas as páginas seguindo X-Next-Cursor."""
+    ids = []
+    cursor = None
+    separador = '&' if '?' in url else '?'
+    for _ in range(100):
+        resposta = client.get(f'{url}{separador}limit={limite}' + (f'&after={cursor}' if cursor else ''))
+        assert resposta.status_code == 200, resposta.get_json()
+        ids.extend(linha[chave] for linha in resposta.get_json())
+        cursor = resposta.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return ids
+    raise AssertionError('paginação não terminou')
+
+
+def _esperado(linhas, campo, desc):
+    """Ordem da API: NULLs por último nas duas direções, chave como desempate."""
+    com_valor = sorted(
+        (linha for linha in linhas if linha[campo] is not None),
+        key=lambda linha: linha['id'],
+    )
+    com_valor.sort(key=lambda linha: linha[campo], reverse=desc)
+    nulos = sorted((linha for linha in linhas if linha[campo] is None), key=lambda linha: linha['id'])
+    return [linha['id'] for linha in com_valor + nulos]
+
+
+@pytest.fixture
+def lojas(popular):
+    popular(10, checkpoints=0)
+    # Valores repetidos e nulos caindo nas bordas das páginas
+    for i, loja in enumerate(db.session.query(Loja).order_by(Loja.id_loja)):
+        loja.qtd_sku = None if i % 3 == 0 else (i % 4) * 10
+        loja.qtd_pessoas = i % 2
+    db.session.commit()
+    return [
+        {
+            'id': loja.id_loja, 'id_loja': loja.id_loja, 'nome_loja': loja.nome_loja,
+            'qtd_sku': loja.qtd_sku, 'qtd_pessoas': loja.qtd_pessoas, 'created_at': loja.created_at,
+        }
+        for loja in db.session.query(Loja)
+    ]
+
+
+@pytest.mark.parametrize('desc', [False, True])
+@pytest.mark.parametrize('campo', sorted(filtros.LOJA.ordenacoes))
+def test_paginacao_lojas_por_cada_ordenacao(client, lojas, campo, desc):
+    sort = f'-{campo}' if desc else campo
+    ids = _paginas(client, f'/lojas/api?fields=id_loja&sort={sort}', 'id_loja')
+    assert ids == _esperado(lojas, campo, desc)
+
+
+@pytest.mark.parametrize('desc', [False, True])
+@pytest.mark.parametrize('campo', sorted(filtros.PLANEJAMENTO.ordenacoes))
+def test_paginacao_planejamentos_por_cada_ordenacao(client, popular, campo, desc):
+    popular(0)
+    # Sem data de fim (em aberto) e títulos repetidos
+    for i, planejamento in enumerate(db.session.query(Planejamento).order_by(Planejamento.id_planejamento)):
+        if i % 2:
+            planejamento.data_fim = None
+        planejamento.titulo = f'Planejamento {i % 3}'
+    db.session.commit()
+    linhas = [
+        {'id': p.id_planejamento, **{nome: getattr(p, nome) for nome in filtros.PLANEJAMENTO.ordenacoes}}
+        for p in db.session.query(Planejamento)
+    ]
+    assert any(linha['data_fim'] is None for linha in linhas)
+
+    sort = f'-{campo}' if desc else campo
+    ids = _paginas(client, f'/planejamentos/api?sort={sort}', 'id_planejamento', limite=2)
+    assert ids == _esperado(linhas, campo, desc)
+
+
+def _ids_loja(resposta):
+    return [linha['id_loja'] for linha in resposta.get_json()]
+
+
+def _cursor(valores):
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'nao-e-base64!',
+    _cursor({'id': 1}),
+    _cursor([1]),                 # ordenação diferente (só a chave)
+    _cursor(['dez', 1]),          # tipo errado para qtd_sku
+    _cursor([[10], 1]),           # valor não escalar
+    base64.urlsafe_b64encode(b'{quebrado').decode(),
+])
+def test_cursor_invalido_400(client, lojas, cursor):
+    resposta = client.get(f'/lojas/api?sort=qtd_sku&limit=2&after={cursor}')
+    assert resposta.status_code == 400
+    assert 'error' in resposta.get_json()
+
+
+@pytest.mark.parametrize('parametros', [
+    'endereco=x',           # coluna fora de `filtros`
+    'nome_loja=Loja 1',
+    'created_at_de=2026-01-01',  # data não permitida nesta listagem
+    'sort=endereco',
+    'fields=senha',
+    'limit=muitos',
+    'id_loja=um',
+])
+def test_parametros_fora_da_lista_400(client, lojas, parametros):
+    assert client.get(f'/lojas/api?{parametros}').status_code == 400
+
+
+def test_filtros_e_busca(client, lojas):
+    ids = sorted(linha['id'] for linha in lojas)
+    assert _ids_loja(client.get(f'/lojas/api?id_loja={ids[0]},{ids[2]}')) == [ids[0], ids[2]]
+
+    loja = db.session.get(Loja, ids[1])
+    loja.nome_loja = 'Loja 100%_especial'
+    db.session.commit()
+    # % e _ são literais na busca
+    assert _ids_loja(client.get('/lojas/api?q=100%25_ESP')) == [ids[1]]
+    assert _ids_loja(client.get('/lojas/api?q=1%25')) == []
+
+
+def test_ate_com_data_inclui_o_dia_inteiro(client, popular):
+    popular(0)
+    # Planejamentos da base começam em 05/01 08:00, um por semana
+    dia = client.get('/planejamentos/api?data_ini_ate=2026-01-12').get_json()
+    assert [p['data_ini'] for p in dia] == ['2026-01-05T08:00:00', '2026-01-12T08:00:00']
+
+    instante = client.get('/planejamentos/api?data_ini_ate=2026-01-12T00:00:00').get_json()
+    assert [p['data_ini'] for p in instante] == ['2026-01-05T08:00:00']
+
+    faixa = client.get('/planejamentos/api?data_ini_de=2026-01-12T08:00:00&data_ini_ate=2026-01-19').get_json()
+    assert [p['data_ini'] for p in faixa] == ['2026-01-12T08:00:00', '2026-01-19T08:00:00']
+
+    assert client.get('/planejamentos/api?data_ini_ate=ontem').status_code == 400
+
+
+def test_consulta_sem_requisicao():
+    consulta = filtros.LOJA.consulta({'sort': '-qtd_sku', 'limit': '5000'})
+    assert consulta.limit == filtros.LIMITE_MAXIMO
+    # A chave entra por último, crescente, como desempate
+    assert [(coluna.key, desc) for coluna, desc in consulta.ordem] == [('qtd_sku', True), ('id_loja', False)]
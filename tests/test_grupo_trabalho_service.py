@@ -0,0 +1,150 @@
+from database import db
+from models import GrupoTrabalho, Loja, Responsavel, Rollup
+from services.grupo_trabalho_service import serializar_grupos, serializar_responsaveis
+
+
+def _criar(responsaveis, grupos_por_responsavel, lojas_por_grupo, divisao):
+    for i in range(responsaveis):
+        responsavel = Responsavel(nome=f'Extra {i}', contato='x')
+        db.session.add(responsavel)
+        db.session.flush()
+        for j in range(grupos_por_responsavel):
+            grupo = GrupoTrabalho(nome_grupo=f'Extra {i}.{j}', id_responsavel=responsavel.id_responsavel)
+            db.session.add(grupo)
+            db.session.flush()
+            db.session.add_all([
+                Loja(
+                    nome_loja=f'Extra {i}.{j}.{k}',
+                    qtd_pessoas=k + 1,
+                    id_divisao_bandeira=divisao,
+                    id_grupo_trabalho=grupo.id_grupo_trabalho,
+                )
+                for k in range(lojas_por_grupo)
+            ])
+    db.session.commit()
+
+
+def _contar(consultas, funcao):
+    db.session.expunge_all()
+    consultas.clear()
+    funcao()
+    return len(consultas)
+
+
+def test_serializar_grupos_consultas_fixas(popular, consultas):
+    divisao = popular(3)['divisoes'][0].id_bandeira_divisao
+    contagens = []
+    for responsaveis in (1, 15):
+        _criar(responsaveis, 2, 3, divisao)
+        contagens.append(_contar(consultas, lambda: serializar_grupos(GrupoTrabalho.query.all())))
+
+    # grupos (com responsável no JOIN), totais e lojas_info
+    assert contagens == [3, 3]
+
+
+def test_serializar_responsaveis_consultas_fixas(popular, consultas):
+    divisao = popular(3)['divisoes'][0].id_bandeira_divisao
+    contagens = []
+    for responsaveis in (1, 15):
+        _criar(responsaveis, 3, 1, divisao)
+        contagens.append(_contar(consultas, lambda: serializar_responsaveis(Responsavel.query.all())))
+
+    # responsáveis e grupos de todos eles
+    assert contagens == [2, 2]
+
+
+def test_totais_sem_rollup_usam_as_lojas(popular):
+    popular(12)
+    esperado = {
+        grupo['id_grupo_trabalho']: (grupo['total_lojas'], grupo['total_pessoas'])
+        for grupo in serializar_grupos(GrupoTrabalho.query.all())
+    }
+    assert all(total_lojas for total_lojas, _ in esperado.values())
+
+    # Banco migrado sem `flask recalcular-rollups`
+    Rollup.query.delete()
+    db.session.commit()
+
+    grupos = serializar_grupos(GrupoTrabalho.query.all())
+    assert {g['id_grupo_trabalho']: (g['total_lojas'], g['total_pessoas']) for g in grupos} == esperado
+
+
+def test_api_de_grupos_com_os_mesmos_totais_sem_rollup(popular, client):
+    popular(12)
+    # Banco migrado sem `flask recalcular-rollups`
+    Rollup.query.delete()
+    db.session.commit()
+
+    esperado = {
+        g['id_grupo_trabalho']: (g['total_lojas'], g['total_pessoas'])
+        for g in serializar_grupos(GrupoTrabalho.query.all())
+    }
+    assert all(total_lojas for total_lojas, _ in esperado.values())
+
+    lista = client.get('/grupos_trabalho/api').get_json()
+    assert {g['id_grupo_trabalho']: (g['total_lojas'], g['total_pessoas']) for g in lista} == esperado
+
+    for id_grupo, totais in esperado.items():
+        grupo = client.get(f'/grupos_trabalho/{id_grupo}').get_json()
+        assert (grupo['total_lojas'], grupo['total_pessoas']) == totais
+
+
+def _lojas_por_grupo():
+    """{id_grupo_trabalho: (total_lojas, total_pessoas, ids das lojas)} contado das lojas."""
+    por_grupo = {grupo.id_grupo_trabalho: [] for grupo in GrupoTrabalho.query}
+    for loja in Loja.query:
+        if loja.id_grupo_trabalho is not None:
+            por_grupo[loja.id_grupo_trabalho].append(loja)
+    return {
+        id_grupo: (len(lojas), sum(loja.qtd_pessoas or 0 for loja in lojas), sorted(loja.id_loja for loja in lojas))
+        for id_grupo, lojas in por_grupo.items()
+    }
+
+
+def _get(client, consultas, url):
+    """JSON da rota e número de consultas executadas para gerá-lo."""
+    db.session.expunge_all()
+    consultas.clear()
+    resposta = client.get(url)
+    assert resposta.status_code == 200
+    return resposta.get_json(), len(consultas)
+
+
+def test_api_de_grupos_totais_e_consultas_fixas(popular, client, consultas):
+    divisao = popular(3)['divisoes'][0].id_bandeira_divisao
+    contagens = []
+    for responsaveis in (1, 15):
+        _criar(responsaveis, 2, 3, divisao)
+        grupos, total = _get(client, consultas, '/grupos_trabalho/api')
+        contagens.append(total)
+
+        assert {
+            g['id_grupo_trabalho']: (
+                g['total_lojas'], g['total_pessoas'], sorted(loja['id'] for loja in g['lojas_info'])
+            )
+            for g in grupos
+        } == _lojas_por_grupo()
+
+    # grupos (com responsável e totais), lojas_info
+    assert contagens == [2, 2]
+    # Repetida sem alterações, vem do cache
+    assert _get(client, consultas, '/grupos_trabalho/api')[1] == 0
+
+
+def test_lista_de_responsaveis_consultas_fixas(popular, client, consultas):
+    divisao = popular(3)['divisoes'][0].id_bandeira_divisao
+    contagens = []
+    for responsaveis in (1, 15):
+        _criar(responsaveis, 3, 1, divisao)
+        lista, total = _get(client, consultas, '/responsaveis/lista')
+        contagens.append(total)
+
+        esperado = {responsavel.id_responsavel: [] for responsavel in Responsavel.query}
+        for grupo in GrupoTrabalho.query.order_by(GrupoTrabalho.id_grupo_trabalho):
+            if grupo.id_responsavel is not None:
+                esperado[grupo.id_responsavel].append(grupo.id_grupo_trabalho)
+        assert {r['id_responsavel']: sorted(r['grupos_trabalho']) for r in lista} == esperado
+
+    # responsáveis e grupos de todos eles
+    assert contagens == [2, 2]
+    assert _get(client, consultas, '/responsaveis/lista')[1] == 0
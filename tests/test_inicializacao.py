@@ -0,0 +1,34 @@
+import threading
+
+from config import Config
+from database import db
+
+
+def test_sob_demanda_registra_blueprints_antes_da_primeira_requisicao(monkeypatch):
+    monkeypatch.setattr(Config, 'LAZY_STARTUP', True)
+
+    from app import create_app
+    app = create_app()
+    inicializacao = app.extensions['inicializacao']
+    assert inicializacao.resumo()['pendentes']
+    assert 'atividade.api_listar_atividades' not in app.view_functions
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+
+        respostas = []
+        threads = [
+            threading.Thread(target=lambda: respostas.append(app.test_client().get('/atividades/api').status_code))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert respostas == [200] * 4
+        assert inicializacao.resumo()['pendentes'] == []
+        assert app.test_client().get('/gestao/api/rollup/grupo').status_code == 200
+
+        db.session.remove()
+        db.drop_all(bind_key=None)
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import db
+from jobs import fila
+from models import CheckpointAtividade, Planejamento
+from models.job import Job, JOB_CONCLUIDO, JOB_EM_ANDAMENTO, JOB_ERRO
+from services import planejamento_service
+
+
+@fila.tarefa('teste_eco')
+def _eco(contexto, valor):
+    return {'valor': valor}
+
+
+def _abandonar(job, tentativas):
+    """Simula um worker que reservou o job e morreu."""
+    job.status = JOB_EM_ANDAMENTO
+    job.tentativas = tentativas
+    job.updated_at = datetime.utcnow() - timedelta(seconds=fila.lease + 1)
+    db.session.commit()
+
+
+def test_job_abandonado_volta_a_ser_executado(app):
+    job = fila.enfileirar('teste_eco', valor=1)
+    id_job = job.id_job
+    _abandonar(job, 1)
+
+    assert fila.executar_pendentes() == 1
+    job = db.session.get(Job, id_job)
+    assert (job.status, job.tentativas, job.resultado) == (JOB_CONCLUIDO, 2, {'valor': 1})
+
+
+def test_job_em_andamento_dentro_do_lease_nao_e_reservado(app):
+    job = fila.enfileirar('teste_eco', valor=1)
+    job.status = JOB_EM_ANDAMENTO
+    db.session.commit()
+
+    assert fila.executar_pendentes() == 0
+
+
+def test_job_abandonado_sem_tentativas_restantes_vira_erro(app):
+    job = fila.enfileirar('teste_eco', valor=1)
+    id_job = job.id_job
+    _abandonar(job, fila.max_tentativas)
+
+    assert fila.executar_pendentes() == 0
+    job = db.session.get(Job, id_job)
+    assert job.status == JOB_ERRO
+
+
+def test_exclusao_interrompida_mantem_contadores(popular):
+    planejamento = popular(30)['planejamentos'][0]
+    id_planejamento = planejamento.id_planejamento
+
+    def falhar_apos_primeiro_lote(excluidos, total):
+        db.session.commit()
+        raise RuntimeError('worker interrompido')
+
+    with pytest.raises(RuntimeError):
+        planejamento_service.excluir_planejamento(id_planejamento, lote=3, progresso=falhar_apos_primeiro_lote)
+    db.session.rollback()
+    db.session.expire_all()
+
+    planejamento = db.session.get(Planejamento, id_planejamento)
+    restantes = CheckpointAtividade.query.filter_by(id_planejamento=id_planejamento).all()
+    assert restantes
+    assert planejamento.qtd_pendente == sum(c.status == 'Pendente' for c in restantes)
+    assert planejamento.qtd_concluido == sum(c.status == 'Concluído' for c in restantes)
+
+
+def test_exclusao_pequena_roda_na_requisicao(client, popular):
+    assert fila.workers == 0
+    id_planejamento = popular(3)['planejamentos'][0].id_planejamento
+
+    resposta = client.delete(f'/planejamentos/api/{id_planejamento}')
+    assert resposta.status_code == 204
+    db.session.expire_all()
+    assert db.session.get(Planejamento, id_planejamento) is None
+    assert CheckpointAtividade.query.filter_by(id_planejamento=id_planejamento).count() == 0
+    assert Job.query.count() == 0
+
+    id_planejamento = Planejamento.query.first().id_planejamento
+    resposta = client.post(f'/planejamentos/{id_planejamento}/delete', follow_redirects=True)
+    assert 'Planejamento excluído com sucesso!' in resposta.get_data(as_text=True)
+    assert db.session.get(Planejamento, id_planejamento) is None
+
+
+def test_exclusao_grande_sem_worker_avisa(client, popular, monkeypatch):
+    monkeypatch.setattr(planejamento_service, 'EXCLUSAO_SINCRONA_MAX', 2)
+    # 4 checkpoints no primeiro planejamento
+    id_planejamento = popular(12)['planejamentos'][0].id_planejamento
+
+    resposta = client.delete(f'/planejamentos/api/{id_planejamento}')
+    assert resposta.status_code == 202
+    assert 'flask jobs-worker' in resposta.get_json()['aviso']
+    assert db.session.get(Planejamento, id_planejamento) is not None
+
+    resposta = client.post(f'/planejamentos/{id_planejamento}/delete', follow_redirects=True)
+    assert 'nenhum worker' in resposta.get_data(as_text=True)
+
+    # O worker executa os dois jobs; o segundo não encontra mais o planejamento
+    assert fila.executar_pendentes() == 2
+    db.session.expire_all()
+    assert db.session.get(Planejamento, id_planejamento) is None
+
+
+def test_limite_da_listagem_de_jobs(client, app):
+    for valor in range(3):
+        fila.enfileirar('teste_eco', valor=valor)
+
+    assert len(client.get('/jobs/?limit=-1').get_json()) == 1
+    assert len(client.get('/jobs/?limit=0').get_json()) == 1
+    assert len(client.get('/jobs/?limit=2').get_json()) == 2
@@ -0,0 +1,45 @@
+from database import db
+from models import DivisaoBandeira, GrupoTrabalho, Loja
+from services import loja_service
+
+
+def _base():
+    divisao = DivisaoBandeira(nome_bandeira='Sul')
+    grupo = GrupoTrabalho(nome_grupo='Equipe 1')
+    db.session.add_all([divisao, grupo])
+    db.session.commit()
+    return divisao, grupo
+
+
+def test_ids_desconhecidos_sao_erros_de_linha(app):
+    divisao, _ = _base()
+
+    resumo = loja_service.importar_lojas([
+        {'nome_loja': 'A', 'id_divisao_bandeira': '999'},
+        {'nome_loja': 'B', 'id_divisao_bandeira': str(divisao.id_bandeira_divisao), 'id_grupo_trabalho': '999'},
+        {'nome_loja': 'C', 'id_divisao_bandeira': str(divisao.id_bandeira_divisao)},
+    ])
+    db.session.commit()
+
+    assert [erro['linha'] for erro in resumo['erros']] == [1, 2]
+    assert resumo['inseridas'] == 1
+    assert [loja.nome_loja for loja in Loja.query.all()] == ['C']
+
+
+def test_atualizacao_altera_so_colunas_presentes(app):
+    _base()
+    loja_service.importar_lojas([{
+        'nome_loja': 'A', 'divisao_bandeira': 'Sul', 'grupo_trabalho': 'Equipe 1',
+        'endereco': 'Rua 1', 'qtd_sku': '10', 'qtd_pessoas': '2',
+    }])
+    db.session.commit()
+    loja = Loja.query.one()
+
+    resumo = loja_service.importar_lojas([{'id_loja': str(loja.id_loja), 'qtd_sku': '50'}])
+    db.session.commit()
+    db.session.expire_all()
+
+    assert resumo['atualizadas'] == 1
+    loja = db.session.get(Loja, loja.id_loja)
+    assert (loja.nome_loja, loja.endereco, loja.qtd_sku, loja.qtd_pessoas) == ('A', 'Rua 1', 50, 2)
+    assert loja.id_grupo_trabalho is not None
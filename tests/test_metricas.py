@@ -0,0 +1,39 @@
+import pytest
+
+from config import Config
+
+
+@pytest.fixture
+def app_metricas(monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_ENABLED', True)
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', 'segredo')
+
+    from app import create_app
+    app = create_app()
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+
+    @app.route('/falha')
+    def falha():
+        raise RuntimeError('falha')
+
+    return app
+
+
+def test_excecao_nao_tratada_conta_como_500(app_metricas):
+    client = app_metricas.test_client()
+    assert client.get('/falha').status_code == 500
+
+    corpo = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{endpoint="falha",method="GET",status="500"} 1' in corpo
+    assert 'http_request_duration_seconds_count{endpoint="falha"} 1' in corpo
+
+
+def test_metrics_restrito_a_rede_ou_token(app_metricas):
+    client = app_metricas.test_client()
+    externo = {'REMOTE_ADDR': '203.0.113.7'}
+
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics', environ_base=externo).status_code == 403
+    assert client.get(
+        '/metrics', environ_base=externo, headers={'Authorization': 'Bearer segredo'}
+    ).status_code == 200
@@ -0,0 +1,25 @@
+import os
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import downgrade, upgrade
+
+from database import db
+
+MIGRACOES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def _diferencas():
+    with db.engine.connect() as connection:
+        return compare_metadata(MigrationContext.configure(connection), db.metadata)
+
+
+def test_migracoes_criam_o_esquema_dos_modelos(app):
+    db.drop_all(bind_key=None)
+
+    upgrade(directory=MIGRACOES)
+    assert _diferencas() == []
+
+    downgrade(directory=MIGRACOES, revision='base')
+    upgrade(directory=MIGRACOES)
+    assert _diferencas() == []
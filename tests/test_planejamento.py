@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
+from database import db
+from models import CheckpointAtividade, Loja, Planejamento
+from models.planejamento import STATUS_CONTADORES
+
+
+def _recontagem():
+    """{id_planejamento: (qtd_pendente, qtd_em_andamento, qtd_concluido, status)} contado dos checkpoints."""
+    contagens = {
+        (id_planejamento, status): total
+        for id_planejamento, status, total in db.session.execute(
+            select(CheckpointAtividade.id_planejamento, CheckpointAtividade.status, func.count())
+            .group_by(CheckpointAtividade.id_planejamento, CheckpointAtividade.status)
+        )
+    }
+    esperado = {}
+    for id_planejamento in db.session.scalars(select(Planejamento.id_planejamento)):
+        qtd = [contagens.get((id_planejamento, status), 0) for status in STATUS_CONTADORES]
+        esperado[id_planejamento] = (*qtd, 'Concluído' if qtd[2] else 'Pendente')
+    return esperado
+
+
+def _contadores():
+    db.session.expire_all()
+    return {
+        p.id_planejamento: (p.qtd_pendente, p.qtd_em_andamento, p.qtd_concluido, p.status)
+        for p in db.session.query(Planejamento)
+    }
+
+
+def _novo_checkpoint(planejamento, loja, status):
+    checkpoint = CheckpointAtividade(
+        nome_checkpoint='Teste',
+        id_atividade=planejamento.id_atividade,
+        id_loja=loja.id_loja,
+        id_planejamento=planejamento.id_planejamento,
+        status=status,
+        data_ini=datetime(2026, 3, 2, 8),
+    )
+    db.session.add(checkpoint)
+    db.session.commit()
+    return checkpoint
+
+
+def test_contadores_acompanham_cada_alteracao(popular):
+    base = popular(4)
+    assert _contadores() == _recontagem()
+    primeiro, segundo = base['planejamentos'][:2]
+    loja = db.session.query(Loja).first()
+
+    # Inserção
+    checkpoint = _novo_checkpoint(segundo, loja, 'Pendente')
+    assert _contadores() == _recontagem()
+
+    # Mudança de status (com histórico carregado)
+    checkpoint.status = 'Concluído'
+    db.session.commit()
+    contadores = _contadores()
+    assert contadores == _recontagem()
+    assert contadores[segundo.id_planejamento][3] == 'Concluído'
+
+    # Mudança de planejamento e de status juntas
+    checkpoint.id_planejamento = primeiro.id_planejamento
+    checkpoint.status = 'Em andamento'
+    db.session.commit()
+    assert _contadores() == _recontagem()
+
+    # Exclusão
+    db.session.delete(checkpoint)
+    db.session.commit()
+    assert _contadores() == _recontagem()
+
+
+def test_checkpoint_expirado_atualiza_os_dois_planejamentos(popular):
+    base = popular(4)
+    primeiro, segundo = base['planejamentos'][:2]
+    checkpoint = _novo_checkpoint(primeiro, db.session.query(Loja).first(), 'Concluído')
+
+    # Alterado depois de expirado: o planejamento de origem também é ajustado
+    db.session.expire(checkpoint)
+    checkpoint.id_planejamento = segundo.id_planejamento
+    db.session.commit()
+    assert _contadores() == _recontagem()
+
+    db.session.expire(checkpoint)
+    checkpoint.status = 'Pendente'
+    db.session.commit()
+    assert _contadores() == _recontagem()
+
+
+def test_comando_recalcular_planejamentos(app, popular):
+    popular(6, checkpoints=3)
+    esperado = _recontagem()
+
+    # Contadores corrompidos (ex.: banco anterior aos contadores)
+    db.session.execute(update(Planejamento).values(
+        qtd_pendente=0, qtd_em_andamento=0, qtd_concluido=7, status='Concluído'
+    ))
+    db.session.commit()
+
+    resultado = app.test_cli_runner().invoke(args=['recalcular-planejamentos'])
+    assert resultado.exit_code == 0, resultado.output
+    assert f'{len(esperado)} planejamento(s)' in resultado.output
+    assert _contadores() == esperado
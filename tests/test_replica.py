@@ -0,0 +1,26 @@
+from config import Config
+from database import db
+from models import Atividade
+
+
+def test_falha_na_replica_repete_no_primario(monkeypatch, tmp_path):
+    # Réplica acessível, mas sem as tabelas: a consulta falha na execução
+    monkeypatch.setattr(Config, 'SQLALCHEMY_BINDS', {
+        'replica': {'url': f'sqlite:///{tmp_path / "replica.db"}'},
+    })
+
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(Atividade(titulo='Inventário'))
+        db.session.commit()
+
+        resposta = app.test_client().get('/atividades/api')
+
+        assert resposta.status_code == 200
+        assert [a['titulo'] for a in resposta.get_json()] == ['Inventário']
+        assert 'X-Database-Route' not in resposta.headers
+
+        db.session.remove()
+        db.drop_all(bind_key=None)
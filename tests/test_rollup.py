@@ -0,0 +1,39 @@
+from database import db
+from models import CheckpointAtividade, Rollup
+from models.rollup import ESCOPO_GRUPO
+
+
+def _totais():
+    return {
+        (r.escopo, r.id_referencia): tuple(getattr(r, c) for c in ('total_lojas', 'qtd_pendente', 'qtd_concluido'))
+        for r in Rollup.query.all()
+    }
+
+
+def test_checkpoint_expirado_aplica_delta_sem_recalculo_geral(popular, monkeypatch):
+    popular(6)
+    recalculos = []
+    original = Rollup.recalcular.__func__
+    monkeypatch.setattr(
+        Rollup, 'recalcular',
+        classmethod(lambda cls, connection, escopos=None: recalculos.append(escopos) or original(cls, connection, escopos))
+    )
+
+    checkpoint = CheckpointAtividade.query.filter_by(status='Pendente').first()
+    db.session.expire(checkpoint)
+    checkpoint.status = 'Concluído'
+    db.session.commit()
+
+    assert recalculos == []
+    incremental = _totais()
+    Rollup.recalcular(db.session.connection())
+    assert incremental == _totais()
+
+
+def test_aplicar_deltas_cria_e_incrementa_escopo(app):
+    connection = db.session.connection()
+    for _ in range(2):
+        Rollup.aplicar_deltas(connection, {(ESCOPO_GRUPO, 42): {'total_lojas': 1, 'qtd_pendente': 3}})
+    db.session.commit()
+
+    assert _totais() == {(ESCOPO_GRUPO, 42): (2, 6, 0)}
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from cache import cache
+from database import db
+from models import CheckpointAtividade
+from services import timeline_service
+
+JANELA = (datetime(2026, 1, 1), datetime(2026, 3, 1))
+
+
+def _sem_indice(monkeypatch):
+    monkeypatch.setattr(timeline_service, '_indice', lambda nome: None)
+
+
+def test_so_mudanca_de_periodo_invalida_o_indice(popular):
+    popular(4)
+    versao = cache.versao('periodo')
+    checkpoint = db.session.query(CheckpointAtividade).filter_by(status='Pendente').first()
+
+    checkpoint.status = 'Em andamento'
+    db.session.commit()
+    assert cache.versao('periodo') == versao
+
+    checkpoint.data_fim = checkpoint.data_ini + timedelta(hours=1)
+    db.session.commit()
+    assert cache.versao('periodo') != versao
+
+
+def test_indice_desatualizado_reconstroi_fora_da_requisicao(popular, monkeypatch):
+    popular(4)
+    chamadas = []
+    monkeypatch.setattr(timeline_service, '_reconstruir', lambda app, nome: chamadas.append(nome))
+    monkeypatch.setattr(timeline_service, '_indices', {})
+
+    # Sem índice pronto a consulta segue pelo SQL e a carga vai para uma thread
+    assert timeline_service._indice('checkpoints') is None
+    timeline_service._reconstruindo['checkpoints'].join()
+    assert chamadas == ['checkpoints']
+
+    timeline_service.construir_indice('checkpoints')
+    assert timeline_service._indice('checkpoints') is not None
+
+
+def test_escopo_filtrado_uma_vez(popular, consultas, monkeypatch):
+    base = popular(60, checkpoints=4)
+    filtros = {
+        'grupo_id': base['grupos'][0].id_grupo_trabalho,
+        'divisao_id': base['divisoes'][0].id_bandeira_divisao,
+    }
+    monkeypatch.setattr(timeline_service, 'TAMANHO_LOTE', 5)
+    monkeypatch.setattr(timeline_service, '_indices', {})
+    for nome in timeline_service.SERIES:
+        timeline_service.construir_indice(nome)
+
+    consultas.clear()
+    com_indice = timeline_service.timeline(*JANELA, limite=8, **filtros)
+    # Por série: escopo + lotes até o limite (8 linhas em lotes de 5); mais as lojas
+    assert len(consultas) <= 2 * (1 + 2) + 1
+
+    _sem_indice(monkeypatch)
+    assert com_indice == timeline_service.timeline(*JANELA, limite=8, **filtros)
+    assert com_indice['checkpoints']['id']